@@ -0,0 +1,43 @@
+from constants import BIRD_HEIGHT, BOARD_HEIGHT
+
+
+class Autopilot:
+    # Lookahead search over GameState copies: for "flap now" and "don't flap", play each branch forward with a
+    # few simple flap-below-target policies and keep the action whose best branch survives longest.
+    def __init__(self, horizon=45, target_offsets=(-40, -10, 20, 50)):
+        self.horizon = horizon
+        self.target_offsets = target_offsets
+
+    def rollout_policy(self, state, offset):
+        gap = state.next_gap()
+        target = (gap[0] + gap[1]) / 2 + offset if gap is not None else BOARD_HEIGHT / 2
+        return state.bird_y + BIRD_HEIGHT / 2 > target and state.velocity_y >= 0
+
+    def evaluate(self, state, flap):
+        best = -1
+        for offset in self.target_offsets:
+            sim = state.snapshot()
+            sim.step(flap)
+            ticks = 1
+            while not sim.game_over and ticks < self.horizon:
+                if sim.velocity_y < 0:
+                    # The rollout policies never flap while climbing, so the whole climb is one coarse step.
+                    ticks += sim.advance(min(-sim.velocity_y, self.horizon - ticks))
+                else:
+                    sim.step(self.rollout_policy(sim, offset))
+                    ticks += 1
+            value = ticks + sim.score
+            if value > best:
+                best = value
+                if ticks >= self.horizon:
+                    break
+        return best
+
+    def decide(self, state):
+        if state.game_over:
+            return False
+        flap_value = self.evaluate(state, True)
+        wait_value = self.evaluate(state, False)
+        if flap_value == wait_value:
+            return self.rollout_policy(state, 0)
+        return flap_value > wait_value
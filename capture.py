@@ -0,0 +1,87 @@
+import os
+import queue
+import struct
+import threading
+import zlib
+
+import pygame
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def png_chunk(tag, data):
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+
+def write_png(surface, path, level=1):
+    # pygame.image.save holds the GIL for the whole PNG encode, which stalls the game loop. Here only the
+    # pixel copy runs under the GIL; zlib releases it while compressing.
+    width, height = surface.get_size()
+    stride = width * 3
+    pixels = pygame.image.tobytes(surface, "RGB")
+    rows = b"".join(b"\x00" + pixels[i:i + stride] for i in range(0, len(pixels), stride))
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    with open(path, "wb") as f:
+        f.write(PNG_SIGNATURE + png_chunk(b"IHDR", header) + png_chunk(b"IDAT", zlib.compress(rows, level))
+                + png_chunk(b"IEND", b""))
+
+
+class FrameCapture:
+    # Copies each presented frame into one of a fixed pool of surfaces and lets worker threads encode and write
+    # them as a numbered image sequence. If no buffer is free the frame is dropped, never waited for.
+    def __init__(self, directory, screen, pool_size=8, workers=2, image_format="tga"):
+        os.makedirs(directory, exist_ok=True)
+        self.pattern = os.path.join(directory, "frame_{:06d}." + image_format)
+        self.save = write_png if image_format == "png" else pygame.image.save
+        self.free = queue.Queue()
+        for _ in range(pool_size):
+            self.free.put(pygame.Surface(screen.get_size(), 0, screen))
+        self.pending = queue.Queue()
+        self.frame = 0
+        self.captured = 0
+        self.dropped = 0
+        self.written = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+        self.workers = [threading.Thread(target=self.write_frames, name=f"capture-{i}", daemon=True)
+                        for i in range(workers)]
+        for worker in self.workers:
+            worker.start()
+
+    def capture(self, screen):
+        frame = self.frame
+        self.frame += 1
+        try:
+            buffer = self.free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return False
+        buffer.blit(screen, (0, 0))
+        self.pending.put((frame, buffer))
+        self.captured += 1
+        return True
+
+    def write_frames(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+            frame, buffer = item
+            try:
+                self.save(buffer, self.pattern.format(frame))
+                with self.lock:
+                    self.written += 1
+            except (pygame.error, OSError):
+                with self.lock:
+                    self.errors += 1
+            self.free.put(buffer)
+
+    def close(self):
+        for _ in self.workers:
+            self.pending.put(None)
+        for worker in self.workers:
+            worker.join()
+
+    def report(self):
+        return (f"Frame capture: {self.captured} of {self.frame} frames captured, {self.dropped} dropped, "
+                f"{self.written} written, {self.errors} failed")
@@ -0,0 +1,17 @@
+BOARD_WIDTH = 2048
+BOARD_HEIGHT = 1024
+BIRD_WIDTH = 34
+BIRD_HEIGHT = 24
+PIPE_WIDTH = 64
+PIPE_HEIGHT = 512
+COIN_WIDTH = 32
+COIN_HEIGHT = 32
+OPENING_SPACE = BOARD_HEIGHT // 4
+GRAVITY = 1
+JUMP_VELOCITY = -12
+PIPE_MOVEMENT_RANGE = 50
+PIPE_SPEED = 1
+COIN_ROTATION_SPEED = 5
+FPS = 60
+FRAME_MS = 1000 / FPS
+DIFFICULTY_THRESHOLDS = [0, 5, 10, 20, 30, 40, 50]
@@ -0,0 +1,58 @@
+import datetime
+import random
+from collections import OrderedDict, namedtuple
+
+from constants import COIN_HEIGHT, OPENING_SPACE, PIPE_HEIGHT
+
+
+class Segment(namedtuple("Segment", "base_y offset_y move_roll coin_roll coin_offset")):
+    # The raw random draws for one pipe pair. Whether the pair moves and carries a coin still depends on
+    # the difficulty when it spawns, so everyone gets the same course at the same rules.
+    __slots__ = ()
+
+    def resolve(self, difficulty_level):
+        top_pipe_y = self.base_y + self.offset_y
+        is_moving = self.move_roll < difficulty_level * 0.1
+        coin_y = None
+        if self.coin_roll < 0.3 + (difficulty_level * 0.05):
+            coin_y = top_pipe_y + PIPE_HEIGHT + self.coin_offset
+        return top_pipe_y, is_moving, coin_y
+
+
+class Course:
+    # A lazy, indexable stream of pipe-pair segments. Segment k is drawn from its own generator seeded with
+    # (seed, k), so any segment can be computed directly without generating the ones before it.
+    def __init__(self, seed, name=None, cache_size=64):
+        self.seed = seed
+        self.name = name if name is not None else f"Course {seed}"
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+
+    def __getitem__(self, k):
+        if k < 0:
+            raise IndexError("courses are infinite; negative segment indexes are not supported")
+        segment = self.cache.get(k)
+        if segment is not None:
+            self.cache.move_to_end(k)
+            return segment
+        rng = random.Random(f"{self.seed}:{k}")
+        segment = Segment(rng.randint(-PIPE_HEIGHT + 100, -100), rng.randint(-100, 100), rng.random(), rng.random(),
+                          rng.randint(20, OPENING_SPACE - COIN_HEIGHT - 20))
+        self.cache[k] = segment
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return segment
+
+    def __iter__(self):
+        k = 0
+        while True:
+            yield self[k]
+            k += 1
+
+    def pipe_pair(self, k, difficulty_level):
+        return self[k].resolve(difficulty_level)
+
+
+def daily_course(date=None):
+    date = date or datetime.date.today()
+    return Course(f"daily-{date.isoformat()}", f"Daily Challenge {date.isoformat()}")
@@ -1,9 +1,44 @@
+import argparse
 import pygame
 import random
 import sys
 import json
 import os
 import math
+import shutil
+import tempfile
+import time
+from autopilot import Autopilot
+from capture import FrameCapture
+from course import daily_course
+from constants import (BIRD_HEIGHT, BIRD_WIDTH, BOARD_HEIGHT, BOARD_WIDTH, COIN_HEIGHT, COIN_ROTATION_SPEED, COIN_WIDTH,
+                       FRAME_MS, GRAVITY, JUMP_VELOCITY, OPENING_SPACE, PIPE_HEIGHT, PIPE_MOVEMENT_RANGE, PIPE_SPEED,
+                       PIPE_WIDTH)
+from frame_pacer import FramePacer
+from gc_pauses import GCMonitor
+from jump_arcs import ARC, can_clear
+from parallax import load_background
+from profiler import SessionProfiler
+from quality import BAKED_BRIGHTNESS, FLAT_BACKGROUND, STILL_COINS, QualityGovernor
+from rewind import RewindBuffer
+from soak import REPORT_FILE as SOAK_REPORT_FILE, SoakDriver
+from ghosts import GHOST_DIR, MAX_GHOSTS, GhostRecorder, load_ghosts, prune_ghosts, save_run
+from game_state import GameState, difficulty_params, level_for_score, move_pipe, roll_pipe_pair
+from leaderboard import DEFAULT_HOST, DEFAULT_PORT, MAX_ENTRIES, LeaderboardClient, LeaderboardServer
+from multiplayer import BIRD_X, RaceClient, RaceServer
+from multiplayer import DEFAULT_HOST as RACE_HOST, DEFAULT_PORT as RACE_PORT
+from widgets import Button, InputLatency, Slider, WidgetGroup
+try:
+    from flock import Flock
+    from neuroevolution import CHECKPOINT_FILE, NeuralController
+    from particles import FEATHER, SPARK, ParticleSystem
+except ImportError:  # NumPy is not installed
+    Flock = None
+    ParticleSystem = None
+    CHECKPOINT_FILE = None
+    NeuralController = None
+from telemetry import (CAUSE_BOTTOM_PIPE, CAUSE_GROUND, CAUSE_NONE, CAUSE_TOP_PIPE, COIN, DEATH, DIFFICULTY, JUMP,
+                       PIPE_PASS, RUN_START, TELEMETRY_DIR, Telemetry)
 
 pygame.init()
 pygame.mixer.init()
@@ -17,15 +52,10 @@ GAME_OVER = "game_over"
 HIGH_SCORES = "high_scores"
 SETTINGS = "settings"
 INSTRUCTIONS = "instructions"
+RACING = "racing"
+REWINDING = "rewinding"
 HIGH_SCORE_FILE = "highscores.json"
-BOARD_WIDTH = 2048
-BOARD_HEIGHT = 1024
-BIRD_WIDTH = 34
-BIRD_HEIGHT = 24
-PIPE_WIDTH = 64
-PIPE_HEIGHT = 512
-COIN_WIDTH = 32
-COIN_HEIGHT = 32
+ATTRACT_DELAY = 30000  # ms of menu inactivity before the demo starts
 
 # Try loading a spooky font, fall back to Arial if not found
 try:
@@ -38,25 +68,82 @@ SMALL_FONT = pygame.font.SysFont("Arial", 24)
 TINY_FONT = pygame.font.SysFont("Arial", 16)
 
 
-def load_high_scores():
-    if os.path.exists(HIGH_SCORE_FILE):
-        with open(HIGH_SCORE_FILE, "r") as f:
-            return json.load(f)
-    return []
+TEXT_CACHE_SIZE = 512
+_text_cache = {}
 
 
-def save_high_scores(high_scores):
-    with open(HIGH_SCORE_FILE, "w") as f:
-        json.dump(high_scores, f)
+def render_text(font, text, color):
+    # HUD and menu text rarely changes between frames, so rendered surfaces are reused.
+    key = (font, text, color)
+    surface = _text_cache.get(key)
+    if surface is None:
+        if len(_text_cache) >= TEXT_CACHE_SIZE:
+            _text_cache.clear()
+        surface = _text_cache[key] = font.render(text, True, color)
+    return surface
 
 
-def update_high_scores(name, score, high_scores):
-    high_scores.append({"name": name, "score": score})
+def load_high_scores(path=HIGH_SCORE_FILE):
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            return json.load(f)
+    return []
+
+
+def update_high_scores(name, score, high_scores, ghost=None):
+    entry = {"name": name, "score": score}
+    if ghost is not None:
+        entry["ghost"] = ghost
+    high_scores.append(entry)
     high_scores.sort(key=lambda x: x["score"], reverse=True)
     return high_scores[:10]
 
 
+def start_leaderboard():
+    # Cabinets point LEADERBOARD_HOST at the shared server; without it we serve highscores.json ourselves.
+    # Returns (server, client); server is None unless this game is the one serving the board.
+    host = os.environ.get("LEADERBOARD_HOST")
+    port = int(os.environ.get("LEADERBOARD_PORT", DEFAULT_PORT))
+    server = None
+    if host is None:
+        host = DEFAULT_HOST
+        try:
+            server = LeaderboardServer(HIGH_SCORE_FILE, host, port)
+            server.run_in_thread()
+        except OSError:
+            server = None  # another game on this machine is already serving the board
+    return server, LeaderboardClient(host, port).start()
+
+
+def start_race(address, name):
+    # With no address we host the race on this machine (unless another game here already is) and join it.
+    # Returns (server, client); server is None unless this game is hosting.
+    host, _, port = address.partition(":")
+    port = int(port) if port else RACE_PORT
+    server = None
+    if not host:
+        host = RACE_HOST
+        try:
+            server = RaceServer(host, port)
+            server.run_in_thread()
+        except OSError:
+            server = None
+    return server, RaceClient(host, port, name).start()
+
+
+def load_attract_pilot():
+    # Prefer the trained neural controller for the demo; fall back to the search autopilot.
+    if NeuralController is not None and os.path.exists(CHECKPOINT_FILE):
+        try:
+            return NeuralController.load(CHECKPOINT_FILE)
+        except (OSError, ValueError, KeyError):
+            pass
+    return Autopilot()
+
+
 class Bird:
+    __slots__ = ("img", "x", "y", "width", "height")
+
     def __init__(self, img, x, y, width, height):
         self.img = img
         self.x = x
@@ -66,71 +153,45 @@ class Bird:
 
 
 class Coin:
+    __slots__ = ("img", "x", "y", "width", "height", "rotation", "rotation_speed")
+
     def __init__(self, img, x, y, width, height):
+        self.width = width
+        self.height = height
+        self.rotation_speed = COIN_ROTATION_SPEED
+        self.spawn(img, x, y)
+
+    def spawn(self, img, x, y):
         self.img = img
         self.x = x
         self.y = y
-        self.width = width
-        self.height = height
         self.rotation = 0
-        self.rotation_speed = 5
 
 
 class Pipe:
+    __slots__ = ("img", "x", "y", "width", "height", "passed", "is_top", "pair_index", "is_moving", "movement_range",
+                 "direction", "speed")
+
     def __init__(self, img, x, y, width, height, is_moving=False):
+        self.width = width
+        self.height = height
+        self.movement_range = PIPE_MOVEMENT_RANGE
+        self.speed = PIPE_SPEED
+        self.spawn(img, x, y, is_moving)
+
+    def spawn(self, img, x, y, is_moving=False):
         self.img = img
         self.x = x
         self.y = y
-        self.width = width
-        self.height = height
         self.passed = False
+        self.is_top = False
+        self.pair_index = 0
         self.is_moving = is_moving
-        self.movement_range = 50
         self.direction = 1
-        self.speed = 1
 
     def update(self):
         if self.is_moving:
-            self.y += self.direction * self.speed
-            if abs(self.y % (2 * self.movement_range) - self.movement_range) > self.movement_range - 1:
-                self.direction *= -1
-
-
-class Slider:
-    def __init__(self, x, y, w, h, min_val, max_val, initial_val):
-        self.rect = pygame.Rect(x, y, w, h)
-        self.knob_rect = pygame.Rect(x, y - 5, 20, h + 10)
-        self.min_val = min_val
-        self.max_val = max_val
-        self.val = initial_val
-        self.dragging = False
-        self.update_knob_pos()
-
-    def update_knob_pos(self):
-        knob_x = self.rect.x + (self.val - self.min_val) / (self.max_val - self.min_val) * self.rect.width
-        self.knob_rect.centerx = knob_x
-
-    def handle_event(self, event):
-        if event.type == pygame.MOUSEBUTTONDOWN:
-            if self.knob_rect.collidepoint(event.pos):
-                self.dragging = True
-            elif self.rect.collidepoint(event.pos):
-                self.val = self.min_val + (event.pos[0] - self.rect.x) / self.rect.width * (self.max_val - self.min_val)
-                self.val = max(self.min_val, min(self.max_val, self.val))
-                self.update_knob_pos()
-                return True
-        elif event.type == pygame.MOUSEBUTTONUP:
-            self.dragging = False
-        elif event.type == pygame.MOUSEMOTION and self.dragging:
-            self.val = self.min_val + (event.pos[0] - self.rect.x) / self.rect.width * (self.max_val - self.min_val)
-            self.val = max(self.min_val, min(self.max_val, self.val))
-            self.update_knob_pos()
-            return True
-        return False
-
-    def draw(self, screen):
-        pygame.draw.rect(screen, (100, 100, 100), self.rect)
-        pygame.draw.rect(screen, (200, 200, 200), self.knob_rect)
+            self.y, self.direction = move_pipe(self.y, self.direction, self.speed, self.movement_range)
 
 
 class FlappyBirdGame:
@@ -142,12 +203,30 @@ class FlappyBirdGame:
         self.game_over = False
         self.velocity_x = -4
         self.velocity_y = 0
-        self.gravity = 1
+        self.gravity = GRAVITY
         self.pipe_interval = 1500
-        self.last_pipe_time = pygame.time.get_ticks()
+        self.sim_time = 0
+        self.last_pipe_time = 0
+        self.rng = random.Random()
+        self.course = None
+        self.autopilot = None
+        self.ghosts = []
+        self.ghost_recorder = None
+        self.rewind = None
+        self.assist = False
+        self.flock = None
+        self.particles = ParticleSystem() if ParticleSystem is not None else None
         self.pipes = []
         self.coins = []
+        self.pipe_pool = []
+        self.coin_pool = []
+        self.entities_allocated = 0
+        self.gc_monitor = None
+        self.quality = QualityGovernor()
         self.difficulty_level = 0
+        self.ticks = 0
+        self.pairs_spawned = 0
+        self.telemetry = None
         self.user_name = ""
         self.volume = 0.5
         self.brightness = 1.0
@@ -156,8 +235,14 @@ class FlappyBirdGame:
         self.load_images()
         self.load_sounds()
         self.bird = Bird(self.bird_img, self.bird_x, self.bird_y, BIRD_WIDTH, BIRD_HEIGHT)
-        self.bg_x1 = 0
-        self.bg_x2 = BOARD_WIDTH
+        self.ghost_img = self.bird_img.copy()
+        self.ghost_img.set_alpha(90)
+        self.preview_dots = []
+        for color in ((90, 255, 90), (255, 80, 80)):
+            dot = pygame.Surface((8, 8), pygame.SRCALPHA)
+            pygame.draw.circle(dot, color + (200,), (4, 4), 4)
+            self.preview_dots.append(dot)
+        self.background = load_background(self.background_img)
         self.bg_speed = 2
         self.dark_overlay = pygame.Surface((BOARD_WIDTH, BOARD_HEIGHT))
         self.update_brightness()
@@ -187,6 +272,17 @@ class FlappyBirdGame:
         self.top_pipe_img = pygame.transform.scale(self.top_pipe_img, (PIPE_WIDTH, PIPE_HEIGHT))
         self.bottom_pipe_img = pygame.transform.scale(self.bottom_pipe_img, (PIPE_WIDTH, PIPE_HEIGHT))
         self.coin_img = pygame.transform.scale(self.coin_img, (COIN_WIDTH, COIN_HEIGHT))
+        # Coins only ever sit at multiples of COIN_ROTATION_SPEED degrees, so every frame is rotated once here,
+        # together with its collision mask.
+        self.coin_frames = {}
+        for angle in range(0, 360, COIN_ROTATION_SPEED):
+            rotated_image = pygame.transform.rotate(self.coin_img, angle)
+            rect = rotated_image.get_rect(center=(COIN_WIDTH // 2, COIN_HEIGHT // 2))
+            self.coin_frames[angle] = (rotated_image, rect.left, rect.top,
+                                       pygame.mask.from_surface(rotated_image))
+        self.bird_mask = pygame.mask.from_surface(self.bird_img)
+        self.top_pipe_mask = pygame.mask.from_surface(self.top_pipe_img)
+        self.bottom_pipe_mask = pygame.mask.from_surface(self.bottom_pipe_img)
 
     def load_sounds(self):
         try:
@@ -212,127 +308,364 @@ class FlappyBirdGame:
         alpha = int(255 * (1 - self.brightness))
         self.dark_overlay.fill((0, 0, 0))
         self.dark_overlay.set_alpha(alpha)
+        self.dimmed_background_img = None  # rebuilt on demand at the baked brightness tier
+
+    def new_pipe(self, img, x, y, is_moving):
+        if self.pipe_pool:
+            pipe = self.pipe_pool.pop()
+            pipe.spawn(img, x, y, is_moving)
+            return pipe
+        self.entities_allocated += 1
+        return Pipe(img, x, y, PIPE_WIDTH, PIPE_HEIGHT, is_moving)
+
+    def new_coin(self, x, y):
+        if self.coin_pool:
+            coin = self.coin_pool.pop()
+            coin.spawn(self.coin_img, x, y)
+            return coin
+        self.entities_allocated += 1
+        return Coin(self.coin_img, x, y, COIN_WIDTH, COIN_HEIGHT)
+
+    def clear_entities(self):
+        self.pipe_pool.extend(self.pipes)
+        self.coin_pool.extend(self.coins)
+        self.pipes.clear()
+        self.coins.clear()
 
     def reset(self):
         self.bird.y = self.bird_y
         self.velocity_y = 0
-        self.pipes = []
-        self.coins = []
+        self.clear_entities()
         self.game_over = False
         self.score = 0
-        self.last_pipe_time = pygame.time.get_ticks()
+        self.sim_time = 0
+        self.last_pipe_time = 0
         self.difficulty_level = 0
+        self.ticks = 0
+        self.pairs_spawned = 0
         self.velocity_x = -4
         self.pipe_interval = 1500
         self.music_playing = True
         self.music.play(-1)
+        self.ghost_recorder = GhostRecorder(self.bird.y)
+        for ghost in self.ghosts:
+            ghost.seek(0)
+        if self.flock is not None:
+            self.flock.reset()
+        if self.particles is not None:
+            self.particles.clear()
+        if self.gc_monitor is not None:
+            self.gc_monitor.start_run(self.entities_allocated)
+        self.log_event(RUN_START)
+        if self.rewind is not None:
+            self.rewind.start(self)
 
     def update_background(self):
-        self.bg_x1 -= self.bg_speed
-        self.bg_x2 -= self.bg_speed
-        if self.bg_x1 <= -BOARD_WIDTH:
-            self.bg_x1 = BOARD_WIDTH
-        if self.bg_x2 <= -BOARD_WIDTH:
-            self.bg_x2 = BOARD_WIDTH
+        if self.quality.tier < FLAT_BACKGROUND:
+            self.background.scroll(self.bg_speed)
+
+    def draw_background(self):
+        tier = self.quality.tier
+        if tier < FLAT_BACKGROUND:
+            self.background.draw(self.screen)
+        elif tier < BAKED_BRIGHTNESS or self.brightness >= 1.0:
+            self.screen.blit(self.background_img, (0, 0))
+        else:
+            if self.dimmed_background_img is None:
+                self.dimmed_background_img = self.background_img.copy()
+                self.dimmed_background_img.blit(self.dark_overlay, (0, 0))
+            self.screen.blit(self.dimmed_background_img, (0, 0))
+
+    def draw_overlay(self):
+        if self.brightness < 1.0 and self.quality.tier < BAKED_BRIGHTNESS:
+            self.screen.blit(self.dark_overlay, (0, 0))
 
     def place_pipes(self):
-        opening_space = BOARD_HEIGHT // 4
-        base_pipe_y = random.randint(-PIPE_HEIGHT + 100, -100)
+        if self.course is not None:
+            top_pipe_y, is_moving, coin_y = self.course.pipe_pair(self.pairs_spawned, self.difficulty_level)
+        else:
+            top_pipe_y, is_moving, coin_y = roll_pipe_pair(self.rng, self.difficulty_level)
         pipe_x = BOARD_WIDTH
-        top_pipe_y = base_pipe_y + random.randint(-100, 100)
-        move_pipe = random.random() < self.difficulty_level * 0.1
-        top_pipe = Pipe(self.top_pipe_img, pipe_x, top_pipe_y, PIPE_WIDTH, PIPE_HEIGHT, move_pipe)
-        bottom_pipe = Pipe(self.bottom_pipe_img, pipe_x,
-                           top_pipe_y + PIPE_HEIGHT + opening_space,
-                           PIPE_WIDTH, PIPE_HEIGHT, move_pipe)
-        if random.random() < 0.3 + (self.difficulty_level * 0.05):
-            coin_y = top_pipe_y + PIPE_HEIGHT + random.randint(20, opening_space - COIN_HEIGHT - 20)
-            self.coins.append(Coin(self.coin_img, pipe_x + PIPE_WIDTH, coin_y, COIN_WIDTH, COIN_HEIGHT))
+        top_pipe = self.new_pipe(self.top_pipe_img, pipe_x, top_pipe_y, is_moving)
+        bottom_pipe = self.new_pipe(self.bottom_pipe_img, pipe_x, top_pipe_y + PIPE_HEIGHT + OPENING_SPACE, is_moving)
+        top_pipe.is_top = True
+        top_pipe.pair_index = bottom_pipe.pair_index = self.pairs_spawned
+        self.pairs_spawned += 1
+        if coin_y is not None:
+            self.coins.append(self.new_coin(pipe_x + PIPE_WIDTH, coin_y))
         self.pipes.append(top_pipe)
         self.pipes.append(bottom_pipe)
 
     def jump(self):
         if self.game_over:
             self.reset()
-        self.velocity_y = -12
+        self.velocity_y = JUMP_VELOCITY
+        self.log_event(JUMP)
 
     def update_difficulty(self):
-        thresholds = [0, 5, 10, 20, 30, 40, 50]
-        for i, th in enumerate(thresholds):
-            if self.score >= th:
-                self.difficulty_level = i
-        self.velocity_x = -4 - self.difficulty_level
-        self.pipe_interval = max(600, 1500 - self.difficulty_level * 150)
+        previous_level = self.difficulty_level
+        self.difficulty_level = level_for_score(self.score)
+        if self.difficulty_level != previous_level:
+            self.log_event(DIFFICULTY)
+        self.velocity_x, self.pipe_interval = difficulty_params(self.difficulty_level)
         self.bg_speed = 2 + self.difficulty_level // 2
 
+    def update_effects(self):
+        # Also runs on the game over screen, where the scenery has stopped but the flock and particles go on.
+        velocity_x = 0 if self.game_over else self.velocity_x
+        if self.flock is not None:
+            self.flock.update(self.pipes, velocity_x)
+        if self.particles is not None:
+            self.particles.update(velocity_x)
+
+    @property
+    def effects_live(self):
+        # Effects advance once per frame, so they need the full frame rate to play at their speed.
+        flock_live = self.flock is not None and self.flock.alive_count > 0
+        return flock_live or (self.particles is not None and self.particles.count > 0)
+
     def update(self):
         if self.game_over:
             return
+        self.ticks += 1
         self.update_background()
         self.update_difficulty()
         self.velocity_y += self.gravity
         self.bird.y += self.velocity_y
         self.bird.y = max(0, self.bird.y)
         if self.bird.y + self.bird.height > BOARD_HEIGHT:
-            self.handle_game_over()
-        current_time = pygame.time.get_ticks()
-        if current_time - self.last_pipe_time > self.pipe_interval:
+            self.handle_game_over(CAUSE_GROUND)
+        self.ghost_recorder.record(self.bird.y)
+        for ghost in self.ghosts:
+            ghost.advance()
+        # Pipe spawns run on simulation time so a run replays identically from a snapshot.
+        self.sim_time += FRAME_MS
+        if self.sim_time - self.last_pipe_time > self.pipe_interval:
             self.place_pipes()
-            self.last_pipe_time = current_time
+            self.last_pipe_time = self.sim_time
+        taken_x = None
         for pipe in self.pipes[:]:
             pipe.x += self.velocity_x
             pipe.update()
             if not pipe.passed and self.bird.x > pipe.x + pipe.width:
                 self.score += 0.5
                 pipe.passed = True
-            if self.check_collision(self.bird, pipe):
-                self.handle_game_over()
+                if pipe.is_top:
+                    self.log_event(PIPE_PASS, value=pipe.pair_index)
+            if self.check_mask_collision(self.bird, self.bird_mask, pipe.x, pipe.y,
+                                         self.top_pipe_mask if pipe.is_top else self.bottom_pipe_mask):
+                self.handle_game_over(CAUSE_TOP_PIPE if pipe.is_top else CAUSE_BOTTOM_PIPE, pipe)
             if pipe.x + pipe.width < 0:
                 self.pipes.remove(pipe)
+                self.pipe_pool.append(pipe)
         for coin in self.coins[:]:
             coin.x += self.velocity_x
             coin.rotation = (coin.rotation + coin.rotation_speed) % 360
-            if self.check_collision(self.bird, coin):
+            _, dx, dy, coin_mask = self.coin_frames[coin.rotation]
+            if self.check_mask_collision(self.bird, self.bird_mask, coin.x + dx, coin.y + dy, coin_mask):
                 self.score += 2
+                taken_x = coin.x
                 self.coin_sound.play()
+                self.log_event(COIN)
+                if self.particles is not None:
+                    self.particles.emit(SPARK, 40, coin.x + coin.width / 2, coin.y + coin.height / 2)
                 self.coins.remove(coin)
-            if coin.x + coin.width < 0:
+                self.coin_pool.append(coin)
+            elif coin.x + coin.width < 0:
                 self.coins.remove(coin)
+                self.coin_pool.append(coin)
+        self.update_effects()
+        if self.rewind is not None:
+            self.rewind.record(self, taken_x)
+
+    def rewind_step(self, ticks=2):
+        # One frame of holding the rewind key; False once the buffer has nothing older.
+        state = self.rewind.state_at(max(self.rewind.oldest_tick, self.ticks - ticks))
+        if state is None or state.ticks == self.ticks:
+            return False
+        self.restore(state)
+        return True
+
+    def resume_after_rewind(self):
+        self.rewind.truncate(self.ticks, self)
+        self.ghost_recorder.truncate(self.ticks)
+        if self.particles is not None:
+            self.particles.clear()
+        self.music_playing = True
+        self.music.play(-1)
+        if self.gc_monitor is not None:
+            self.gc_monitor.start_run(self.entities_allocated)
 
-    def handle_game_over(self):
+    def handle_game_over(self, cause=CAUSE_GROUND, pipe=None):
+        if not self.game_over:
+            self.log_event(DEATH, cause, pipe.pair_index if pipe is not None else 0)
+            if self.telemetry is not None:
+                self.telemetry.flush()
+            if self.gc_monitor is not None:
+                self.gc_monitor.end_run(self.entities_allocated)
+            if self.particles is not None:
+                center_x = self.bird.x + self.bird.width / 2
+                center_y = self.bird.y + self.bird.height / 2
+                self.particles.emit(FEATHER, 60, center_x, center_y)
+                self.particles.emit(SPARK, 80, center_x, center_y)
         self.game_over = True
         self.music.stop()
         self.music_playing = False
         self.crash_sound.play()
 
-    def check_collision(self, obj1, obj2):
-        return (obj1.x < obj2.x + obj2.width and
-                obj1.x + obj1.width > obj2.x and
-                obj1.y < obj2.y + obj2.height and
-                obj1.y + obj1.height > obj2.y)
+    def snapshot(self):
+        state = GameState()
+        state.bird_x = self.bird.x
+        state.bird_y = self.bird.y
+        state.velocity_x = self.velocity_x
+        state.velocity_y = self.velocity_y
+        state.score = self.score
+        state.game_over = self.game_over
+        state.difficulty_level = self.difficulty_level
+        state.pipe_interval = self.pipe_interval
+        state.sim_time = self.sim_time
+        state.last_pipe_time = self.last_pipe_time
+        state.ticks = self.ticks
+        state.pairs_spawned = self.pairs_spawned
+        state.rng_state = self.rng.getstate()
+        state.course = self.course
+        for pipe in self.pipes:
+            state.add_pipe(pipe.x, pipe.y, pipe.direction, pipe.passed, pipe.is_moving, pipe.is_top, pipe.pair_index)
+        for coin in self.coins:
+            state.add_coin(coin.x, coin.y, coin.rotation)
+        return state
+
+    def restore(self, state):
+        self.bird.x = state.bird_x
+        self.bird.y = state.bird_y
+        self.velocity_x = state.velocity_x
+        self.velocity_y = state.velocity_y
+        self.score = state.score
+        self.game_over = state.game_over
+        self.difficulty_level = state.difficulty_level
+        self.pipe_interval = state.pipe_interval
+        self.sim_time = state.sim_time
+        self.last_pipe_time = state.last_pipe_time
+        self.ticks = state.ticks
+        self.pairs_spawned = state.pairs_spawned
+        self.rng.setstate(state.rng_state)
+        self.course = state.course
+        for ghost in self.ghosts:
+            ghost.seek(self.ticks)
+        self.clear_entities()
+        for x, y, direction, passed, is_moving, is_top, pair_index in state.iter_pipes():
+            pipe = self.new_pipe(self.top_pipe_img if is_top else self.bottom_pipe_img, x, y, is_moving)
+            pipe.direction = direction
+            pipe.passed = passed
+            pipe.is_top = is_top
+            pipe.pair_index = pair_index
+            self.pipes.append(pipe)
+        for x, y, rotation in state.iter_coins():
+            coin = self.new_coin(x, y)
+            coin.rotation = rotation
+            self.coins.append(coin)
+
+    def set_ghosts(self, ghosts):
+        for ghost in self.ghosts:
+            ghost.close()
+        self.ghosts = ghosts
+
+    def gap_offset(self):
+        for i, pipe in enumerate(self.pipes):
+            if pipe.is_top and pipe.x + pipe.width >= self.bird.x and i + 1 < len(self.pipes):
+                gap_center = (pipe.y + pipe.height + self.pipes[i + 1].y) / 2
+                return self.bird.y + self.bird.height / 2 - gap_center
+        return math.nan
+
+    def log_event(self, kind, cause=CAUSE_NONE, value=0):
+        if self.telemetry is not None:
+            self.telemetry.record(kind, self.ticks, self.difficulty_level, self.bird.y, self.gap_offset(),
+                                  cause, value)
+
+    def check_mask_collision(self, obj, mask, x, y, other_mask):
+        # Bounding boxes first; the masks are only compared for the few frames where the boxes overlap, so
+        # transparent corners of the sprites no longer count as hits. GameState has no sprites and stops at the
+        # boxes, so its simulations can crash where the game does not.
+        width, height = other_mask.get_size()
+        if not (obj.x < x + width and obj.x + obj.width > x and obj.y < y + height and obj.y + obj.height > y):
+            return False
+        return mask.overlap(other_mask, (int(x) - int(obj.x), int(y) - int(obj.y))) is not None
+
+    def draw_preview(self):
+        # The arc a flap right now would fly, from the jump tables: green when it carries the bird through the
+        # next gap, red when it doesn't. Dots are spaced by how far the pipes scroll towards the bird meanwhile.
+        dot = self.preview_dots[0 if can_clear(self.snapshot(), flap=True) else 1]
+        speed = -self.velocity_x
+        center_x = self.bird.x + self.bird.width // 2 - 4
+        center_y = self.bird.y + self.bird.height // 2 - 4
+        blits = []
+        for tick in range(2, min(len(ARC), 48), 2):
+            y = center_y + ARC[tick]
+            if y > BOARD_HEIGHT:
+                break
+            blits.append((dot, (center_x + tick * speed, max(0, y))))
+        self.screen.blits(blits, doreturn=False)
+
+    def draw_coin(self, x, y, rotation):
+        if self.quality.tier >= STILL_COINS:
+            rotation = 0
+        rotated_image, dx, dy, _ = self.coin_frames[rotation]
+        self.screen.blit(rotated_image, (x + dx, y + dy))
+
+    def draw_race(self, race):
+        self.draw_background()
+        if race.world is not None:
+            for pipe in race.world.pipes:
+                self.screen.blit(self.top_pipe_img if pipe.is_top else self.bottom_pipe_img, (pipe.x, pipe.y))
+            for coin in race.world.coins:
+                if coin.pair_index not in race.taken:
+                    self.draw_coin(coin.x, coin.y, coin.rotation)
+        for player_id, state in race.states.items():
+            if player_id != race.player_id and state[4]:
+                self.screen.blit(self.ghost_img, (BIRD_X, state[0]))
+        if race.alive:
+            self.screen.blit(self.bird_img, (BIRD_X, race.y))
+        self.draw_overlay()
+        for i, (name, score, alive) in enumerate(race.standings()):
+            line = f"{i + 1}. {name} - {int(score)}" + ("" if alive else " (out)")
+            self.screen.blit(render_text(SMALL_FONT, line, (255, 255, 255)), (10, 10 + i * 28))
+        info_surface = render_text(SMALL_FONT, "ESC = Leave race", (255, 255, 255))
+        self.screen.blit(info_surface, (BOARD_WIDTH - 220, 10))
 
     def draw(self):
-        self.screen.blit(self.background_img, (self.bg_x1, 0))
-        self.screen.blit(self.background_img, (self.bg_x2, 0))
+        self.draw_background()
         for pipe in self.pipes:
             self.screen.blit(pipe.img, (pipe.x, pipe.y))
         for coin in self.coins:
-            rotated_image = pygame.transform.rotate(coin.img, coin.rotation)
-            rect = rotated_image.get_rect(center=(coin.x + coin.width // 2, coin.y + coin.height // 2))
-            self.screen.blit(rotated_image, rect.topleft)
+            self.draw_coin(coin.x, coin.y, coin.rotation)
+        for ghost in self.ghosts:
+            if ghost.active:
+                self.screen.blit(self.ghost_img, (self.bird.x, ghost.y))
+        if self.flock is not None:
+            self.flock.draw(self.screen, self.bird_img, self.ghost_img)
+        if self.assist and not self.game_over:
+            self.draw_preview()
         self.screen.blit(self.bird.img, (self.bird.x, self.bird.y))
-        if self.brightness < 1.0:
-            self.screen.blit(self.dark_overlay, (0, 0))
+        if self.particles is not None:
+            self.particles.draw(self.screen)
+        self.draw_overlay()
         score_text = f"Score: {int(self.score)}"
-        score_surface = FONT.render(score_text, True, (255, 255, 255))
+        score_surface = render_text(FONT, score_text, (255, 255, 255))
         self.screen.blit(score_surface, (10, 10))
+        if self.course is not None:
+            course_surface = render_text(SMALL_FONT, self.course.name, (255, 255, 255))
+            self.screen.blit(course_surface, (10, 50))
+        if self.flock is not None:
+            flock_surface = render_text(SMALL_FONT, f"Flock: {self.flock.alive_count} / {self.flock.size}",
+                                        (255, 255, 255))
+            self.screen.blit(flock_surface, (10, 80))
         info_text = "ESC = Pause"
-        info_surface = SMALL_FONT.render(info_text, True, (255, 255, 255))
+        info_surface = render_text(SMALL_FONT, info_text, (255, 255, 255))
         self.screen.blit(info_surface, (BOARD_WIDTH - 200, 10))
 
 
 def draw_text_center(screen, text, font, color, y, offset=0):
-    text_surface = font.render(text, True, color)
+    text_surface = render_text(font, text, color)
     rect = text_surface.get_rect(center=(BOARD_WIDTH // 2, y + offset))
     screen.blit(text_surface, rect)
 
@@ -348,39 +681,92 @@ def draw_credits(screen):
     y_pos = BOARD_HEIGHT - 150
     for line in credit_lines:
         if line:
-            text_surface = TINY_FONT.render(line, True, (200, 200, 200))
+            text_surface = render_text(TINY_FONT, line, (200, 200, 200))
             text_rect = text_surface.get_rect(center=(BOARD_WIDTH // 2, y_pos))
             screen.blit(text_surface, text_rect)
         y_pos += 15
 
 
-def button(screen, msg, x, y, w, h, inactive_color, active_color, action=None, game=None):
-    mouse = pygame.mouse.get_pos()
-    click = pygame.mouse.get_pressed()
-    if x + w > mouse[0] > x and y + h > mouse[1] > y:
-        pygame.draw.rect(screen, active_color, (x, y, w, h))
-        if click[0] == 1 and action is not None:
-            if game:
-                game.button_click_sound.play()
-            action()
-    else:
-        pygame.draw.rect(screen, inactive_color, (x, y, w, h))
-    text_surface = SMALL_FONT.render(msg, True, (0, 0, 0))
-    text_rect = text_surface.get_rect(center=(x + w // 2, y + h // 2))
-    screen.blit(text_surface, text_rect)
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Flappy Bird: Dark Continent")
+    parser.add_argument("--precise-timing", action="store_true",
+                        help="busy-wait for exact frame timing while playing (uses more CPU)")
+    parser.add_argument("--autopilot", action="store_true", help="let the lookahead autopilot fly the bird")
+    parser.add_argument("--flock", type=int, default=0, metavar="N",
+                        help="fly N policy-driven birds alongside the player (needs NumPy)")
+    parser.add_argument("--race", nargs="?", const="", metavar="HOST[:PORT]",
+                        help="race other players on a multiplayer server; without an address, host one here")
+    parser.add_argument("--assist", action="store_true",
+                        help="beginner assist: show the arc a flap would fly, green when it clears the next gap")
+    parser.add_argument("--practice", action="store_true",
+                        help="practice runs: hold R after a crash to rewind a few seconds; scores are not saved")
+    parser.add_argument("--gc-safe-points", action="store_true",
+                        help="keep the garbage collector off during runs and collect at game over and in menus")
+    parser.add_argument("--gc-stats", action="store_true", help="print collections and GC pauses after every run")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="profile the session: per-state cProfile stats and a Chrome trace of every frame")
+    parser.add_argument("--soak", type=float, metavar="HOURS",
+                        help="play unattended with the autopilot and report memory growth and frame-time drift")
+    parser.add_argument("--soak-report", default=SOAK_REPORT_FILE)
+    parser.add_argument("--quality", default="auto", choices=["auto", "0", "1", "2", "3"],
+                        help="pin a quality tier (0 = full detail) instead of adapting it to frame time")
+    parser.add_argument("--capture", metavar="DIR", help="record every presented frame as a numbered image sequence")
+    parser.add_argument("--capture-format", default="tga", choices=["png", "jpg", "tga", "bmp"])
+    parser.add_argument("--capture-workers", type=int, default=2)
+    return parser.parse_args(argv)
 
 
-def main():
+def main(argv=None):
+    args = parse_args(argv)
     screen = pygame.display.set_mode((BOARD_WIDTH, BOARD_HEIGHT))
     pygame.display.set_caption("Flappy Bird: Dark Continent")
     clock = pygame.time.Clock()
+    pacer = FramePacer(clock, (PLAYING, RACING, REWINDING), precise=args.precise_timing)
     game = FlappyBirdGame(screen)
+    if args.quality != "auto":
+        game.quality = QualityGovernor(tier=int(args.quality))
+    if args.autopilot:
+        game.autopilot = Autopilot()
+    if args.practice:
+        game.rewind = RewindBuffer()
+    game.assist = args.assist
+    if args.flock > 0:
+        if Flock is None:
+            sys.exit("--flock needs NumPy: pip install numpy")
+        game.flock = Flock(args.flock)
+    player_pilot = game.autopilot
+    attract_pilot = None
+    attract = False
+    last_input_time = pygame.time.get_ticks()
     state = MAIN_MENU
     user_name = ""
     input_text = ""
-    high_scores = load_high_scores()
-    volume_slider = Slider(BOARD_WIDTH // 2 - 100, BOARD_HEIGHT // 3 + 50, 200, 10, 0, 1, game.volume)
-    brightness_slider = Slider(BOARD_WIDTH // 2 - 100, BOARD_HEIGHT // 2 + 50, 200, 10, 0.1, 1, game.brightness)
+    high_score_file = HIGH_SCORE_FILE
+    ghost_dir = GHOST_DIR
+    telemetry_dir = TELEMETRY_DIR
+    scratch_dir = None
+    if args.soak:
+        # Soak runs keep their scores, ghosts and telemetry in a scratch directory and never reach the leaderboard.
+        scratch_dir = tempfile.mkdtemp(prefix="flappy-soak-")
+        high_score_file = os.path.join(scratch_dir, HIGH_SCORE_FILE)
+        ghost_dir = os.path.join(scratch_dir, GHOST_DIR)
+        telemetry_dir = os.path.join(scratch_dir, TELEMETRY_DIR)
+    high_scores = load_high_scores(high_score_file)
+    leaderboard_server, leaderboard = (None, None) if args.soak else start_leaderboard()
+    telemetry = Telemetry(telemetry_dir)
+    # Practice (rewound), soak and autopilot runs would skew the tuning data.
+    player_telemetry = None if args.practice or args.soak or args.autopilot else telemetry
+    game.telemetry = player_telemetry
+    race = None
+    race_server = None
+    race_flap = False
+    gc_monitor = GCMonitor(args.gc_safe_points, args.gc_stats)
+    game.gc_monitor = gc_monitor
+    profiler = SessionProfiler(args.profile) if args.profile else None
+    soak = None
+    capture = None
+    if args.capture:
+        capture = FrameCapture(args.capture, screen, workers=args.capture_workers, image_format=args.capture_format)
     try:
         menu_bg = pygame.image.load("flappybirdmenubg.png").convert()
         menu_bg = pygame.transform.scale(menu_bg, (BOARD_WIDTH, BOARD_HEIGHT))
@@ -394,16 +780,54 @@ def main():
     def start_new_game():
         nonlocal state, user_name, input_text
         input_text = ""
+        game.course = None
         state = GET_USERNAME
 
-    def quit_game():
+    def start_daily_challenge():
+        # Same seeded course for every player today.
+        start_new_game()
+        game.course = daily_course()
+
+    def shutdown():
+        if soak is not None:
+            print(soak.report())
+        if profiler is not None:
+            profiler.close()
+            print(profiler.report())
+        if game.quality.changes:
+            print(game.quality.report())
+        for latency in (input_latency, flap_latency):
+            if latency.samples:
+                print(latency.report())
+        gc_monitor.close()
+        game.background.close()
+        if race is not None:
+            race.close()
+        if race_server is not None:
+            race_server.stop()
+        if leaderboard is not None:
+            leaderboard.close()
+        if leaderboard_server is not None:
+            leaderboard_server.stop()  # after the client, so its last batch is still answered
+        telemetry.close()
+        game.set_ghosts([])
+        if scratch_dir is not None:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+        if capture is not None:
+            capture.close()
+            print(capture.report())
         pygame.quit()
         sys.exit()
 
+    def quit_game():
+        shutdown()
+
     def show_high_scores():
-        nonlocal state
+        nonlocal state, high_scores
         game.button_click_sound.play()
         state = HIGH_SCORES
+        if leaderboard is not None and leaderboard.top is not None:
+            high_scores = leaderboard.top
         game.music.stop()
 
     def show_settings():
@@ -417,6 +841,7 @@ def main():
         game.button_click_sound.play()
         state = MAIN_MENU
         game.music.stop()
+        gc_monitor.safe_point()
 
     def resume_game():
         nonlocal state
@@ -430,6 +855,14 @@ def main():
         schemes = ["space", "mouse", "up_arrow"]
         current_index = schemes.index(game.control_scheme)
         game.control_scheme = schemes[(current_index + 1) % len(schemes)]
+        controls_button.set_label(control_scheme_label())
+
+    def control_scheme_label():
+        return f"Controls: {game.control_scheme.replace('_', ' ').title()}"
+
+    def set_brightness(value):
+        game.brightness = value
+        game.update_brightness()
 
     def show_instructions():
         nonlocal state
@@ -437,12 +870,134 @@ def main():
         state = INSTRUCTIONS
         game.music.stop()
 
+    def menu_button(msg, x, y, inactive_color, active_color, action):
+        return Button(msg, x, y, 300, 50, inactive_color, active_color, action, SMALL_FONT, game.button_click_sound)
+
+    volume_slider = Slider(BOARD_WIDTH // 2 - 100, BOARD_HEIGHT // 3 + 50, 200, 10, 0, 1, game.volume,
+                           game.set_volume)
+    brightness_slider = Slider(BOARD_WIDTH // 2 - 100, BOARD_HEIGHT // 2 + 50, 200, 10, 0.1, 1, game.brightness,
+                               set_brightness)
+    controls_button = menu_button(control_scheme_label(), BOARD_WIDTH // 2 - 150, BOARD_HEIGHT // 2 + 120,
+                                  (200, 200, 200), (150, 150, 150), cycle_control_scheme)
+    input_latency = InputLatency("Menu input")
+    flap_latency = InputLatency("Flap")
+    ui = {
+        MAIN_MENU: WidgetGroup([
+            menu_button("Start New Game", BOARD_WIDTH // 2 - 150, BOARD_HEIGHT // 2 - 80,
+                        (100, 255, 100), (50, 200, 50), start_new_game),
+            menu_button("Daily Challenge", BOARD_WIDTH // 2 - 150, BOARD_HEIGHT // 2 - 10,
+                        (180, 100, 255), (130, 50, 200), start_daily_challenge),
+            menu_button("High Scores", BOARD_WIDTH // 2 - 150, BOARD_HEIGHT // 2 + 60,
+                        (100, 100, 255), (50, 50, 200), show_high_scores),
+            menu_button("Settings", BOARD_WIDTH // 2 - 150, BOARD_HEIGHT // 2 + 130,
+                        (255, 255, 100), (200, 200, 50), show_settings),
+            menu_button("Game Instructions", BOARD_WIDTH // 2 - 150, BOARD_HEIGHT // 2 + 200,
+                        (255, 165, 0), (200, 120, 0), show_instructions),
+            menu_button("Quit", BOARD_WIDTH // 2 - 150, BOARD_HEIGHT // 2 + 270,
+                        (255, 100, 100), (200, 50, 50), quit_game),
+        ], input_latency),
+        INSTRUCTIONS: WidgetGroup([
+            menu_button("Back to Main Menu", BOARD_WIDTH // 2 - 150, BOARD_HEIGHT - 150,
+                        (255, 100, 100), (200, 50, 50), back_to_menu),
+        ], input_latency),
+        PAUSED: WidgetGroup([
+            menu_button("Resume", BOARD_WIDTH // 2 - 150, BOARD_HEIGHT // 2 + 100,
+                        (100, 255, 100), (50, 200, 50), resume_game),
+            menu_button("Return to Main Menu", BOARD_WIDTH // 2 - 150, BOARD_HEIGHT // 2 + 170,
+                        (255, 100, 100), (200, 50, 50), back_to_menu),
+        ], input_latency),
+        HIGH_SCORES: WidgetGroup([
+            menu_button("Back to Menu", BOARD_WIDTH // 2 - 150, BOARD_HEIGHT - 150,
+                        (255, 100, 100), (200, 50, 50), back_to_menu),
+        ], input_latency),
+        SETTINGS: WidgetGroup([
+            volume_slider,
+            brightness_slider,
+            controls_button,
+            menu_button("Back to Menu", BOARD_WIDTH // 2 - 150, BOARD_HEIGHT - 150,
+                        (255, 100, 100), (200, 50, 50), back_to_menu),
+        ], input_latency),
+    }
+    if args.soak:
+        caps = {"high_scores": MAX_ENTRIES, "ghosts": MAX_GHOSTS, "text_cache": TEXT_CACHE_SIZE}
+        if game.particles is not None:
+            caps["particles"] = game.particles.capacity
+        soak = SoakDriver(game, args.soak * 3600, ui, report_file=args.soak_report, caps=caps,
+                          counts=lambda: {"high_scores": len(high_scores), "ghosts": len(game.ghosts),
+                                          "text_cache": len(_text_cache), "quality_tier": game.quality.tier,
+                                          "input_p95": round((input_latency.stats() or {}).get("p95_ms", 0), 3),
+                                          "particles": game.particles.count if game.particles is not None else 0})
+    entered_ui = None
+
+    def active_ui():
+        # Widgets are only driven by events, so sync hover state once when their screen comes up.
+        nonlocal entered_ui
+        screen_ui = ui.get(state)
+        if screen_ui is not entered_ui:
+            entered_ui = screen_ui
+            if screen_ui is not None:
+                screen_ui.enter(pygame.mouse.get_pos())
+        return screen_ui
+
+    def start_attract():
+        nonlocal state, attract, attract_pilot
+        if attract_pilot is None:
+            attract_pilot = load_attract_pilot()
+        attract = True
+        game.autopilot = attract_pilot
+        game.set_ghosts([])
+        game.telemetry = None  # demo runs would skew the tuning data
+        game.reset()
+        state = PLAYING
+
+    def stop_attract():
+        nonlocal state, attract
+        attract = False
+        game.autopilot = player_pilot
+        game.telemetry = player_telemetry
+        game.music.stop()
+        state = MAIN_MENU
+        gc_monitor.safe_point()
+
+    def leave_race():
+        nonlocal state, race, race_server
+        race.close()
+        race = None
+        if race_server is not None:
+            # A race hosted here ends when its host leaves.
+            race_server.stop()
+            race_server = None
+        game.music.stop()
+        state = MAIN_MENU
+
+    def mark(phase):
+        if profiler is not None:
+            profiler.mark(phase)
+
+    def pause_game():
+        nonlocal state
+        state = PAUSED
+        pygame.mixer.pause()
+        game.music_playing = False
+
     running = True
+    frame_time = 0
     while running:
-        screen.fill((0, 0, 0))
+        frame_start = time.perf_counter()
+        if profiler is not None:
+            profiler.begin_frame(state)
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
+            pacer.handle_event(event)
+            if event.type in (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN, pygame.MOUSEMOTION):
+                last_input_time = pygame.time.get_ticks()
+                if attract and event.type != pygame.MOUSEMOTION:
+                    stop_attract()
+                    continue
+            screen_ui = active_ui()
+            if screen_ui is not None:
+                screen_ui.handle_event(event)
             if state == GET_USERNAME:
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_BACKSPACE:
@@ -451,8 +1006,14 @@ def main():
                         if input_text.strip() != "":
                             user_name = input_text.strip()
                             game.user_name = user_name
-                            game.reset()
-                            state = PLAYING
+                            if args.race is not None:
+                                race_server, race = start_race(args.race, user_name)
+                                game.music.play(-1)
+                                state = RACING
+                            else:
+                                game.set_ghosts(load_ghosts(ghost_dir, high_scores, user_name))
+                                game.reset()
+                                state = PLAYING
                     else:
                         if len(input_text) < 15:
                             input_text += event.unicode
@@ -461,12 +1022,26 @@ def main():
                     if (event.key == pygame.K_SPACE and game.control_scheme == "space") or \
                        (event.key == pygame.K_UP and game.control_scheme == "up_arrow"):
                         game.jump()
+                        flap_latency.mark()
                     elif event.key == pygame.K_ESCAPE:
-                        state = PAUSED
-                        pygame.mixer.pause()
-                        game.music_playing = False
+                        pause_game()
                 elif event.type == pygame.MOUSEBUTTONDOWN and game.control_scheme == "mouse":
                     game.jump()
+                    flap_latency.mark()
+                elif event.type in (pygame.WINDOWFOCUSLOST, pygame.WINDOWMINIMIZED):
+                    pause_game()
+            elif state == RACING:
+                # The race keeps going on the server, so there is no pausing.
+                if event.type == pygame.KEYDOWN:
+                    if (event.key == pygame.K_SPACE and game.control_scheme == "space") or \
+                       (event.key == pygame.K_UP and game.control_scheme == "up_arrow"):
+                        race_flap = True
+                        flap_latency.mark()
+                    elif event.key == pygame.K_ESCAPE:
+                        leave_race()
+                elif event.type == pygame.MOUSEBUTTONDOWN and game.control_scheme == "mouse":
+                    race_flap = True
+                    flap_latency.mark()
             elif state == PAUSED:
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
@@ -474,45 +1049,58 @@ def main():
             elif state == GAME_OVER:
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_RETURN:
-                        high_scores = update_high_scores(game.user_name, int(game.score), high_scores)
-                        save_high_scores(high_scores)
+                        if not args.practice:
+                            # The personal best is memory-mapped while it flies, and Windows can't replace a
+                            # mapped file; the ghosts are loaded again when the next game starts.
+                            game.set_ghosts([])
+                            ghost_file = None
+                            try:
+                                ghost_file = save_run(game.ghost_recorder, ghost_dir, game.user_name,
+                                                      int(game.score))
+                            except OSError:
+                                pass  # the score still counts without its ghost
+                            high_scores = update_high_scores(game.user_name, int(game.score), high_scores,
+                                                             ghost_file)
+                            board_scores = []
+                            if leaderboard is not None:
+                                leaderboard.submit(game.user_name, int(game.score), ghost_file)
+                                board_scores = leaderboard.top or []
+                            prune_ghosts(ghost_dir, high_scores, board_scores)
                         state = MAIN_MENU
+                    elif event.key == pygame.K_r and game.rewind is not None:
+                        state = REWINDING
+            elif state == REWINDING:
+                if event.type == pygame.KEYUP and event.key == pygame.K_r:
+                    game.resume_after_rewind()
+                    state = PLAYING
             elif state == SETTINGS:
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
                         back_to_menu()
-                if volume_slider.handle_event(event):
-                    game.set_volume(volume_slider.val)
-                if brightness_slider.handle_event(event):
-                    game.brightness = brightness_slider.val
-                    game.update_brightness()
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    mouse_pos = pygame.mouse.get_pos()
-                    control_button_rect = pygame.Rect(BOARD_WIDTH // 2 - 150, BOARD_HEIGHT // 2 + 120, 300, 50)
-                    if control_button_rect.collidepoint(mouse_pos):
-                        cycle_control_scheme()
             elif state == INSTRUCTIONS:
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
                         back_to_menu()
 
-        title_time += 0.05
+        if not pacer.should_render:
+            mark("wait")
+            frame_time = pacer.tick(state)
+            continue
+
+        mark("draw")
+        screen.fill((0, 0, 0))
+        if game.quality.tier < STILL_COINS:
+            title_time += 0.05 * frame_time / (1000 / 60)
         title_offset = math.sin(title_time) * 5
 
+        if state == MAIN_MENU and pygame.time.get_ticks() - last_input_time > ATTRACT_DELAY:
+            start_attract()
+
         if state == MAIN_MENU:
             screen.blit(menu_bg, (0, 0))
             draw_text_center(screen, "Flappy Bird: Dark Continent", TITLE_FONT, (0, 100, 0), BOARD_HEIGHT // 4,
                              title_offset)
-            button(screen, "Start New Game", BOARD_WIDTH // 2 - 150, BOARD_HEIGHT // 2 - 80, 300, 50,
-                   (100, 255, 100), (50, 200, 50), start_new_game, game)
-            button(screen, "High Scores", BOARD_WIDTH // 2 - 150, BOARD_HEIGHT // 2 - 10, 300, 50,
-                   (100, 100, 255), (50, 50, 200), show_high_scores, game)
-            button(screen, "Settings", BOARD_WIDTH // 2 - 150, BOARD_HEIGHT // 2 + 60, 300, 50,
-                   (255, 255, 100), (200, 200, 50), show_settings, game)
-            button(screen, "Game Instructions", BOARD_WIDTH // 2 - 150, BOARD_HEIGHT // 2 + 130, 300, 50,
-                   (255, 165, 0), (200, 120, 0), show_instructions, game)
-            button(screen, "Quit", BOARD_WIDTH // 2 - 150, BOARD_HEIGHT // 2 + 200, 300, 50,
-                   (255, 100, 100), (200, 50, 50), quit_game, game)
+            ui[MAIN_MENU].draw(screen)
             draw_credits(screen)
 
         elif state == INSTRUCTIONS:
@@ -532,64 +1120,99 @@ def main():
                 draw_text_center(screen, line, FONT if line.startswith("Listen") else SMALL_FONT,
                                  (255, 255, 255), y)
                 y += 40
-            button(screen, "Back to Main Menu", BOARD_WIDTH // 2 - 150, BOARD_HEIGHT - 150, 300, 50,
-                   (255, 100, 100), (200, 50, 50), back_to_menu, game)
+            ui[INSTRUCTIONS].draw(screen)
 
         elif state == GET_USERNAME:
             draw_text_center(screen, "HAHAHA! There is no going back now!", FONT, (56, 0, 0), BOARD_HEIGHT // 3)
             pygame.draw.rect(screen, (255, 255, 255), (BOARD_WIDTH // 2 - 200, BOARD_HEIGHT // 2 - 25, 400, 50), 2)
-            input_surface = FONT.render(input_text, True, (255, 255, 255))
+            input_surface = render_text(FONT, input_text, (255, 255, 255))
             screen.blit(input_surface, (BOARD_WIDTH // 2 - 190, BOARD_HEIGHT // 2 - 20))
             draw_text_center(screen, "Type your name and enter to start", SMALL_FONT, (200, 200, 200), BOARD_HEIGHT // 2 + 50)
         elif state == PLAYING:
+            mark("update")
+            if game.autopilot is not None and game.autopilot.decide(game.snapshot()):
+                game.jump()
             game.update()
+            gc_monitor.frame()
+            mark("draw")
             game.draw()
-            if game.game_over:
+            if attract:
+                draw_text_center(screen, "DEMO - press any key to play", FONT, (255, 255, 255), BOARD_HEIGHT // 6)
+                if game.game_over:
+                    game.reset()
+            elif game.game_over:
                 state = GAME_OVER
+        elif state == RACING:
+            mark("update")
+            race.update(race_flap)
+            race_flap = False
+            game.update_background()
+            mark("draw")
+            game.draw_race(race)
+            if race.closed:
+                draw_text_center(screen, "Disconnected from the race server - ESC to leave", FONT, (255, 0, 0),
+                                 BOARD_HEIGHT // 3)
+            elif race.world is None:
+                draw_text_center(screen, "Waiting for the race to start...", FONT, (255, 255, 255), BOARD_HEIGHT // 3)
+            elif not race.alive:
+                draw_text_center(screen, "Out! The next race starts when everyone has crashed", FONT,
+                                 (255, 0, 0), BOARD_HEIGHT // 3)
         elif state == PAUSED:
             game.draw()
             draw_text_center(screen, "Paused", FONT, (255, 255, 0), BOARD_HEIGHT // 3)
             draw_text_center(screen, f"Your Score: {int(game.score)}", FONT, (255, 255, 255), BOARD_HEIGHT // 3 + 50)
-            button(screen, "Resume", BOARD_WIDTH // 2 - 150, BOARD_HEIGHT // 2 + 100, 300, 50,
-                   (100, 255, 100), (50, 200, 50), resume_game, game)
-            button(screen, "Return to Main Menu", BOARD_WIDTH // 2 - 150, BOARD_HEIGHT // 2 + 170, 300, 50,
-                   (255, 100, 100), (200, 50, 50), back_to_menu, game)
+            ui[PAUSED].draw(screen)
         elif state == GAME_OVER:
+            game.update_effects()
             game.draw()
             draw_text_center(screen, "Game Over!", FONT, (255, 0, 0), BOARD_HEIGHT // 3)
             draw_text_center(screen, f"Your Score: {int(game.score)}", FONT, (255, 255, 255), BOARD_HEIGHT // 3 + 50)
             draw_text_center(screen, "Press Enter to return to menu", SMALL_FONT, (200, 200, 200), BOARD_HEIGHT // 2)
+            if game.rewind is not None:
+                draw_text_center(screen, "Practice run: hold R to rewind", SMALL_FONT, (200, 200, 200),
+                                 BOARD_HEIGHT // 2 + 40)
+        elif state == REWINDING:
+            mark("update")
+            game.rewind_step()
+            mark("draw")
+            game.draw()
+            draw_text_center(screen, "<< Rewinding - release R to fly on", FONT, (255, 255, 255), BOARD_HEIGHT // 3)
         elif state == HIGH_SCORES:
             draw_text_center(screen, "High Scores", FONT, (255, 255, 255), BOARD_HEIGHT // 6)
             for idx, entry in enumerate(high_scores):
                 score_text = f"{idx + 1}. {entry['name']} - {entry['score']}"
-                screen.blit(FONT.render(score_text, True, (255, 255, 255)),
+                screen.blit(render_text(FONT, score_text, (255, 255, 255)),
                             (BOARD_WIDTH // 3, BOARD_HEIGHT // 4 + idx * 40))
-            button(screen, "Back to Menu", BOARD_WIDTH // 2 - 150, BOARD_HEIGHT - 150, 300, 50,
-                   (255, 100, 100), (200, 50, 50), back_to_menu, game)
+            ui[HIGH_SCORES].draw(screen)
         elif state == SETTINGS:
             screen.blit(menu_bg, (0, 0))
             draw_text_center(screen, "Settings", FONT, (255, 255, 255), BOARD_HEIGHT // 6)
             draw_text_center(screen, "Volume", SMALL_FONT, (255, 255, 255), BOARD_HEIGHT // 3 - 20)
-            volume_slider.draw(screen)
             draw_text_center(screen, f"{int(volume_slider.val * 100)}%", SMALL_FONT, (255, 255, 255),
                              BOARD_HEIGHT // 3 + 20)
             draw_text_center(screen, "Brightness", SMALL_FONT, (255, 255, 255), BOARD_HEIGHT // 2 - 20)
-            brightness_slider.draw(screen)
             draw_text_center(screen, f"{int(brightness_slider.val * 100)}%", SMALL_FONT, (255, 255, 255),
                              BOARD_HEIGHT // 2 + 20)
-            button(screen, f"Controls: {game.control_scheme.replace('_', ' ').title()}",
-                   BOARD_WIDTH // 2 - 150, BOARD_HEIGHT // 2 + 120, 300, 50,
-                   (200, 200, 200), (150, 150, 150), cycle_control_scheme, game)
-            button(screen, "Back to Menu", BOARD_WIDTH // 2 - 150, BOARD_HEIGHT - 150, 300, 50,
-                   (255, 100, 100), (200, 50, 50), back_to_menu, game)
+            ui[SETTINGS].draw(screen)
 
+        mark("present")
         pygame.display.flip()
-        clock.tick(60)
+        work_ms = (time.perf_counter() - frame_start) * 1000
+        if game.particles is not None:
+            game.particles.adapt(work_ms)
+        game.quality.frame(work_ms)
+        if soak is not None:
+            soak.frame(state, work_ms)
+            running = running and not soak.finished
+        input_latency.frame_presented()
+        flap_latency.frame_presented()
+        if capture is not None:
+            capture.capture(screen)
+        mark("wait")
+        frame_time = pacer.tick(state, animating=state == GAME_OVER and game.effects_live)
 
-    pygame.quit()
-    sys.exit()
+    shutdown()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,69 @@
+import numpy as np
+
+from constants import BIRD_HEIGHT, BIRD_WIDTH, BOARD_HEIGHT, BOARD_WIDTH, GRAVITY, JUMP_VELOCITY, PIPE_WIDTH
+
+
+class Flock:
+    # Many policy-driven birds flying the game's pipe course. Bird state lives in flat arrays and every rule
+    # (physics, policy, collisions) is applied to the whole flock at once, so cost barely grows with its size.
+    def __init__(self, size, seed=None, spread=400):
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.spread = spread
+        self.reset()
+
+    def reset(self):
+        # Each bird gets its own x, aim point inside the gap and sloppiness, so the flock spreads out.
+        home_x = BOARD_WIDTH // 8
+        self.x = home_x + self.rng.uniform(-self.spread / 2, self.spread / 2, self.size)
+        self.y = BOARD_HEIGHT / 2 + self.rng.uniform(-150, 150, self.size)
+        self.velocity_y = np.zeros(self.size)
+        self.alive = np.ones(self.size, dtype=bool)
+        self.aim = self.rng.uniform(-60, 60, self.size)
+        self.reaction = self.rng.uniform(0.6, 1.0, self.size)
+
+    @property
+    def alive_count(self):
+        return int(np.count_nonzero(self.alive))
+
+    def gap_centers(self, pipes):
+        # Pipes come in spawn order, so the top pipes' right edges are sorted and each bird's next gap is
+        # a binary search away.
+        tops = [(pipe.x, pipe.y + pipe.height, bottom.y) for pipe, bottom in zip(pipes, pipes[1:]) if pipe.is_top]
+        if not tops:
+            return np.full(self.size, BOARD_HEIGHT / 2)
+        tops = np.array(tops, dtype=float)
+        centers = np.append((tops[:, 1] + tops[:, 2]) / 2, BOARD_HEIGHT / 2)
+        return centers[np.searchsorted(tops[:, 0] + PIPE_WIDTH, self.x)]
+
+    def update(self, pipes, velocity_x):
+        alive = self.alive
+        target = self.gap_centers(pipes) + self.aim
+        flap = (alive & (self.y + BIRD_HEIGHT / 2 > target) & (self.velocity_y >= 0)
+                & (self.rng.random(self.size) < self.reaction))
+        self.velocity_y[flap] = JUMP_VELOCITY
+        self.velocity_y += GRAVITY
+        self.y += self.velocity_y
+        np.maximum(self.y, 0, out=self.y)
+        # Dead birds tumble away with the scenery until they leave the screen.
+        self.x[~alive] += velocity_x
+        hit = self.y + BIRD_HEIGHT > BOARD_HEIGHT
+        if pipes:
+            px = np.array([pipe.x for pipe in pipes], dtype=float)
+            py = np.array([pipe.y for pipe in pipes], dtype=float)
+            ph = np.array([pipe.height for pipe in pipes], dtype=float)
+            # One (birds x pipes) bounding-box test; background birds skip the mask check the player gets.
+            overlap = ((self.x[:, None] < px + PIPE_WIDTH) & (self.x[:, None] + BIRD_WIDTH > px)
+                       & (self.y[:, None] < py + ph) & (self.y[:, None] + BIRD_HEIGHT > py))
+            hit |= overlap.any(axis=1)
+        self.alive &= ~hit
+
+    def draw(self, screen, img, dead_img):
+        # Cull birds that are off screen, then collapse birds that landed on the same pixel into one blit.
+        visible = (self.x > -BIRD_WIDTH) & (self.x < BOARD_WIDTH) & (self.y < BOARD_HEIGHT)
+        blits = []
+        for mask, surface in ((visible & ~self.alive, dead_img), (visible & self.alive, img)):
+            packed = np.unique(self.x[mask].astype(np.int64) << 16 | self.y[mask].astype(np.int64))
+            blits.extend((surface, (x, y)) for x, y in zip((packed >> 16).tolist(), (packed & 0xFFFF).tolist()))
+        screen.blits(blits, doreturn=False)
+        return len(blits)
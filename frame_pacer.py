@@ -0,0 +1,61 @@
+import pygame
+
+INPUT_EVENTS = (pygame.KEYDOWN, pygame.KEYUP, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION,
+                pygame.MOUSEWHEEL, pygame.TEXTINPUT)
+HIDDEN_EVENTS = (pygame.WINDOWFOCUSLOST, pygame.WINDOWMINIMIZED, pygame.WINDOWHIDDEN)
+SHOWN_EVENTS = (pygame.WINDOWFOCUSGAINED, pygame.WINDOWRESTORED, pygame.WINDOWSHOWN, pygame.WINDOWEXPOSED)
+
+
+class FramePacer:
+    # Full frame rate while playing, right after input or while an idle screen still animates, a low frame rate
+    # on idle screens, and no rendering at all while the window is unfocused. Idle frames sleep in pygame.event.wait so input wakes them at once.
+    def __init__(self, clock, active_states, fps=60, idle_fps=15, hidden_fps=4, wake_ms=1000, precise=False):
+        self.clock = clock
+        self.active_states = active_states
+        self.fps = fps
+        self.idle_fps = idle_fps
+        self.hidden_fps = hidden_fps
+        self.wake_ms = wake_ms
+        self.precise = precise
+        self.visible = True
+        self.awake_until = 0
+        self.last_frame = pygame.time.get_ticks()
+
+    @property
+    def should_render(self):
+        return self.visible
+
+    def handle_event(self, event):
+        if event.type in INPUT_EVENTS:
+            self.wake()
+        elif event.type in HIDDEN_EVENTS:
+            self.visible = False
+        elif event.type in SHOWN_EVENTS:
+            self.visible = True
+            self.wake()
+
+    def wake(self):
+        self.awake_until = pygame.time.get_ticks() + self.wake_ms
+
+    def wait_for_input(self, timeout):
+        if timeout <= 0:
+            return
+        event = pygame.event.wait(timeout)
+        if event.type != pygame.NOEVENT:
+            # Put it back, in order, for the main loop's pygame.event.get().
+            for queued in [event] + pygame.event.get():
+                pygame.event.post(queued)
+            self.wake()
+
+    def tick(self, state, animating=False):
+        now = pygame.time.get_ticks()
+        if self.visible and (animating or state in self.active_states):
+            dt = self.clock.tick_busy_loop(self.fps) if self.precise else self.clock.tick(self.fps)
+        elif self.visible and now < self.awake_until:
+            dt = self.clock.tick(self.fps)
+        else:
+            fps = self.idle_fps if self.visible else self.hidden_fps
+            self.wait_for_input(int(1000 / fps) - (now - self.last_frame))
+            dt = self.clock.tick()
+        self.last_frame = pygame.time.get_ticks()
+        return dt
@@ -0,0 +1,300 @@
+import random
+from array import array
+
+from course import Segment
+from constants import (BIRD_HEIGHT, BIRD_WIDTH, BOARD_HEIGHT, BOARD_WIDTH, COIN_HEIGHT, COIN_ROTATION_SPEED,
+                       COIN_WIDTH, DIFFICULTY_THRESHOLDS, FRAME_MS, GRAVITY, JUMP_VELOCITY, OPENING_SPACE,
+                       PIPE_HEIGHT, PIPE_MOVEMENT_RANGE, PIPE_SPEED, PIPE_WIDTH)
+
+# Pipe flag bits
+PASSED = 1
+MOVING = 2
+TOP = 4
+
+# Scratch generator for pipe spawns; states only carry the (immutable) getstate() tuple so copies stay cheap.
+_spawn_rng = random.Random()
+
+
+def level_for_score(score):
+    level = 0
+    for i, threshold in enumerate(DIFFICULTY_THRESHOLDS):
+        if score >= threshold:
+            level = i
+    return level
+
+
+def difficulty_params(level):
+    # (velocity_x, pipe_interval) for a difficulty level
+    return -4 - level, max(600, 1500 - level * 150)
+
+
+def roll_pipe_pair(rng, difficulty_level):
+    # Returns (top_pipe_y, is_moving, coin_y or None) for a freshly drawn segment.
+    segment = Segment(rng.randint(-PIPE_HEIGHT + 100, -100), rng.randint(-100, 100), rng.random(), rng.random(),
+                      rng.randint(20, OPENING_SPACE - COIN_HEIGHT - 20))
+    return segment.resolve(difficulty_level)
+
+
+def move_pipe(y, direction, speed=PIPE_SPEED, movement_range=PIPE_MOVEMENT_RANGE):
+    y += direction * speed
+    if abs(y % (2 * movement_range) - movement_range) > movement_range - 1:
+        direction = -direction
+    return y, direction
+
+
+class GameState:
+    # Pure-data copy of the FlappyBirdGame rules state: no surfaces, sounds or screen. Pipes and coins are
+    # stored column-wise in small arrays, so snapshot()/restore() are a handful of slice copies.
+    __slots__ = ("bird_x", "bird_y", "velocity_x", "velocity_y", "score", "game_over", "difficulty_level",
+                 "pipe_interval", "sim_time", "last_pipe_time", "ticks", "pairs_spawned", "rng_state", "course",
+                 "pipe_x", "pipe_y", "pipe_dir", "pipe_flags", "pipe_pair", "coin_x", "coin_y", "coin_rot")
+
+    def __init__(self, seed=None):
+        self.bird_x = BOARD_WIDTH // 8
+        self.bird_y = BOARD_HEIGHT // 2
+        self.velocity_x, self.pipe_interval = difficulty_params(0)
+        self.velocity_y = 0
+        self.score = 0
+        self.game_over = False
+        self.difficulty_level = 0
+        self.sim_time = 0
+        self.last_pipe_time = 0
+        self.ticks = 0
+        self.pairs_spawned = 0
+        self.rng_state = random.Random(seed).getstate()
+        self.course = None
+        self.pipe_x = array("i")
+        self.pipe_y = array("i")
+        self.pipe_dir = array("b")
+        self.pipe_flags = array("B")
+        self.pipe_pair = array("I")
+        self.coin_x = array("i")
+        self.coin_y = array("i")
+        self.coin_rot = array("H")
+
+    def add_pipe(self, x, y, direction, passed, is_moving, is_top, pair_index):
+        self.pipe_x.append(x)
+        self.pipe_y.append(y)
+        self.pipe_dir.append(direction)
+        self.pipe_flags.append(PASSED * passed | MOVING * is_moving | TOP * is_top)
+        self.pipe_pair.append(pair_index)
+
+    def add_coin(self, x, y, rotation):
+        self.coin_x.append(x)
+        self.coin_y.append(y)
+        self.coin_rot.append(rotation)
+
+    def iter_pipes(self):
+        for x, y, direction, flags, pair_index in zip(self.pipe_x, self.pipe_y, self.pipe_dir, self.pipe_flags,
+                                                      self.pipe_pair):
+            yield x, y, direction, bool(flags & PASSED), bool(flags & MOVING), bool(flags & TOP), pair_index
+
+    def iter_coins(self):
+        return zip(self.coin_x, self.coin_y, self.coin_rot)
+
+    def snapshot(self):
+        other = GameState.__new__(GameState)
+        other.restore(self)
+        return other
+
+    def restore(self, other):
+        self.bird_x = other.bird_x
+        self.bird_y = other.bird_y
+        self.velocity_x = other.velocity_x
+        self.velocity_y = other.velocity_y
+        self.score = other.score
+        self.game_over = other.game_over
+        self.difficulty_level = other.difficulty_level
+        self.pipe_interval = other.pipe_interval
+        self.sim_time = other.sim_time
+        self.last_pipe_time = other.last_pipe_time
+        self.ticks = other.ticks
+        self.pairs_spawned = other.pairs_spawned
+        self.rng_state = other.rng_state
+        self.course = other.course
+        self.pipe_x = other.pipe_x[:]
+        self.pipe_y = other.pipe_y[:]
+        self.pipe_dir = other.pipe_dir[:]
+        self.pipe_flags = other.pipe_flags[:]
+        self.pipe_pair = other.pipe_pair[:]
+        self.coin_x = other.coin_x[:]
+        self.coin_y = other.coin_y[:]
+        self.coin_rot = other.coin_rot[:]
+
+    def next_gap(self):
+        # (gap_top, gap_bottom, pipe_x) of the first pipe pair the bird has not cleared yet, or None.
+        pipe_x = self.pipe_x
+        for i in range(0, len(pipe_x) - 1):
+            if self.pipe_flags[i] & TOP and pipe_x[i] + PIPE_WIDTH >= self.bird_x:
+                return self.pipe_y[i] + PIPE_HEIGHT, self.pipe_y[i + 1], pipe_x[i]
+        return None
+
+    def jump(self):
+        self.velocity_y = JUMP_VELOCITY
+
+    def place_pipes(self):
+        if self.course is not None:
+            top_pipe_y, is_moving, coin_y = self.course.pipe_pair(self.pairs_spawned, self.difficulty_level)
+        else:
+            _spawn_rng.setstate(self.rng_state)
+            top_pipe_y, is_moving, coin_y = roll_pipe_pair(_spawn_rng, self.difficulty_level)
+            self.rng_state = _spawn_rng.getstate()
+        self.add_pipe(BOARD_WIDTH, top_pipe_y, 1, False, is_moving, True, self.pairs_spawned)
+        self.add_pipe(BOARD_WIDTH, top_pipe_y + PIPE_HEIGHT + OPENING_SPACE, 1, False, is_moving, False,
+                      self.pairs_spawned)
+        self.pairs_spawned += 1
+        if coin_y is not None:
+            self.add_coin(BOARD_WIDTH + PIPE_WIDTH, coin_y, 0)
+
+    def update(self, collide=True):
+        # Follows FlappyBirdGame.update() tick for tick, minus background scrolling and sound, except that hits
+        # are bounding-box tests where the live game compares sprite masks. So a pipe can end a run here that the
+        # game would let the bird scrape past, and a coin can count here that the game would miss; the autopilot
+        # and the jump tables err on the careful side for pipes. With collide off the bird flies through the
+        # ground, pipes and coins, for replaying a recorded run (rewind does, so it never disagrees with the game).
+        if self.game_over:
+            return
+        self.ticks += 1
+        self.difficulty_level = level_for_score(self.score)
+        self.velocity_x, self.pipe_interval = difficulty_params(self.difficulty_level)
+        self.velocity_y += GRAVITY
+        bird_y = max(0, self.bird_y + self.velocity_y)
+        self.bird_y = bird_y
+        if collide and bird_y + BIRD_HEIGHT > BOARD_HEIGHT:
+            self.game_over = True
+        self.sim_time += FRAME_MS
+        if self.sim_time - self.last_pipe_time > self.pipe_interval:
+            self.place_pipes()
+            self.last_pipe_time = self.sim_time
+        bird_x = self.bird_x
+        velocity_x = self.velocity_x
+        pipe_x = self.pipe_x
+        pipe_y = self.pipe_y
+        pipe_flags = self.pipe_flags
+        i = 0
+        while i < len(pipe_x):
+            x = pipe_x[i] + velocity_x
+            pipe_x[i] = x
+            flags = pipe_flags[i]
+            if flags & MOVING:
+                pipe_y[i], self.pipe_dir[i] = move_pipe(pipe_y[i], self.pipe_dir[i])
+            if not flags & PASSED and bird_x > x + PIPE_WIDTH:
+                self.score += 0.5
+                pipe_flags[i] = flags | PASSED
+            y = pipe_y[i]
+            if (collide and bird_x < x + PIPE_WIDTH and bird_x + BIRD_WIDTH > x and
+                    bird_y < y + PIPE_HEIGHT and bird_y + BIRD_HEIGHT > y):
+                self.game_over = True
+            if x + PIPE_WIDTH < 0:
+                del pipe_x[i], pipe_y[i], self.pipe_dir[i], pipe_flags[i], self.pipe_pair[i]
+                continue
+            i += 1
+        coin_x = self.coin_x
+        coin_y = self.coin_y
+        i = 0
+        while i < len(coin_x):
+            x = coin_x[i] + velocity_x
+            coin_x[i] = x
+            self.coin_rot[i] = (self.coin_rot[i] + COIN_ROTATION_SPEED) % 360
+            y = coin_y[i]
+            collected = (collide and bird_x < x + COIN_WIDTH and bird_x + BIRD_WIDTH > x and
+                         bird_y < y + COIN_HEIGHT and bird_y + BIRD_HEIGHT > y)
+            if collected:
+                self.score += 2
+            if collected or x + COIN_WIDTH < 0:
+                del coin_x[i], coin_y[i], self.coin_rot[i]
+                continue
+            i += 1
+
+    def step(self, flap=False):
+        if flap:
+            self.jump()
+        self.update()
+
+    def advance(self, ticks, flap=False):
+        # Same result as the first tick of step(flap) followed by ticks - 1 calls to update(), but stretches
+        # where nothing happens are moved in one go. Each stretch ends at the first tick with an event: a
+        # collision found by sweeping the bird's path against every pipe and coin, a pipe passed, a pipe spawn
+        # or the bird touching the top or the ground. That tick runs through update() so its rules match exactly.
+        # Returns the number of ticks run, fewer than asked for if the bird crashed.
+        if flap:
+            self.jump()
+        done = 0
+        while done < ticks and not self.game_over:
+            event_tick = self.ticks_to_event(ticks - done)
+            if event_tick > 1:
+                self.drift(event_tick - 1)
+            self.update()
+            done += event_tick
+        return done
+
+    def ticks_to_event(self, limit):
+        # 1-based tick, at most limit, of the next event; every tick before it is guaranteed to be uneventful.
+        velocity_x, pipe_interval = difficulty_params(level_for_score(self.score))
+        speed = -velocity_x
+        path = []
+        y = self.bird_y
+        velocity_y = self.velocity_y
+        sim_time = self.sim_time
+        event_tick = limit
+        for tick in range(1, limit + 1):
+            velocity_y += GRAVITY
+            y += velocity_y
+            sim_time += FRAME_MS
+            path.append(y)
+            if y < 0 or y + BIRD_HEIGHT > BOARD_HEIGHT or sim_time - self.last_pipe_time > pipe_interval:
+                event_tick = tick
+                break
+        bird_x = self.bird_x
+        for x, y, direction, flags in zip(self.pipe_x, self.pipe_y, self.pipe_dir, self.pipe_flags):
+            if not flags & PASSED:
+                event_tick = min(event_tick, max(1, (x + PIPE_WIDTH - bird_x) // speed + 1))
+            # Ticks during which the pipe overlaps the bird's column; only those need the vertical test.
+            first = max(1, (x - bird_x - BIRD_WIDTH) // speed + 1)
+            last = min(event_tick, -((bird_x - x - PIPE_WIDTH) // speed) - 1)
+            if first > last:
+                continue
+            if flags & MOVING:
+                for _ in range(first - 1):
+                    y, direction = move_pipe(y, direction)
+            for tick in range(first, last + 1):
+                if flags & MOVING:
+                    y, direction = move_pipe(y, direction)
+                if path[tick - 1] < y + PIPE_HEIGHT and path[tick - 1] + BIRD_HEIGHT > y:
+                    event_tick = tick
+                    break
+        for x, y in zip(self.coin_x, self.coin_y):
+            first = max(1, (x - bird_x - BIRD_WIDTH) // speed + 1)
+            last = min(event_tick, -((bird_x - x - COIN_WIDTH) // speed) - 1)
+            for tick in range(first, last + 1):
+                if path[tick - 1] < y + COIN_HEIGHT and path[tick - 1] + BIRD_HEIGHT > y:
+                    event_tick = tick
+                    break
+        return event_tick
+
+    def drift(self, ticks):
+        # Moves everything ticks ticks ahead; only valid when ticks_to_event() said nothing happens on the way.
+        self.ticks += ticks
+        self.difficulty_level = level_for_score(self.score)
+        self.velocity_x, self.pipe_interval = difficulty_params(self.difficulty_level)
+        for _ in range(ticks):
+            self.velocity_y += GRAVITY
+            self.bird_y += self.velocity_y
+            self.sim_time += FRAME_MS
+        dx = self.velocity_x * ticks
+        pipe_x = self.pipe_x
+        for i in range(len(pipe_x)):
+            pipe_x[i] += dx
+            if self.pipe_flags[i] & MOVING:
+                y, direction = self.pipe_y[i], self.pipe_dir[i]
+                for _ in range(ticks):
+                    y, direction = move_pipe(y, direction)
+                self.pipe_y[i], self.pipe_dir[i] = y, direction
+        while pipe_x and pipe_x[0] + PIPE_WIDTH < 0:
+            del pipe_x[0], self.pipe_y[0], self.pipe_dir[0], self.pipe_flags[0], self.pipe_pair[0]
+        coin_x = self.coin_x
+        for i in range(len(coin_x)):
+            coin_x[i] += dx
+            self.coin_rot[i] = (self.coin_rot[i] + COIN_ROTATION_SPEED * ticks) % 360
+        while coin_x and coin_x[0] + COIN_WIDTH < 0:
+            del coin_x[0], self.coin_y[0], self.coin_rot[0]
@@ -0,0 +1,74 @@
+import gc
+import sys
+import time
+
+
+class GCMonitor:
+    # Times every collection through gc.callbacks and keeps per-run counts. With safe_points on, the collector
+    # is switched off while a run is in progress and everything alive at the start of the run is frozen, so
+    # collections only happen at game over and menu transitions.
+    def __init__(self, safe_points=False, verbose=False, max_pending=50000):
+        self.safe_points = safe_points
+        self.verbose = verbose
+        self.last_report = None
+        self.max_pending = max_pending  # young objects allowed to pile up before an emergency collection
+        self.in_run = False
+        self.started = None
+        self.reset_stats()
+        gc.callbacks.append(self.on_gc)
+
+    def reset_stats(self):
+        self.collections = [0, 0, 0]
+        self.pause_total = 0.0
+        self.pause_max = 0.0
+        self.blocks_at_start = sys.getallocatedblocks()
+        self.entities_at_start = 0
+
+    def on_gc(self, phase, info):
+        if phase == "start":
+            self.started = time.perf_counter()
+        elif self.started is not None:
+            pause = time.perf_counter() - self.started
+            self.started = None
+            if self.in_run:
+                self.collections[info["generation"]] += 1
+                self.pause_total += pause
+                self.pause_max = max(self.pause_max, pause)
+
+    def start_run(self, entities_allocated=0):
+        if self.safe_points:
+            gc.unfreeze()
+            gc.collect()
+            gc.freeze()
+            gc.disable()
+        self.reset_stats()
+        self.entities_at_start = entities_allocated
+        self.in_run = True
+
+    def frame(self):
+        if self.safe_points and self.in_run and gc.get_count()[0] > self.max_pending:
+            gc.collect(0)
+
+    def safe_point(self):
+        self.in_run = False
+        if self.safe_points:
+            gc.unfreeze()
+            gc.enable()
+            gc.collect()
+
+    def end_run(self, entities_allocated=0):
+        self.last_report = self.report(entities_allocated)
+        if self.verbose:
+            print(self.last_report)
+        self.safe_point()
+
+    def report(self, entities_allocated=0):
+        return (f"GC: {sum(self.collections)} collections during the run (gen0/1/2 {self.collections[0]}/"
+                f"{self.collections[1]}/{self.collections[2]}), {self.pause_total * 1000:.2f} ms total, "
+                f"{self.pause_max * 1000:.2f} ms worst; {entities_allocated - self.entities_at_start} entities "
+                f"allocated, {sys.getallocatedblocks() - self.blocks_at_start:+d} memory blocks")
+
+    def close(self):
+        if self.on_gc in gc.callbacks:
+            gc.callbacks.remove(self.on_gc)
+        self.safe_point()
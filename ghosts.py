@@ -0,0 +1,163 @@
+import mmap
+import os
+import re
+import struct
+import time
+from array import array
+
+GHOST_DIR = "ghosts"
+FILE_MAGIC = b"FBG1"
+HEADER = struct.Struct("<4sIIi")  # magic, ticks, keyframe interval, score
+KEYFRAME_INTERVAL = 256
+MAX_GHOSTS = 10
+
+
+class GhostRecorder:
+    # Bird y per tick as int16 deltas, plus an absolute keyframe every KEYFRAME_INTERVAL ticks for seeking.
+    def __init__(self, y):
+        self.last_y = int(y)
+        self.keyframes = array("i", [self.last_y])
+        self.deltas = array("h", [0])
+
+    def record(self, y):
+        y = int(y)
+        if len(self.deltas) % KEYFRAME_INTERVAL == 0:
+            self.keyframes.append(y)
+        self.deltas.append(max(-32768, min(32767, y - self.last_y)))
+        self.last_y = y
+
+    def truncate(self, ticks):
+        # Drop everything after the given tick, e.g. after rewinding the run.
+        del self.deltas[ticks + 1:]
+        del self.keyframes[ticks // KEYFRAME_INTERVAL + 1:]
+        self.last_y = self.keyframes[-1] + sum(self.deltas[(len(self.keyframes) - 1) * KEYFRAME_INTERVAL + 1:])
+
+    def save(self, path, score):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(FILE_MAGIC, len(self.deltas), KEYFRAME_INTERVAL, int(score)))
+            self.keyframes.tofile(f)
+            self.deltas.tofile(f)
+        os.replace(tmp_path, path)
+
+
+class Ghost:
+    # Replays a recorded trajectory straight out of a memory-mapped file. Advancing reads one delta, so only
+    # the pages around the current tick are ever touched.
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        try:
+            # A file cut short or padded would make the casts fail or read past the recording, so check its size.
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            if len(self.map) < HEADER.size:
+                raise ValueError(f"{path}: truncated ghost file")
+            magic, self.length, self.interval, self.score = HEADER.unpack_from(self.map)
+            if magic != FILE_MAGIC:
+                raise ValueError(f"{path}: not a ghost file")
+            if self.length < 1 or self.interval < 1:
+                raise ValueError(f"{path}: empty ghost file")
+            keyframe_count = (self.length - 1) // self.interval + 1
+            keyframe_start = HEADER.size
+            delta_start = keyframe_start + 4 * keyframe_count
+            if len(self.map) != delta_start + 2 * self.length:
+                raise ValueError(f"{path}: ghost file is {len(self.map)} bytes, its header says "
+                                 f"{delta_start + 2 * self.length}")
+            view = memoryview(self.map)
+            self.keyframes = view[keyframe_start:delta_start].cast("i")
+            self.deltas = view[delta_start:].cast("h")
+            self.seek(0)
+        except (OSError, ValueError):
+            # mmap refuses empty files with a ValueError too.
+            self.close()
+            raise
+
+    @property
+    def active(self):
+        return self.tick < self.length
+
+    def seek(self, tick):
+        self.tick = tick
+        if tick >= self.length:
+            return
+        start = tick // self.interval * self.interval
+        y = self.keyframes[tick // self.interval]
+        for t in range(start + 1, tick + 1):
+            y += self.deltas[t]
+        self.y = y
+
+    def advance(self):
+        self.tick += 1
+        if self.tick < self.length:
+            self.y += self.deltas[self.tick]
+
+    def close(self):
+        # Also called from a failed __init__, so only what was opened is there to close.
+        if hasattr(self, "keyframes"):
+            self.keyframes.release()
+        if hasattr(self, "deltas"):
+            self.deltas.release()
+        if hasattr(self, "map"):
+            self.map.close()
+        self.file.close()
+
+
+def best_ghost_path(directory, name):
+    return os.path.join(directory, "best-" + re.sub(r"[^A-Za-z0-9_-]", "_", name) + ".ghost")
+
+
+def read_score(path):
+    try:
+        with open(path, "rb") as f:
+            magic, _, _, score = HEADER.unpack(f.read(HEADER.size))
+        return score if magic == FILE_MAGIC else None
+    except (OSError, struct.error):
+        return None
+
+
+def save_run(recorder, directory, name, score):
+    # Saves the run for the high score table and replaces the player's personal best if it beats it.
+    # Returns the run's file name, which high score entries refer to.
+    os.makedirs(directory, exist_ok=True)
+    file_name = f"run-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{int(score)}.ghost"
+    recorder.save(os.path.join(directory, file_name), score)
+    best_path = best_ghost_path(directory, name)
+    best_score = read_score(best_path)
+    if best_score is None or score > best_score:
+        recorder.save(best_path, score)
+    return file_name
+
+
+def load_ghosts(directory, high_scores, name):
+    paths = []
+    best_path = best_ghost_path(directory, name)
+    if name and os.path.exists(best_path):
+        paths.append(best_path)
+    for entry in high_scores:
+        ghost_file = entry.get("ghost")
+        if ghost_file:
+            path = os.path.join(directory, os.path.basename(ghost_file))
+            if os.path.exists(path) and path not in paths:
+                paths.append(path)
+    ghosts = []
+    for path in paths[:MAX_GHOSTS]:
+        try:
+            ghosts.append(Ghost(path))
+        except (OSError, ValueError):
+            pass
+    return ghosts
+
+
+def prune_ghosts(directory, *score_lists):
+    # Run files are only kept while a high score entry still refers to them.
+    keep = {os.path.basename(entry["ghost"]) for scores in score_lists for entry in scores if entry.get("ghost")}
+    try:
+        file_names = os.listdir(directory)
+    except OSError:
+        return
+    for file_name in file_names:
+        if file_name.startswith("run-") and file_name.endswith(".ghost") and file_name not in keep:
+            try:
+                os.remove(os.path.join(directory, file_name))
+            except OSError:
+                pass
@@ -0,0 +1,172 @@
+from constants import (BIRD_HEIGHT, BIRD_WIDTH, BOARD_HEIGHT, GRAVITY, JUMP_VELOCITY, OPENING_SPACE, PIPE_HEIGHT,
+                       PIPE_MOVEMENT_RANGE, PIPE_SPEED, PIPE_WIDTH)
+from game_state import MOVING, TOP, difficulty_params, level_for_score
+
+MAX_TABLES = 64
+
+
+def build_arc():
+    # ARC[k] is the bird's y offset k ticks after a jump, until it has fallen further than the board is tall.
+    # ARC_VELOCITY[k] is its velocity at that point. Both ignore the ceiling, which stops the bird at y = 0.
+    arc = [0]
+    velocities = [JUMP_VELOCITY]
+    while arc[-1] < BOARD_HEIGHT:
+        velocities.append(velocities[-1] + GRAVITY)
+        arc.append(arc[-1] + velocities[-1])
+    return tuple(arc), tuple(velocities)
+
+
+ARC, ARC_VELOCITY = build_arc()
+APEX = ARC.index(min(ARC))
+
+
+class ClearanceTable:
+    # For a gap of the given height that the bird spends passage_ticks ticks inside, windows(rel_top) are the
+    # ranges of arc phases (ticks since the jump when the bird enters the pipe column) that keep the whole bird
+    # inside the gap, where rel_top is the gap's top edge relative to the bird's height at the jump. Over the
+    # phases that see the bird still rising, the ones that include the apex and the ones that see it falling,
+    # the arc's extent inside the column changes monotonically, so each of the three gives one range.
+    def __init__(self, passage_ticks, opening=OPENING_SPACE):
+        self.passage_ticks = passage_ticks
+        self.opening = opening
+        phases = len(ARC) - passage_ticks
+        # Highest and lowest point of the bird while inside the column, per entry phase.
+        low = [min(ARC[a:a + passage_ticks]) for a in range(phases)]
+        high = [max(ARC[a:a + passage_ticks]) + BIRD_HEIGHT for a in range(phases)]
+        apex = [a for a in range(phases) if low[a] == ARC[APEX]]
+        regions = (range(0, apex[0]), range(apex[0], apex[-1] + 1), range(apex[-1] + 1, phases))
+        # Valid gap tops for phase a run from high[a] - opening to low[a]; invert that into per-gap-top ranges.
+        self.min_top = min(high) - opening
+        size = max(low) - self.min_top + 1
+        self.first = [[-1] * size for _ in regions]
+        self.last = [[-1] * size for _ in regions]
+        for region, phase_range in enumerate(regions):
+            first = self.first[region]
+            last = self.last[region]
+            for a in phase_range:
+                for i in range(high[a] - opening - self.min_top, low[a] - self.min_top + 1):
+                    if first[i] < 0:
+                        first[i] = a
+                    last[i] = a
+
+    def windows(self, rel_top):
+        i = int(rel_top) - self.min_top
+        if i < 0 or i >= len(self.first[0]):
+            return ()
+        windows = []
+        for first, last in zip(self.first, self.last):
+            if first[i] < 0:
+                continue
+            if windows and windows[-1][1] + 1 >= first[i]:
+                windows[-1] = (windows[-1][0], last[i])
+            else:
+                windows.append((first[i], last[i]))
+        return windows
+
+    def clears(self, rel_top, phase):
+        return any(first <= phase <= last for first, last in self.windows(rel_top))
+
+
+_tables = {}
+
+
+def clearance_table(passage_ticks, opening=OPENING_SPACE):
+    table = _tables.get((passage_ticks, opening))
+    if table is None:
+        if len(_tables) >= MAX_TABLES:
+            _tables.clear()  # moving gaps ask for many openings; the common ones are rebuilt in a few ms
+        table = _tables[passage_ticks, opening] = ClearanceTable(passage_ticks, opening)
+    return table
+
+
+def passage(pipe_x, bird_x, velocity_x):
+    # (first, last) tick from now during which the bird overlaps the pipe column, the same test GameState uses.
+    speed = -velocity_x
+    first = max(1, (pipe_x - bird_x - BIRD_WIDTH) // speed + 1)
+    last = -((bird_x - pipe_x - PIPE_WIDTH) // speed) - 1
+    return first, last
+
+
+def phase_of(velocity_y):
+    # Where on a jump arc a bird moving at velocity_y is, or None if it is rising faster than a jump.
+    phase = (velocity_y - JUMP_VELOCITY) // GRAVITY
+    return phase if 0 <= phase < len(ARC) else None
+
+
+def next_gap_check(state, flap):
+    # Shared by can_clear() and jump_windows(): the next gap as (rel_top, phase, first, last, table), with rel_top
+    # measured from the height of the (possibly virtual) jump that the bird's current flight belongs to.
+    pipe_x = state.pipe_x
+    for i in range(len(pipe_x) - 1):
+        if state.pipe_flags[i] & TOP and pipe_x[i] + PIPE_WIDTH >= state.bird_x:
+            velocity_x = difficulty_params(level_for_score(state.score))[0]
+            first, last = passage(pipe_x[i], state.bird_x, velocity_x)
+            if last < 1:
+                continue
+            first_inside = max(first, 1)
+            gap_top = state.pipe_y[i] + PIPE_HEIGHT
+            opening = state.pipe_y[i + 1] - gap_top
+            if state.pipe_flags[i] & MOVING:
+                # The gap keeps moving until the bird is through; check against the part of it that is always open.
+                drift = min(last * PIPE_SPEED, 2 * PIPE_MOVEMENT_RANGE)
+                gap_top += drift
+                opening -= 2 * drift
+            if flap:
+                phase, jump_y = 0, state.bird_y
+            else:
+                phase = phase_of(state.velocity_y)
+                if phase is None:
+                    return None
+                jump_y = state.bird_y - ARC[phase]
+            return gap_top - jump_y, phase, first_inside, last, clearance_table(last - first_inside + 1, opening)
+    return None
+
+
+def can_clear(state, flap=False):
+    # O(1): does the bird get through the next gap on a single arc, jumping now (flap) or just coasting?
+    check = next_gap_check(state, flap)
+    if check is None:
+        return False
+    rel_top, phase, first, _, table = check
+    return table.clears(rel_top, phase + first)
+
+
+def jump_windows(state):
+    # Ranges (earliest, latest) of k, earliest range first, such that coasting k ticks and then flapping carries
+    # the bird through the next gap on that one arc; k = 0 is a flap right now. Empty if no such k exists.
+    # For each k the bird's height at the flap comes from coasting forward, one addition per tick, and the arc
+    # from there is looked up in the clearance table. The ceiling is accounted for: it clamps the bird at y = 0,
+    # which lowers everything after the apex by as much as the arc overshot it. Exact for fixed pipes, unless a
+    # coin taken inside the column raises the difficulty level and with it the scroll speed.
+    check = next_gap_check(state, True)
+    if check is None:
+        return []
+    rel_top, _, first, last, table = check
+    gap_top = rel_top + state.bird_y
+    gap_bottom = gap_top + table.opening
+    y = state.bird_y
+    velocity_y = state.velocity_y
+    windows = []
+    for k in range(last):
+        if k:
+            # Coast tick k; from the entry tick on it has to stay inside the gap.
+            velocity_y += GRAVITY
+            y = max(0, y + velocity_y)
+            if y + BIRD_HEIGHT > BOARD_HEIGHT or (k >= first and not gap_top <= y <= gap_bottom - BIRD_HEIGHT):
+                break
+        if k < first:
+            entry = first - k
+            overshoot = max(0, -(y + ARC[APEX])) if entry > APEX else 0
+            clears = table.clears(gap_top - y - overshoot, entry)
+        else:
+            # Flapping inside the column: ticks k + 1 to last are arc phases 1 to last - k. The arc falls to its
+            # apex and rises after, so its extent over those phases is known without scanning them.
+            phases = last - k
+            clears = (y + ARC[min(phases, APEX)] >= gap_top and
+                      y + max(ARC[1], ARC[phases]) + BIRD_HEIGHT <= gap_bottom)
+        if clears:
+            if windows and windows[-1][1] == k - 1:
+                windows[-1] = (windows[-1][0], k)
+            else:
+                windows.append((k, k))
+    return windows
@@ -0,0 +1,337 @@
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import os
+import threading
+import uuid
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+QUEUE_FILE = "leaderboard_queue.jsonl"
+MAX_ENTRIES = 10
+
+
+def merge_scores(high_scores, entries):
+    # submit() gives every entry an id, so a batch sent again after its reply was lost is only counted once.
+    seen = {entry["id"] for entry in high_scores if "id" in entry}
+    merged = list(high_scores)
+    for entry in entries:
+        if "id" in entry:
+            if entry["id"] in seen:
+                continue
+            seen.add(entry["id"])
+        merged.append(entry)
+    merged.sort(key=lambda x: x["score"], reverse=True)
+    return merged[:MAX_ENTRIES]
+
+
+def clean_entry(entry):
+    cleaned = {"name": str(entry["name"])[:15], "score": int(entry["score"])}
+    if isinstance(entry.get("ghost"), str):
+        cleaned["ghost"] = os.path.basename(entry["ghost"])
+    if isinstance(entry.get("id"), str):
+        cleaned["id"] = entry["id"][:32]
+    return cleaned
+
+
+class LeaderboardServer:
+    # Newline-delimited JSON over TCP. Every request gets the current top list back:
+    #   {"op": "submit", "entries": [{"name": ..., "score": ...}, ...]}
+    #   {"op": "top"}
+    def __init__(self, path, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.path = path
+        self.host = host
+        self.port = port
+        self.high_scores = self.load()
+        self.server = None
+        self.loop = None
+        self.thread = None
+        self.clients = {}
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                return [clean_entry(entry) for entry in json.load(f)]
+        except (OSError, ValueError, KeyError, TypeError):
+            return []
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.high_scores, f)
+        os.replace(tmp_path, self.path)
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def handle_client(self, reader, writer):
+        self.clients[asyncio.current_task()] = writer
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if request.get("op") == "submit":
+                        entries = [clean_entry(entry) for entry in request["entries"]]
+                        if entries:
+                            self.high_scores = merge_scores(self.high_scores, entries)
+                            self.save()
+                    reply = {"ok": True, "top": self.high_scores}
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    reply = {"ok": False, "error": "bad request"}
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.clients.pop(asyncio.current_task(), None)
+            writer.close()
+
+    async def shutdown(self):
+        # Closing a connection ends its handler at the next read, so none is left pending when the loop stops.
+        self.server.close()
+        for writer in list(self.clients.values()):
+            writer.close()
+        if self.clients:
+            await asyncio.wait(list(self.clients), timeout=1)
+        await self.server.wait_closed()
+
+    def run_in_thread(self):
+        # Binds before returning so the caller knows whether the port was free.
+        started = threading.Event()
+        errors = []
+
+        def run():
+            self.loop = asyncio.new_event_loop()
+            try:
+                self.loop.run_until_complete(self.start())
+            except OSError as e:
+                errors.append(e)
+                started.set()
+                self.loop.close()
+                return
+            started.set()
+            self.loop.run_forever()
+            self.loop.close()
+
+        self.thread = threading.Thread(target=run, name="leaderboard-server", daemon=True)
+        self.thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+
+    def stop(self):
+        if self.loop is not None and self.thread is not None and self.thread.is_alive():
+            try:
+                asyncio.run_coroutine_threadsafe(self.shutdown(), self.loop).result(timeout=2)
+            except (concurrent.futures.TimeoutError, RuntimeError):
+                pass
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=2)
+
+
+class LeaderboardClient:
+    # All network and spool I/O happens on a background event loop; submit() only enqueues.
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, queue_file=QUEUE_FILE,
+                 batch_size=20, batch_delay=0.5, retry_delay=5.0, timeout=2.0):
+        self.host = host
+        self.port = port
+        self.queue_file = queue_file
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        self.top = None
+        self.sent = 0
+        self.spooled = 0
+        self.rejected = 0
+        self.loop = None
+        self.thread = None
+        self.pending = None
+        self.reader = None
+        self.writer = None
+        self.has_spool = os.path.exists(queue_file)
+
+    def start(self):
+        ready = threading.Event()
+
+        def run():
+            self.loop = asyncio.new_event_loop()
+            self.pending = asyncio.Queue()
+            ready.set()
+            self.loop.run_until_complete(self.run())
+            self.loop.close()
+
+        self.thread = threading.Thread(target=run, name="leaderboard-client", daemon=True)
+        self.thread.start()
+        ready.wait()
+        return self
+
+    def submit(self, name, score, ghost=None):
+        entry = {"name": name, "score": int(score), "id": uuid.uuid4().hex}
+        if ghost is not None:
+            entry["ghost"] = ghost
+        self.loop.call_soon_threadsafe(self.pending.put_nowait, entry)
+
+    def close(self, timeout=3.0):
+        if self.thread is None or not self.thread.is_alive():
+            return
+        self.loop.call_soon_threadsafe(self.pending.put_nowait, None)
+        self.thread.join(timeout=timeout)
+
+    async def run(self):
+        closing = False
+        while not closing:
+            batch, closing = await self.next_batch()
+            spool = self.read_spool()
+            if not batch and not spool:
+                continue
+            entries = spool + batch
+            reply = await self.send(entries)
+            if reply is None:
+                self.append_spool(batch)
+            elif reply.get("ok"):
+                if spool:
+                    self.clear_spool()
+            elif len(entries) == 1:
+                self.rejected += 1
+                self.clear_spool()
+            else:
+                # The server turns down a whole request over one bad entry; resend them singly so only the
+                # entries it rejects on their own are dropped and the rest are delivered or stay spooled.
+                undelivered = []
+                for entry in entries:
+                    reply = await self.send([entry])
+                    if reply is None:
+                        undelivered.append(entry)
+                    elif not reply.get("ok"):
+                        self.rejected += 1
+                self.rewrite_spool(undelivered)
+        await self.disconnect()
+
+    async def next_batch(self):
+        # Waits for the first entry, then keeps collecting for batch_delay so bursts share one round trip.
+        # While entries are spooled, wake up every retry_delay to try the server again.
+        batch = []
+        try:
+            first = await asyncio.wait_for(self.pending.get(), self.retry_delay if self.has_spool else None)
+        except asyncio.TimeoutError:
+            return batch, False
+        if first is None:
+            return batch, True
+        batch.append(first)
+        deadline = self.loop.time() + self.batch_delay
+        while len(batch) < self.batch_size:
+            remaining = deadline - self.loop.time()
+            if remaining <= 0:
+                break
+            try:
+                entry = await asyncio.wait_for(self.pending.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if entry is None:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    async def connect(self):
+        if self.writer is None or self.writer.is_closing():
+            self.reader, self.writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout)
+
+    async def disconnect(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (OSError, ConnectionError):
+                pass
+        self.reader = None
+        self.writer = None
+
+    async def send(self, entries):
+        # The server's reply, or None when it could not be reached.
+        try:
+            await self.connect()
+            self.writer.write(json.dumps({"op": "submit", "entries": entries}).encode() + b"\n")
+            await self.writer.drain()
+            line = await asyncio.wait_for(self.reader.readline(), self.timeout)
+            if not line:
+                raise ConnectionError("leaderboard server closed the connection")
+            reply = json.loads(line)
+        except (OSError, ConnectionError, asyncio.TimeoutError, ValueError):
+            await self.disconnect()
+            return None
+        if not isinstance(reply, dict):
+            reply = {"ok": False}
+        if reply.get("ok"):
+            self.top = reply["top"]
+            self.sent += len(entries)
+        return reply
+
+    def read_spool(self):
+        if not self.has_spool:
+            return []
+        entries = []
+        try:
+            with open(self.queue_file, "r") as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        pass
+        except OSError:
+            self.has_spool = False
+        return entries
+
+    def append_spool(self, entries):
+        with open(self.queue_file, "a") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+        self.has_spool = True
+        self.spooled += len(entries)
+
+    def rewrite_spool(self, entries):
+        if not entries:
+            self.clear_spool()
+            return
+        tmp_path = self.queue_file + ".tmp"
+        with open(tmp_path, "w") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+        os.replace(tmp_path, self.queue_file)
+        self.has_spool = True
+
+    def clear_spool(self):
+        try:
+            os.remove(self.queue_file)
+        except OSError:
+            pass
+        self.has_spool = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared Flappy Bird leaderboard server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--file", default="highscores.json")
+    args = parser.parse_args()
+
+    async def serve():
+        server = LeaderboardServer(args.file, args.host, args.port)
+        await server.start()
+        print(f"Leaderboard listening on {args.host}:{server.port}")
+        await server.server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
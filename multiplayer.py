@@ -0,0 +1,639 @@
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import random
+import struct
+import threading
+import time
+from collections import deque
+
+from constants import (BIRD_HEIGHT, BIRD_WIDTH, BOARD_HEIGHT, BOARD_WIDTH, COIN_HEIGHT, COIN_ROTATION_SPEED,
+                       COIN_WIDTH, FPS, FRAME_MS, GRAVITY, JUMP_VELOCITY, OPENING_SPACE, PIPE_HEIGHT, PIPE_WIDTH)
+from course import Course
+from game_state import difficulty_params, level_for_score, move_pipe
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8766
+MAX_PLAYERS = 16
+BIRD_X = BOARD_WIDTH // 8
+BIRD_START_Y = BOARD_HEIGHT // 2
+INPUT_BACKLOG = 4  # queued inputs beyond this are merged so a fast client can't build up lag
+MAX_LEAD = 6  # ticks a client's world may run ahead of the last snapshot
+MAX_BUFFERED = 64 * 1024  # skip snapshots to clients whose socket is this far behind
+
+# Every message is a uint16 length followed by the payload; the first payload byte is the message type.
+JOIN = 1  # client: player name (utf-8)
+INPUT = 2  # client: input sequence number, flap
+WELCOME = 3  # server: player id
+ROUND = 4  # server: course seed, round number
+ROSTER = 5  # server: JSON list of [player id, name]
+SNAPSHOT = 6  # server: snapshot number, baseline number, tick, entry count, then per-player deltas
+
+LENGTH = struct.Struct("<H")
+INPUT_MSG = struct.Struct("<BIB")
+WELCOME_MSG = struct.Struct("<BB")
+ROUND_MSG = struct.Struct("<BII")
+SNAPSHOT_HEADER = struct.Struct("<BIIIB")
+ENTRY_HEADER = struct.Struct("<BB")
+NO_BASELINE = 0xFFFFFFFF
+
+# Player state is a (y, velocity_y, score in half points, last input acknowledged, alive) tuple. A snapshot
+# entry only carries the fields that differ from the client's baseline, flagged in its mask byte.
+FIELDS = ((1, struct.Struct("<h")), (2, struct.Struct("<b")), (4, struct.Struct("<H")), (8, struct.Struct("<I")),
+          (16, struct.Struct("<B")))
+REMOVED = 128
+EMPTY_STATE = (BIRD_START_Y, 0, 0, 0, 0)
+
+
+def frame(payload):
+    return LENGTH.pack(len(payload)) + payload
+
+
+async def read_message(reader):
+    length, = LENGTH.unpack(await reader.readexactly(LENGTH.size))
+    return await reader.readexactly(length)
+
+
+def bird_step(y, velocity_y, flap):
+    # The bird half of FlappyBirdGame.jump()/update(), shared by the server and client-side prediction.
+    if flap:
+        velocity_y = JUMP_VELOCITY
+    velocity_y += GRAVITY
+    return max(0, y + velocity_y), velocity_y
+
+
+def encode_snapshot(seq, baseline_seq, tick, states, baseline):
+    parts = []
+    count = 0
+    for player_id, state in states.items():
+        old = baseline.get(player_id)
+        mask = 0
+        fields = []
+        for i, (bit, field) in enumerate(FIELDS):
+            if old is None or old[i] != state[i]:
+                mask |= bit
+                fields.append(field.pack(state[i]))
+        if mask:
+            parts.append(ENTRY_HEADER.pack(player_id, mask))
+            parts.extend(fields)
+            count += 1
+    for player_id in baseline:
+        if player_id not in states:
+            parts.append(ENTRY_HEADER.pack(player_id, REMOVED))
+            count += 1
+    return frame(SNAPSHOT_HEADER.pack(SNAPSHOT, seq, baseline_seq, tick, count) + b"".join(parts))
+
+
+def decode_snapshot(payload, baseline):
+    _, seq, baseline_seq, tick, count = SNAPSHOT_HEADER.unpack_from(payload)
+    states = dict(baseline)
+    offset = SNAPSHOT_HEADER.size
+    for _ in range(count):
+        player_id, mask = ENTRY_HEADER.unpack_from(payload, offset)
+        offset += ENTRY_HEADER.size
+        if mask & REMOVED:
+            states.pop(player_id, None)
+            continue
+        state = list(states.get(player_id, EMPTY_STATE))
+        for i, (bit, field) in enumerate(FIELDS):
+            if mask & bit:
+                state[i], = field.unpack_from(payload, offset)
+                offset += field.size
+        states[player_id] = tuple(state)
+    return seq, baseline_seq, tick, states
+
+
+class RacePipe:
+    __slots__ = ("x", "y", "direction", "is_moving", "is_top", "pair_index", "passed")
+
+    def __init__(self, x, y, is_moving, is_top, pair_index):
+        self.x = x
+        self.y = y
+        self.direction = 1
+        self.is_moving = is_moving
+        self.is_top = is_top
+        self.pair_index = pair_index
+        self.passed = False
+
+
+class RaceCoin:
+    __slots__ = ("x", "y", "rotation", "pair_index")
+
+    def __init__(self, x, y, pair_index):
+        self.x = x
+        self.y = y
+        self.rotation = 0
+        self.pair_index = pair_index
+
+
+class RaceWorld:
+    # The shared half of a race: pipes and coins. It only depends on the course seed and the tick, so the
+    # server and every client step identical copies and pipes never go over the wire. Difficulty follows
+    # the pipes passed, which is the same for every bird still flying.
+    def __init__(self, seed):
+        self.course = Course(seed)
+        self.tick = 0
+        self.sim_time = 0
+        self.last_pipe_time = 0
+        self.pairs_spawned = 0
+        self.pairs_passed = 0
+        self.difficulty_level = 0
+        self.velocity_x, self.pipe_interval = difficulty_params(0)
+        self.pipes = []
+        self.coins = []
+
+    def place_pipes(self):
+        top_pipe_y, is_moving, coin_y = self.course.pipe_pair(self.pairs_spawned, self.difficulty_level)
+        self.pipes.append(RacePipe(BOARD_WIDTH, top_pipe_y, is_moving, True, self.pairs_spawned))
+        self.pipes.append(RacePipe(BOARD_WIDTH, top_pipe_y + PIPE_HEIGHT + OPENING_SPACE, is_moving, False,
+                                   self.pairs_spawned))
+        if coin_y is not None:
+            self.coins.append(RaceCoin(BOARD_WIDTH + PIPE_WIDTH, coin_y, self.pairs_spawned))
+        self.pairs_spawned += 1
+
+    def update(self):
+        # Returns how many pipes the birds passed this tick.
+        self.tick += 1
+        self.difficulty_level = level_for_score(self.pairs_passed)
+        self.velocity_x, self.pipe_interval = difficulty_params(self.difficulty_level)
+        self.sim_time += FRAME_MS
+        if self.sim_time - self.last_pipe_time > self.pipe_interval:
+            self.place_pipes()
+            self.last_pipe_time = self.sim_time
+        passed = 0
+        for pipe in self.pipes:
+            pipe.x += self.velocity_x
+            if pipe.is_moving:
+                pipe.y, pipe.direction = move_pipe(pipe.y, pipe.direction)
+            if not pipe.passed and BIRD_X > pipe.x + PIPE_WIDTH:
+                pipe.passed = True
+                passed += 1
+                if pipe.is_top:
+                    self.pairs_passed += 1
+        self.pipes = [pipe for pipe in self.pipes if pipe.x + PIPE_WIDTH >= 0]
+        for coin in self.coins:
+            coin.x += self.velocity_x
+            coin.rotation = (coin.rotation + COIN_ROTATION_SPEED) % 360
+        self.coins = [coin for coin in self.coins if coin.x + COIN_WIDTH >= 0]
+        return passed
+
+    def near_bird(self):
+        # Pipes and coins overlapping the birds' column; every bird shares the same x.
+        pipes = [pipe for pipe in self.pipes if pipe.x < BIRD_X + BIRD_WIDTH and pipe.x + PIPE_WIDTH > BIRD_X]
+        coins = [coin for coin in self.coins if coin.x < BIRD_X + BIRD_WIDTH and coin.x + COIN_WIDTH > BIRD_X]
+        return pipes, coins
+
+    def next_gap(self):
+        for pipe, below in zip(self.pipes, self.pipes[1:]):
+            if pipe.is_top and pipe.x + PIPE_WIDTH >= BIRD_X:
+                return pipe.y + PIPE_HEIGHT, below.y
+        return None
+
+
+def hits_pipe(y, pipes):
+    return any(y < pipe.y + PIPE_HEIGHT and y + BIRD_HEIGHT > pipe.y for pipe in pipes)
+
+
+def touched_coins(y, coins):
+    return [coin for coin in coins if y < coin.y + COIN_HEIGHT and y + BIRD_HEIGHT > coin.y]
+
+
+class RacePlayer:
+    __slots__ = ("id", "name", "writer", "y", "velocity_y", "score", "alive", "taken", "inputs", "ack", "baseline",
+                 "baseline_seq")
+
+    def __init__(self, player_id, name, writer):
+        self.id = player_id
+        self.name = name
+        self.writer = writer
+        self.y = BIRD_START_Y
+        self.velocity_y = 0
+        self.score = 0  # half points: a pipe is 1, a coin 4
+        self.alive = False
+        self.taken = set()
+        self.inputs = deque()
+        self.ack = 0
+        self.baseline = {}
+        self.baseline_seq = NO_BASELINE
+
+    def state(self):
+        return self.y, max(-128, min(127, self.velocity_y)), min(self.score, 0xFFFF), self.ack, int(self.alive)
+
+
+class RaceServer:
+    # Authoritative race simulation on a fixed tick. Rounds start a few seconds after someone is waiting and
+    # end when every bird has crashed; players who join mid-round watch until the next one.
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, tick_rate=FPS, snapshot_interval=2,
+                 lobby_seconds=3.0, seed=None):
+        self.host = host
+        self.port = port
+        self.tick_rate = tick_rate
+        self.snapshot_interval = snapshot_interval
+        self.lobby_ticks = int(lobby_seconds * tick_rate)
+        self.rng = random.Random(seed)
+        self.players = {}
+        self.world = None
+        self.round = 0
+        self.countdown = self.lobby_ticks
+        self.ticks = 0
+        self.snapshot_seq = 0
+        self.tick_cost = 0.0
+        self.bytes_sent = 0
+        self.snapshots_skipped = 0
+        self.server = None
+        self.loop = None
+        self.thread = None
+        self.clients = {}
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def shutdown(self):
+        # Closing a connection ends its handler at the next read, so none is left pending when the loop stops.
+        self.server.close()
+        for writer in list(self.clients.values()):
+            writer.close()
+        if self.clients:
+            await asyncio.wait(list(self.clients), timeout=1)
+        await self.server.wait_closed()
+
+    def free_id(self):
+        for player_id in range(MAX_PLAYERS):
+            if player_id not in self.players:
+                return player_id
+        return None
+
+    async def handle_client(self, reader, writer):
+        player = None
+        self.clients[asyncio.current_task()] = writer
+        try:
+            payload = await read_message(reader)
+            player_id = self.free_id()
+            if payload[:1] != bytes([JOIN]) or player_id is None:
+                return
+            player = RacePlayer(player_id, payload[1:].decode("utf-8", "replace")[:15], writer)
+            self.players[player_id] = player
+            writer.write(frame(WELCOME_MSG.pack(WELCOME, player_id)))
+            if self.world is not None:
+                writer.write(frame(ROUND_MSG.pack(ROUND, self.world.course.seed, self.round)))
+            self.send_roster()
+            while True:
+                payload = await read_message(reader)
+                if payload[0] == INPUT:
+                    _, seq, flap = INPUT_MSG.unpack(payload)
+                    player.inputs.append((seq, flap))
+        except (asyncio.IncompleteReadError, ConnectionError, struct.error, IndexError):
+            pass
+        finally:
+            self.clients.pop(asyncio.current_task(), None)
+            if player is not None:
+                del self.players[player.id]
+                self.send_roster()
+            writer.close()
+
+    def broadcast(self, data):
+        for player in self.players.values():
+            player.writer.write(data)
+            self.bytes_sent += len(data)
+
+    def send_roster(self):
+        roster = [[player.id, player.name] for player in self.players.values()]
+        self.broadcast(frame(bytes([ROSTER]) + json.dumps(roster).encode()))
+
+    def start_round(self):
+        self.round += 1
+        self.world = RaceWorld(self.rng.getrandbits(32))
+        for player in self.players.values():
+            player.y = BIRD_START_Y
+            player.velocity_y = 0
+            player.score = 0
+            player.alive = True
+            player.taken = set()
+        self.broadcast(frame(ROUND_MSG.pack(ROUND, self.world.course.seed, self.round)))
+
+    def take_input(self, player):
+        # One queued input per tick; a backlog gets merged into this tick instead of adding latency.
+        flap = False
+        count = 1 + max(0, len(player.inputs) - INPUT_BACKLOG) if player.alive else len(player.inputs)
+        for _ in range(min(count, len(player.inputs))):
+            seq, pressed = player.inputs.popleft()
+            flap = flap or bool(pressed)
+            player.ack = seq
+        return flap
+
+    def step(self):
+        self.ticks += 1
+        world = self.world
+        if world is None:
+            for player in self.players.values():
+                self.take_input(player)
+            self.countdown = self.countdown - 1 if self.players else self.lobby_ticks
+            if self.countdown <= 0:
+                self.start_round()
+        else:
+            racing = [player for player in self.players.values() if player.alive]
+            for player in racing:
+                player.y, player.velocity_y = bird_step(player.y, player.velocity_y, self.take_input(player))
+            for player in self.players.values():
+                if not player.alive:
+                    self.take_input(player)
+            passed = world.update()
+            pipes, coins = world.near_bird()
+            for player in racing:
+                player.score += passed
+                for coin in touched_coins(player.y, coins):
+                    if coin.pair_index not in player.taken:
+                        player.taken.add(coin.pair_index)
+                        player.score += 4
+                if player.y + BIRD_HEIGHT > BOARD_HEIGHT or hits_pipe(player.y, pipes):
+                    player.alive = False
+            if not any(player.alive for player in self.players.values()):
+                self.world = None
+                self.countdown = self.lobby_ticks
+        if self.ticks % self.snapshot_interval == 0:
+            self.send_snapshots()
+
+    def send_snapshots(self):
+        # Deltas are against the last snapshot each client was actually sent. Over TCP that always arrives,
+        # so no acks are needed, and clients sharing a baseline share one encoding.
+        self.snapshot_seq += 1
+        tick = self.world.tick if self.world is not None else 0
+        states = {player.id: player.state() for player in self.players.values()}
+        encoded = {}
+        for player in self.players.values():
+            if player.writer.transport.get_write_buffer_size() > MAX_BUFFERED:
+                self.snapshots_skipped += 1
+                continue
+            data = encoded.get(player.baseline_seq)
+            if data is None:
+                data = encoded[player.baseline_seq] = encode_snapshot(self.snapshot_seq, player.baseline_seq, tick,
+                                                                      states, player.baseline)
+            player.writer.write(data)
+            self.bytes_sent += len(data)
+            player.baseline = states
+            player.baseline_seq = self.snapshot_seq
+
+    async def run_ticks(self):
+        loop = asyncio.get_running_loop()
+        interval = 1 / self.tick_rate
+        next_tick = loop.time()
+        while True:
+            started = time.perf_counter()
+            self.step()
+            self.tick_cost = 0.99 * self.tick_cost + 0.01 * (time.perf_counter() - started)
+            next_tick += interval
+            delay = next_tick - loop.time()
+            if delay < -0.25:
+                next_tick = loop.time()  # too far behind to catch up; drop the missed ticks
+            await asyncio.sleep(max(0, delay))
+
+    async def report_stats(self, period=5.0):
+        last_sent = 0
+        while True:
+            await asyncio.sleep(period)
+            print(f"{len(self.players)} players, round {self.round}, tick {self.tick_cost * 1000:.3f} ms, "
+                  f"{(self.bytes_sent - last_sent) / period / 1024:.1f} KiB/s out, "
+                  f"{self.snapshots_skipped} snapshots skipped")
+            last_sent = self.bytes_sent
+
+    def run_in_thread(self):
+        # Binds before returning so the caller knows whether the port was free.
+        started = threading.Event()
+        errors = []
+
+        def run():
+            self.loop = asyncio.new_event_loop()
+            try:
+                self.loop.run_until_complete(self.start())
+            except OSError as e:
+                errors.append(e)
+                started.set()
+                self.loop.close()
+                return
+            started.set()
+            ticks = self.loop.create_task(self.run_ticks())
+            self.loop.run_forever()
+            ticks.cancel()
+            try:
+                self.loop.run_until_complete(ticks)
+            except asyncio.CancelledError:
+                pass
+            self.loop.close()
+
+        self.thread = threading.Thread(target=run, name="race-server", daemon=True)
+        self.thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+
+    def stop(self):
+        if self.loop is not None and self.thread is not None and self.thread.is_alive():
+            try:
+                asyncio.run_coroutine_threadsafe(self.shutdown(), self.loop).result(timeout=2)
+            except (concurrent.futures.TimeoutError, RuntimeError):
+                pass
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=2)
+
+
+class RaceClient:
+    # Network I/O runs on an event loop (a background thread from start(), or the caller's loop for bots);
+    # update() is called once per frame from the game loop and does everything else. The local bird is
+    # predicted from our own inputs and corrected whenever the server acknowledges them.
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, name="Player", timeout=3.0):
+        self.host = host
+        self.port = port
+        self.name = name
+        self.timeout = timeout
+        self.messages = deque()
+        self.player_id = None
+        self.names = {}
+        self.world = None
+        self.round = 0
+        self.states = {}
+        self.snapshot_seq = NO_BASELINE
+        self.server_tick = 0
+        self.seq = 0
+        self.pending = deque()
+        self.y = BIRD_START_Y
+        self.velocity_y = 0
+        self.score = 0
+        self.alive = False
+        self.taken = set()
+        self.closed = False
+        self.loop = None
+        self.thread = None
+        self.task = None
+        self.writer = None
+
+    def start(self):
+        ready = threading.Event()
+
+        def run():
+            self.loop = asyncio.new_event_loop()
+            self.task = self.loop.create_task(self.run())
+            ready.set()
+            try:
+                self.loop.run_until_complete(self.task)
+            except asyncio.CancelledError:
+                pass
+            self.loop.close()
+
+        self.thread = threading.Thread(target=run, name="race-client", daemon=True)
+        self.thread.start()
+        ready.wait()
+        return self
+
+    def close(self):
+        if self.thread is not None and self.thread.is_alive():
+            self.loop.call_soon_threadsafe(self.task.cancel)
+            self.thread.join(timeout=2)
+
+    async def run(self):
+        try:
+            reader, self.writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+            self.writer.write(frame(bytes([JOIN]) + self.name.encode()))
+            while True:
+                self.messages.append(await read_message(reader))
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            pass
+        finally:
+            self.closed = True
+            if self.writer is not None:
+                self.writer.close()
+
+    def send(self, data):
+        if self.writer is not None and not self.closed:
+            self.loop.call_soon_threadsafe(self.writer.write, data)
+
+    def handle_message(self, payload):
+        kind = payload[0]
+        if kind == WELCOME:
+            _, self.player_id = WELCOME_MSG.unpack(payload)
+        elif kind == ROUND:
+            _, seed, self.round = ROUND_MSG.unpack(payload)
+            self.world = RaceWorld(seed)
+            self.server_tick = 0
+            self.y = BIRD_START_Y
+            self.velocity_y = 0
+            self.score = 0
+            self.alive = True
+            self.taken = set()
+            self.pending.clear()
+        elif kind == ROSTER:
+            self.names = {player_id: name for player_id, name in json.loads(payload[1:])}
+        elif kind == SNAPSHOT:
+            seq, baseline_seq, tick, states = decode_snapshot(payload, self.states)
+            if baseline_seq != self.snapshot_seq:
+                raise ValueError("snapshot delta against a baseline we never received")
+            self.snapshot_seq = seq
+            self.states = states
+            self.server_tick = tick
+            while self.world is not None and self.world.tick < tick:
+                self.world.update()
+            if self.player_id in states:
+                self.reconcile(states[self.player_id])
+
+    def reconcile(self, state):
+        y, velocity_y, score, ack, alive = state
+        self.score = score / 2
+        while self.pending and self.pending[0][0] <= ack:
+            self.pending.popleft()
+        self.alive = bool(alive)
+        self.y, self.velocity_y = y, velocity_y
+        if not self.alive:
+            self.pending.clear()
+            return
+        for _, flap in self.pending:
+            self.y, self.velocity_y = bird_step(self.y, self.velocity_y, flap)
+
+    def update(self, flap=False):
+        while self.messages:
+            try:
+                self.handle_message(self.messages.popleft())
+            except (ValueError, struct.error, IndexError):
+                self.closed = True
+                self.close()
+                return
+        if self.world is None:
+            return
+        if self.world.tick < self.server_tick + MAX_LEAD:
+            self.world.update()
+        if self.alive:
+            self.seq += 1
+            self.send(frame(INPUT_MSG.pack(INPUT, self.seq, flap)))
+            self.pending.append((self.seq, flap))
+            self.y, self.velocity_y = bird_step(self.y, self.velocity_y, flap)
+            for coin in touched_coins(self.y, self.world.near_bird()[1]):
+                self.taken.add(coin.pair_index)
+
+    def standings(self):
+        # [(name, score, alive)] best first
+        rows = [(self.names.get(player_id, "?"), state[2] / 2, bool(state[4]))
+                for player_id, state in self.states.items()]
+        rows.sort(key=lambda row: row[1], reverse=True)
+        return rows
+
+
+def bot_flap(client, aim):
+    gap = client.world.next_gap()
+    target = (gap[0] + gap[1]) / 2 + aim if gap is not None else BOARD_HEIGHT / 2
+    return client.y + BIRD_HEIGHT / 2 > target and client.velocity_y >= 0
+
+
+async def run_bots(count, host=DEFAULT_HOST, port=DEFAULT_PORT, tick_rate=FPS, seed=None):
+    # Every bot is a full RaceClient (prediction and all) sharing this one event loop.
+    rng = random.Random(seed)
+    loop = asyncio.get_running_loop()
+    bots = []
+    for i in range(count):
+        client = RaceClient(host, port, f"Bot {i + 1}")
+        client.loop = loop
+        client.task = loop.create_task(client.run())
+        bots.append((client, rng.uniform(-60, 60), rng.uniform(0.85, 1.0)))
+    interval = 1 / tick_rate
+    next_tick = loop.time()
+    while not all(client.closed for client, _, _ in bots):
+        for client, aim, reaction in bots:
+            flap = client.world is not None and client.alive and bot_flap(client, aim) and rng.random() < reaction
+            client.update(flap)
+        next_tick += interval
+        await asyncio.sleep(max(0, next_tick - loop.time()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flappy Bird multiplayer races")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="run a race server")
+    serve.add_argument("--host", default=DEFAULT_HOST)
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--tick-rate", type=int, default=FPS)
+    serve.add_argument("--snapshot-interval", type=int, default=2, help="ticks between snapshots")
+    serve.add_argument("--stats", action="store_true", help="print tick cost and bandwidth every few seconds")
+    bots = commands.add_parser("bots", help="join a race server with computer players")
+    bots.add_argument("count", type=int)
+    bots.add_argument("--host", default=DEFAULT_HOST)
+    bots.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    async def serve_forever():
+        server = RaceServer(args.host, args.port, args.tick_rate, args.snapshot_interval)
+        await server.start()
+        print(f"Race server listening on {args.host}:{server.port}")
+        if args.stats:
+            asyncio.get_running_loop().create_task(server.report_stats())
+        await server.run_ticks()
+
+    try:
+        if args.command == "serve":
+            asyncio.run(serve_forever())
+        else:
+            asyncio.run(run_bots(args.count, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import argparse
+import os
+
+import numpy as np
+
+from constants import BIRD_HEIGHT, BOARD_HEIGHT, BOARD_WIDTH, PIPE_WIDTH
+from game_state import GameState
+
+CHECKPOINT_FILE = "neuro_best.npz"
+INPUTS = 5
+HIDDEN = 8
+
+
+def observe(states):
+    # One row of normalized features per state: height, vertical speed, distance to the next gap
+    # and offsets to the gap edges.
+    obs = np.zeros((len(states), INPUTS), dtype=np.float32)
+    for i, state in enumerate(states):
+        bird_center = state.bird_y + BIRD_HEIGHT / 2
+        obs[i, 0] = state.bird_y / BOARD_HEIGHT
+        obs[i, 1] = state.velocity_y / 20
+        gap = state.next_gap()
+        if gap is None:
+            obs[i, 2] = 1.0
+            obs[i, 3] = (BOARD_HEIGHT * 3 / 8 - bird_center) / BOARD_HEIGHT
+            obs[i, 4] = (BOARD_HEIGHT * 5 / 8 - bird_center) / BOARD_HEIGHT
+        else:
+            gap_top, gap_bottom, pipe_x = gap
+            obs[i, 2] = (pipe_x + PIPE_WIDTH - state.bird_x) / BOARD_WIDTH
+            obs[i, 3] = (gap_top - bird_center) / BOARD_HEIGHT
+            obs[i, 4] = (gap_bottom - bird_center) / BOARD_HEIGHT
+    return obs
+
+
+class Population:
+    # All genomes' weights stacked along a leading population axis, so one generation's forward pass is
+    # a single batched matmul per layer.
+    def __init__(self, size, rng, w1=None, b1=None, w2=None, b2=None):
+        self.size = size
+        self.w1 = w1 if w1 is not None else rng.normal(0, 1, (size, INPUTS, HIDDEN)).astype(np.float32)
+        self.b1 = b1 if b1 is not None else np.zeros((size, 1, HIDDEN), dtype=np.float32)
+        self.w2 = w2 if w2 is not None else rng.normal(0, 1, (size, HIDDEN, 1)).astype(np.float32)
+        self.b2 = b2 if b2 is not None else np.zeros((size, 1, 1), dtype=np.float32)
+
+    def forward(self, obs, members=None):
+        # obs: (n, INPUTS) for the given population members (all of them by default); returns flap decisions.
+        if members is None:
+            members = slice(None)
+        hidden = np.tanh(np.matmul(obs[:, None, :], self.w1[members]) + self.b1[members])
+        out = np.matmul(hidden, self.w2[members]) + self.b2[members]
+        return out[:, 0, 0] > 0
+
+    def select(self, order):
+        return self.w1[order], self.b1[order], self.w2[order], self.b2[order]
+
+
+def evaluate(population, seed, max_ticks):
+    states = [GameState(seed) for _ in range(population.size)]
+    fitness = np.zeros(population.size)
+    alive = np.arange(population.size)
+    for _ in range(max_ticks):
+        if len(alive) == 0:
+            break
+        live_states = [states[i] for i in alive]
+        flaps = population.forward(observe(live_states), alive)
+        for state, flap in zip(live_states, flaps):
+            state.step(flap)
+        still_alive = []
+        for i, state in zip(alive, live_states):
+            if state.game_over:
+                fitness[i] = state.ticks + 60 * state.score
+            else:
+                still_alive.append(i)
+        alive = np.array(still_alive, dtype=np.intp)
+    for i in alive:
+        fitness[i] = states[i].ticks + 60 * states[i].score
+    return fitness
+
+
+def next_generation(population, fitness, rng, elite=10, sigma=0.2):
+    order = np.argsort(fitness)[::-1]
+    elites = population.select(order[:elite])
+    parents_a = rng.integers(0, elite, population.size)
+    parents_b = rng.integers(0, elite, population.size)
+    children = []
+    for elite_weights in elites:
+        a = elite_weights[parents_a]
+        b = elite_weights[parents_b]
+        child = np.where(rng.random(a.shape) < 0.5, a, b)
+        child = child + rng.normal(0, sigma, child.shape).astype(np.float32)
+        child[:elite] = elite_weights  # elites survive unchanged
+        children.append(child)
+    return Population(population.size, rng, *children)
+
+
+def save_checkpoint(path, population, fitness, generation, keep=5):
+    order = np.argsort(fitness)[::-1][:keep]
+    w1, b1, w2, b2 = population.select(order)
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, w1=w1, b1=b1, w2=w2, b2=b2, fitness=fitness[order], generation=generation)
+    os.replace(tmp_path, path)
+
+
+def load_population(path, size, rng, sigma=0.2):
+    data = np.load(path)
+    saved = [data["w1"], data["b1"], data["w2"], data["b2"]]
+    picks = rng.integers(0, len(saved[0]), size)
+    weights = []
+    for array in saved:
+        seeded = array[picks] + rng.normal(0, sigma, array[picks].shape).astype(np.float32)
+        # The saved genomes are best first; as many as fit come back unchanged.
+        keep = min(size, len(array))
+        seeded[:keep] = array[:keep]
+        weights.append(seeded)
+    return Population(size, rng, *weights), int(data["generation"]) + 1
+
+
+class NeuralController:
+    # The best checkpointed genome, with the same decide(state) interface as the Autopilot.
+    def __init__(self, w1, b1, w2, b2):
+        self.population = Population(1, None, w1[None], b1[None], w2[None], b2[None])
+
+    @classmethod
+    def load(cls, path=CHECKPOINT_FILE):
+        data = np.load(path)
+        return cls(data["w1"][0], data["b1"][0], data["w2"][0], data["b2"][0])
+
+    def decide(self, state):
+        return bool(self.population.forward(observe([state]))[0])
+
+
+def train(generations, size, checkpoint, seed=None, max_ticks=6000):
+    rng = np.random.default_rng(seed)
+    if os.path.exists(checkpoint):
+        population, start = load_population(checkpoint, size, rng)
+    else:
+        population, start = Population(size, rng), 0
+    for generation in range(start, start + generations):
+        # Every genome flies the same course within a generation; the course changes between generations.
+        fitness = evaluate(population, int(rng.integers(1 << 31)), max_ticks)
+        save_checkpoint(checkpoint, population, fitness, generation)
+        print(f"generation {generation}: best {fitness.max():.0f}, mean {fitness.mean():.0f}")
+        population = next_generation(population, fitness, rng)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evolve neural-network controllers for the bird")
+    parser.add_argument("--generations", type=int, default=50)
+    parser.add_argument("--population", type=int, default=200)
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE)
+    parser.add_argument("--max-ticks", type=int, default=6000)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    train(args.generations, args.population, args.checkpoint, args.seed, args.max_ticks)
+
+
+if __name__ == "__main__":
+    main()
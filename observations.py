@@ -0,0 +1,147 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pygame
+
+from constants import BOARD_HEIGHT, BOARD_WIDTH
+from game_state import GameState
+
+GRAY_PALETTE = [(i, i, i) for i in range(256)]
+TRANSPARENT = 0  # palette index used as the colorkey of grayscale sprites; black draws as 1
+
+
+def scale_surface(surface, sx, sy):
+    width, height = surface.get_size()
+    return pygame.transform.smoothscale(surface, (max(1, round(width * sx)), max(1, round(height * sy))))
+
+
+def to_gray(surface, opaque=False):
+    # 8-bit copy of an RGBA surface on the shared gray palette, so gray blits are plain byte copies.
+    rgb = pygame.surfarray.pixels3d(surface)
+    gray = (rgb[..., 0] * 0.299 + rgb[..., 1] * 0.587 + rgb[..., 2] * 0.114).astype(np.uint8)
+    del rgb
+    result = pygame.Surface(surface.get_size(), 0, 8)
+    result.set_palette(GRAY_PALETTE)
+    if opaque:
+        pygame.surfarray.pixels2d(result)[:] = gray
+        return result
+    pixels = pygame.surfarray.pixels2d(result)
+    pixels[:] = np.maximum(gray, 1)
+    pixels[pygame.surfarray.pixels_alpha(surface) < 128] = TRANSPARENT
+    del pixels
+    result.set_colorkey(TRANSPARENT)
+    return result
+
+
+class PixelObserver:
+    # Renders GameStates as small images straight into a NumPy array, for agents that learn from pixels.
+    # The scene is the one FlappyBirdGame.draw() shows, minus HUD and effects, drawn with sprites scaled down
+    # once up front: at board size a frame costs milliseconds, at 128x64 a few microseconds. Every frame slot
+    # is a pygame surface made with pygame.image.frombuffer over a slice of one array, so drawing writes the
+    # array directly. Each frame is also copied to a second half of the ring, which keeps the last `stack`
+    # frames one contiguous slice; frame and frames() are views, not copies, and change on the next render.
+    def __init__(self, game, width=128, height=64, grayscale=True, stack=4, background=True):
+        self.width = width
+        self.height = height
+        self.grayscale = grayscale
+        self.stack = stack
+        self.sx = width / BOARD_WIDTH
+        self.sy = height / BOARD_HEIGHT
+        if grayscale:
+            self.buffer = np.zeros((2 * stack, height, width), dtype=np.uint8)
+        else:
+            self.buffer = np.zeros((2 * stack, height, width, 4), dtype=np.uint8)
+        self.slots = []
+        for i in range(stack):
+            slot = pygame.image.frombuffer(self.buffer[i], (width, height), "P" if grayscale else "RGBX")
+            if grayscale:
+                slot.set_palette(GRAY_PALETTE)
+            self.slots.append(slot)
+        self.index = stack - 1
+        convert = to_gray if grayscale else (lambda surface, opaque=False: surface)
+        background_img = scale_surface(game.background_img, self.sx, self.sy) if background else None
+        self.background = convert(background_img, opaque=True) if background_img is not None else None
+        self.bird = convert(scale_surface(game.bird_img, self.sx, self.sy))
+        self.pipes = (convert(scale_surface(game.bottom_pipe_img, self.sx, self.sy)),
+                      convert(scale_surface(game.top_pipe_img, self.sx, self.sy)))
+        # Coin frames keep their offsets from the coin's corner, scaled along with them.
+        self.coins = {angle: (convert(scale_surface(image, self.sx, self.sy)), dx * self.sx, dy * self.sy)
+                      for angle, (image, dx, dy, _) in game.coin_frames.items()}
+
+    def render(self, state):
+        self.index = (self.index + 1) % self.stack
+        slot = self.slots[self.index]
+        sx = self.sx
+        sy = self.sy
+        if self.background is not None:
+            slot.blit(self.background, (0, 0))
+        else:
+            slot.fill(0)
+        pipes = self.pipes
+        blits = [(pipes[is_top], (int(x * sx), int(y * sy))) for x, y, _, _, _, is_top, _ in state.iter_pipes()]
+        coins = self.coins
+        for x, y, rotation in state.iter_coins():
+            image, dx, dy = coins[rotation]
+            blits.append((image, (int(x * sx + dx), int(y * sy + dy))))
+        blits.append((self.bird, (int(state.bird_x * sx), int(state.bird_y * sy))))
+        slot.blits(blits, doreturn=False)
+        self.buffer[self.index + self.stack] = self.buffer[self.index]
+        return self.frame
+
+    def observe(self, game):
+        # A live FlappyBirdGame, through the same snapshot the autopilot plans on.
+        return self.render(game.snapshot())
+
+    def reset(self):
+        self.buffer[:] = 0
+
+    @property
+    def frame(self):
+        # The newest frame, (height, width) gray or (height, width, 3) RGB.
+        frame = self.buffer[self.index + self.stack]
+        return frame if self.grayscale else frame[..., :3]
+
+    def frames(self):
+        # The last `stack` frames, oldest first: (stack, height, width) or (stack, height, width, 3).
+        frames = self.buffer[self.index + 1:self.index + 1 + self.stack]
+        return frames if self.grayscale else frames[..., :3]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark headless pixel observations of autopilot-free runs")
+    parser.add_argument("--frames", type=int, default=20000)
+    parser.add_argument("--size", default="128x64", help="observation size, WIDTHxHEIGHT")
+    parser.add_argument("--rgb", action="store_true", help="RGB frames instead of grayscale")
+    parser.add_argument("--stack", type=int, default=4)
+    parser.add_argument("--save", metavar="PNG", help="save the last frame stack side by side")
+    args = parser.parse_args()
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import flappy_bird
+    game = flappy_bird.FlappyBirdGame(pygame.display.set_mode((1, 1)))
+    width, height = (int(n) for n in args.size.lower().split("x"))
+    observer = PixelObserver(game, width, height, grayscale=not args.rgb, stack=args.stack)
+    state = GameState(0)
+    render_time = 0.0
+    started = time.perf_counter()
+    for tick in range(args.frames):
+        state.step(state.bird_y > BOARD_HEIGHT * 0.55 and state.velocity_y >= 0)
+        if state.game_over:
+            state = GameState(tick)
+        render_start = time.perf_counter()
+        observer.render(state)
+        render_time += time.perf_counter() - render_start
+    elapsed = time.perf_counter() - started
+    print(f"{args.frames} frames of {width}x{height} {'RGB' if args.rgb else 'gray'}: "
+          f"{args.frames / render_time:.0f} renders/s, {args.frames / elapsed:.0f} steps+renders/s")
+    if args.save:
+        strip = np.concatenate(list(observer.frames()), axis=1)
+        if strip.ndim == 2:
+            strip = np.repeat(strip[..., None], 3, axis=2)
+        pygame.image.save(pygame.surfarray.make_surface(strip.swapaxes(0, 1)), args.save)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import json
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+from constants import BOARD_HEIGHT, BOARD_WIDTH
+
+LAYER_MANIFEST = os.path.join("backgrounds", "layers.json")
+TILE_WIDTH = 256
+
+
+class TileStrip:
+    # A long horizontal strip made of equally sized segments, each cut into vertical tiles. Segments are either
+    # surfaces already in memory or image files, which are loaded on a background thread shortly before they
+    # scroll into view and dropped again once they fall out of a small cache. The cache always holds every
+    # segment that can be on screen at once plus the next one, so scrolling never evicts a segment in view.
+    def __init__(self, segments, segment_width, height, tile_width=TILE_WIDTH, cache_segments=4):
+        self.segments = segments
+        self.tiles_per_segment = max(1, round(segment_width / tile_width))
+        self.segment_width = self.tiles_per_segment * tile_width  # segments are scaled to whole tiles
+        self.height = height
+        self.tile_width = tile_width
+        self.length = len(segments) * self.segment_width
+        self.screen_segments = -(-BOARD_WIDTH // self.segment_width)
+        self.cache_segments = max(cache_segments, self.screen_segments + 2)
+        self.cache = OrderedDict()
+        self.loading = {}
+        self.loader = None
+
+    def cut(self, surface):
+        if surface.get_size() != (self.segment_width, self.height):
+            surface = pygame.transform.scale(surface, (self.segment_width, self.height))
+        # Tiles are copied out of the segment; compact surfaces blit faster than subsurfaces of a wide image.
+        return [surface.subsurface((x, 0, self.tile_width, self.height)).copy()
+                for x in range(0, self.segment_width, self.tile_width)]
+
+    def prefetch(self, index):
+        index %= len(self.segments)
+        source = self.segments[index]
+        if index in self.cache or index in self.loading or isinstance(source, pygame.Surface):
+            return
+        if self.loader is None:
+            self.loader = ThreadPoolExecutor(1, thread_name_prefix="parallax")
+        self.loading[index] = self.loader.submit(pygame.image.load, source)
+
+    def tiles(self, index):
+        index %= len(self.segments)
+        tiles = self.cache.get(index)
+        if tiles is not None:
+            self.cache.move_to_end(index)
+            return tiles
+        source = self.segments[index]
+        if isinstance(source, pygame.Surface):
+            tiles = self.cut(source)
+        else:
+            self.prefetch(index)
+            try:
+                surface = self.loading.pop(index).result().convert_alpha()  # waits only if prefetch was late
+            except (pygame.error, OSError):
+                surface = pygame.Surface((self.segment_width, self.height), pygame.SRCALPHA)
+            tiles = self.cut(surface)
+        self.cache[index] = tiles
+        if len(self.cache) > self.cache_segments:
+            self.cache.popitem(last=False)
+        return tiles
+
+    def close(self):
+        if self.loader is not None:
+            self.loader.shutdown(wait=False)
+
+
+class Layer:
+    # speed is relative to the pipes: 1.0 scrolls with them, smaller values are further away. The offset is
+    # kept as a float so slow layers still creep along smoothly at low scroll speeds.
+    def __init__(self, strip, speed=1.0, y=0):
+        self.strip = strip
+        self.speed = speed
+        self.y = y
+        self.offset = 0.0
+
+    def scroll(self, dx):
+        self.offset = (self.offset + dx * self.speed) % self.strip.length
+
+    def draw(self, blits):
+        strip = self.strip
+        tile_width = strip.tile_width
+        tile_index = int(self.offset // tile_width)
+        x = -int(self.offset % tile_width)
+        while x < BOARD_WIDTH:
+            segment, tile = divmod(tile_index, strip.tiles_per_segment)
+            blits.append((strip.tiles(segment)[tile], (x, self.y)))
+            x += tile_width
+            tile_index += 1
+        # Load the next screen's worth of segments ahead of time, so none has to be waited for.
+        for ahead in range(1, strip.screen_segments + 1):
+            strip.prefetch(segment + ahead)
+
+
+class ParallaxBackground:
+    # Layers are drawn back to front; only the tiles that intersect the screen are blitted.
+    def __init__(self, layers):
+        self.layers = layers
+
+    def scroll(self, dx):
+        for layer in self.layers:
+            layer.scroll(dx)
+
+    def draw(self, screen):
+        blits = []
+        for layer in self.layers:
+            layer.draw(blits)
+        screen.blits(blits, doreturn=False)
+
+    def close(self):
+        for layer in self.layers:
+            layer.strip.close()
+
+
+def load_background(base_img, manifest=LAYER_MANIFEST):
+    # The base layer is the game's background image. Extra layers come from an optional manifest, e.g.
+    #   [{"files": ["hills1.png", "hills2.png"], "speed": 1.5, "y": 700, "width": 1024, "height": 324}]
+    # with file names relative to the manifest's directory; images need transparency to show the layers behind.
+    # The base image covers the whole screen, so it is one tile: narrow opaque tiles only add per-blit overhead.
+    layers = [Layer(TileStrip([base_img], BOARD_WIDTH, BOARD_HEIGHT, tile_width=BOARD_WIDTH))]
+    try:
+        with open(manifest, "r") as f:
+            definitions = json.load(f)
+    except (OSError, ValueError):
+        return ParallaxBackground(layers)
+    directory = os.path.dirname(manifest)
+    for definition in definitions:
+        try:
+            files = [os.path.join(directory, name) for name in definition["files"]]
+            if not files:
+                continue
+            strip = TileStrip(files, int(definition.get("width", BOARD_WIDTH)),
+                              int(definition.get("height", BOARD_HEIGHT)))
+            layers.append(Layer(strip, float(definition.get("speed", 1.0)), int(definition.get("y", 0))))
+        except (KeyError, TypeError, ValueError):
+            pass
+    return ParallaxBackground(layers)
@@ -0,0 +1,112 @@
+import math
+
+import numpy as np
+import pygame
+
+SPARK = 0
+FEATHER = 1
+FADE_LEVELS = 4
+
+# Per kind: gravity, drag, speed range, lifetime range in ticks
+KINDS = (
+    (0.25, 0.96, (3, 9), (20, 40)),
+    (0.05, 0.92, (1, 5), (50, 90)),
+)
+GRAVITY = np.array([kind[0] for kind in KINDS], dtype=np.float32)
+DRAG = np.array([kind[1] for kind in KINDS], dtype=np.float32)
+
+
+def make_sprites():
+    # One small surface per kind and fade level, indexed kind * FADE_LEVELS + level.
+    spark = pygame.Surface((6, 6), pygame.SRCALPHA)
+    pygame.draw.circle(spark, (255, 230, 80), (3, 3), 3)
+    feather = pygame.Surface((10, 5), pygame.SRCALPHA)
+    pygame.draw.ellipse(feather, (250, 250, 235), (0, 0, 10, 5))
+    sprites = []
+    for base in (spark, feather):
+        for level in range(FADE_LEVELS):
+            sprite = base.copy()
+            sprite.set_alpha(255 * (level + 1) // FADE_LEVELS)
+            sprites.append(sprite)
+    return sprites
+
+
+class ParticleSystem:
+    # Particles live in flat NumPy arrays (live ones packed at the front), are updated in one vectorized step
+    # and drawn in one blits() call. The capacity is a hard cap; on top of that, adapt() halves the share of
+    # particles emitted and drawn whenever a frame runs over budget and slowly restores it afterwards.
+    def __init__(self, capacity=2048, budget_ms=14.0, seed=None):
+        self.capacity = capacity
+        self.budget_ms = budget_ms
+        self.quality = 1.0
+        self.min_quality = 1 / 16
+        self.rng = np.random.default_rng(seed)
+        self.count = 0
+        self.x = np.zeros(capacity, dtype=np.float32)
+        self.y = np.zeros(capacity, dtype=np.float32)
+        self.vx = np.zeros(capacity, dtype=np.float32)
+        self.vy = np.zeros(capacity, dtype=np.float32)
+        self.life = np.zeros(capacity, dtype=np.float32)
+        self.max_life = np.ones(capacity, dtype=np.float32)
+        self.kind = np.zeros(capacity, dtype=np.intp)
+        self.sprites = make_sprites()
+
+    def clear(self):
+        self.count = 0
+
+    def emit(self, kind, count, x, y):
+        count = min(int(count * self.quality), int(self.capacity * self.quality) - self.count)
+        if count <= 0:
+            return
+        _, _, speed_range, life_range = KINDS[kind]
+        angles = self.rng.uniform(0, 2 * math.pi, count)
+        speeds = self.rng.uniform(*speed_range, count)
+        lives = self.rng.uniform(*life_range, count)
+        s = slice(self.count, self.count + count)
+        self.x[s] = x
+        self.y[s] = y
+        self.vx[s] = np.cos(angles) * speeds
+        self.vy[s] = np.sin(angles) * speeds
+        self.life[s] = lives
+        self.max_life[s] = lives
+        self.kind[s] = kind
+        self.count += count
+
+    def update(self, scroll_x=0):
+        n = self.count
+        if n == 0:
+            return
+        kind = self.kind[:n]
+        vx = self.vx[:n]
+        vy = self.vy[:n]
+        vx *= DRAG[kind]
+        vy *= DRAG[kind]
+        vy += GRAVITY[kind]
+        self.x[:n] += vx + scroll_x
+        self.y[:n] += vy
+        self.life[:n] -= 1
+        alive = self.life[:n] > 0
+        if not alive.all():
+            keep = np.flatnonzero(alive)
+            for array in (self.x, self.y, self.vx, self.vy, self.life, self.max_life, self.kind):
+                array[:len(keep)] = array[keep]
+            self.count = len(keep)
+
+    def draw(self, screen):
+        n = self.count
+        if n == 0:
+            return
+        level = np.minimum((self.life[:n] / self.max_life[:n] * FADE_LEVELS).astype(np.intp), FADE_LEVELS - 1)
+        sprite_index = self.kind[:n] * FADE_LEVELS + level
+        xs = self.x[:n].astype(np.intp).tolist()
+        ys = self.y[:n].astype(np.intp).tolist()
+        sprites = self.sprites
+        screen.blits([(sprites[i], (x, y)) for i, x, y in zip(sprite_index.tolist(), xs, ys)], doreturn=False)
+
+    def adapt(self, frame_ms):
+        # frame_ms is the time spent producing the last frame, not counting the wait for the next one.
+        if frame_ms > self.budget_ms:
+            self.quality = max(self.min_quality, self.quality / 2)
+            self.count = min(self.count, int(self.capacity * self.quality))
+        elif frame_ms < self.budget_ms * 0.75:
+            self.quality = min(1.0, self.quality + 0.01)
@@ -0,0 +1,141 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import deque
+
+SLOW_FRAME_MS = 1000 / 60 * 1.5
+MAIN_TID = 1
+SAMPLE_TID = 2
+
+
+def frame_stack(frame, depth=12):
+    stack = []
+    while frame is not None and len(stack) < depth:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return stack
+
+
+class SessionProfiler:
+    # Profiles a whole play session. Each state machine state gets its own cProfile, switched at frame
+    # boundaries, and every frame is written to a Chrome trace (chrome://tracing, Perfetto) as a span with
+    # one child span per phase. A sampler thread records the main thread's stack every few milliseconds;
+    # samples are kept only for slow frames, where they show up under the frame as the functions running.
+    def __init__(self, directory, sample_interval=0.002, slow_frame_ms=SLOW_FRAME_MS):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.slow_frame_ms = slow_frame_ms
+        self.sample_interval = sample_interval
+        self.profiles = {}
+        self.state = None
+        self.frame = 0
+        self.frame_start = None
+        self.phases = []
+        self.slow_frames = 0
+        self.origin = time.perf_counter()
+        self.trace = open(os.path.join(directory, "trace.json"), "w")
+        self.trace.write('{"displayTimeUnit": "ms", "traceEvents": [\n')
+        self.write_event({"name": "thread_name", "ph": "M", "pid": 1, "tid": MAIN_TID, "args": {"name": "main loop"}})
+        self.write_event({"name": "thread_name", "ph": "M", "pid": 1, "tid": SAMPLE_TID,
+                          "args": {"name": "slow frame samples"}})
+        self.samples = deque()
+        self.main_thread = threading.get_ident()
+        self.sampling = True
+        self.sampler = threading.Thread(target=self.sample, name="profiler-sampler", daemon=True)
+        self.sampler.start()
+
+    def now(self):
+        return (time.perf_counter() - self.origin) * 1e6  # trace timestamps are microseconds
+
+    def write_event(self, event):
+        self.trace.write(json.dumps(event) + ",\n")
+
+    def sample(self):
+        while self.sampling:
+            time.sleep(self.sample_interval)
+            frame = sys._current_frames().get(self.main_thread)
+            if frame is not None:
+                self.samples.append((self.now(), frame_stack(frame)))
+            del frame
+
+    def begin_frame(self, state):
+        now = self.now()
+        if self.frame_start is not None:
+            self.end_frame(now)
+        if state != self.state:
+            if self.state is not None:
+                self.profiles[self.state].disable()
+            if state not in self.profiles:
+                self.profiles[state] = cProfile.Profile()
+            self.profiles[state].enable()
+            self.state = state
+        self.frame += 1
+        self.frame_start = now
+        self.phases = [("events", now)]
+
+    def mark(self, phase):
+        if self.frame_start is not None:
+            self.phases.append((phase, self.now()))
+
+    def end_frame(self, now):
+        # The wait for the next frame is traced but doesn't count towards a frame being slow.
+        work_end = now
+        for name, start in self.phases:
+            if name == "wait":
+                work_end = start
+        work_ms = (work_end - self.frame_start) / 1000
+        slow = work_ms > self.slow_frame_ms
+        self.write_event({"name": f"frame {self.frame}", "cat": self.state, "ph": "X", "pid": 1, "tid": MAIN_TID,
+                          "ts": self.frame_start, "dur": now - self.frame_start,
+                          "args": {"state": self.state, "work_ms": round(work_ms, 3), "slow": slow}})
+        ends = [start for _, start in self.phases[1:]] + [now]
+        for (name, start), end in zip(self.phases, ends):
+            self.write_event({"name": name, "cat": self.state, "ph": "X", "pid": 1, "tid": MAIN_TID, "ts": start,
+                              "dur": end - start})
+        samples = self.samples
+        if slow:
+            self.slow_frames += 1
+            self.write_samples([sample for sample in list(samples) if self.frame_start <= sample[0] <= work_end])
+        while samples and samples[0][0] < now:
+            samples.popleft()
+
+    def write_samples(self, samples):
+        # Consecutive samples in the same function become one span, with the call stack in its args.
+        run_start = None
+        for i, (ts, stack) in enumerate(samples):
+            if run_start is None:
+                run_start = ts
+            if i + 1 == len(samples) or samples[i + 1][1] != stack:
+                self.write_event({"name": stack[0] if stack else "?", "cat": self.state, "ph": "X", "pid": 1,
+                                  "tid": SAMPLE_TID, "ts": run_start,
+                                  "dur": ts - run_start + self.sample_interval * 1e6, "args": {"stack": stack}})
+                run_start = None
+
+    def close(self):
+        self.sampling = False
+        self.sampler.join()
+        if self.frame_start is not None:
+            self.end_frame(self.now())
+            self.frame_start = None
+        if self.state is not None:
+            self.profiles[self.state].disable()
+        self.trace.write(json.dumps({"name": "session", "ph": "i", "s": "g", "pid": 1, "tid": MAIN_TID,
+                                     "ts": self.now(), "args": {"frames": self.frame,
+                                                                "slow_frames": self.slow_frames}}) + "\n]}\n")
+        self.trace.close()
+        for state, profile in self.profiles.items():
+            profile.dump_stats(os.path.join(self.directory, f"{state}.prof"))
+            summary = io.StringIO()
+            pstats.Stats(profile, stream=summary).sort_stats("cumulative").print_stats(30)
+            with open(os.path.join(self.directory, f"{state}.txt"), "w") as f:
+                f.write(summary.getvalue())
+
+    def report(self):
+        return (f"Profile: {self.frame} frames, {self.slow_frames} slow, written to {self.directory} "
+                f"(trace.json and one .prof/.txt per state)")
@@ -0,0 +1,73 @@
+from collections import deque
+
+# Quality tiers, best first. Each tier keeps the savings of the ones before it.
+FULL = 0
+STILL_COINS = 1  # coins drawn unrotated, no title bob in the menus
+FLAT_BACKGROUND = 2  # base background only, not scrolled: one aligned blit instead of a layer stack
+BAKED_BRIGHTNESS = 3  # brightness baked into the background instead of a full-screen alpha overlay
+TIER_NAMES = ("full", "still coins", "flat background", "baked brightness")
+
+
+class QualityGovernor:
+    # Steps down one tier when too many recent frames ran over budget and back up after a long stretch with
+    # plenty of headroom. Stepping up is slow and gets slower each time it had to be undone soon after, so a
+    # machine sitting right at the edge of a tier settles instead of flickering between two.
+    def __init__(self, budget_ms=14.0, window=30, misses=8, headroom=0.6, upgrade_frames=180, max_upgrade_frames=3600,
+                 tier=None):
+        self.budget_ms = budget_ms
+        self.window = window
+        self.misses = misses
+        self.headroom = headroom
+        self.base_upgrade_frames = upgrade_frames
+        self.upgrade_frames = upgrade_frames
+        self.max_upgrade_frames = max_upgrade_frames
+        self.locked = tier is not None
+        self.tier = tier or FULL
+        self.recent = deque(maxlen=window)
+        self.calm_frames = 0
+        self.frames_since_upgrade = None
+        self.changes = 0
+        self.frames_at_tier = [0] * len(TIER_NAMES)
+
+    def frame(self, work_ms):
+        # work_ms is the time spent producing the last frame, not counting the wait for the next one.
+        self.frames_at_tier[self.tier] += 1
+        if self.locked:
+            return False
+        self.recent.append(work_ms > self.budget_ms)
+        if self.frames_since_upgrade is not None:
+            self.frames_since_upgrade += 1
+        if work_ms < self.budget_ms * self.headroom:
+            self.calm_frames += 1
+        else:
+            self.calm_frames = 0
+        if sum(self.recent) >= self.misses and self.tier < len(TIER_NAMES) - 1:
+            if self.frames_since_upgrade is not None and self.frames_since_upgrade < self.upgrade_frames:
+                self.upgrade_frames = min(self.max_upgrade_frames, self.upgrade_frames * 2)
+            self.frames_since_upgrade = None
+            self.set_tier(self.tier + 1)
+            return True
+        if self.calm_frames >= self.upgrade_frames and self.tier > FULL:
+            self.set_tier(self.tier - 1)
+            self.frames_since_upgrade = 0
+            return True
+        if self.frames_since_upgrade is not None and self.frames_since_upgrade > self.max_upgrade_frames:
+            self.upgrade_frames = self.base_upgrade_frames  # the last upgrade held, so trust the next one sooner
+            self.frames_since_upgrade = None
+        return False
+
+    def set_tier(self, tier):
+        self.tier = tier
+        self.changes += 1
+        self.recent.clear()
+        self.calm_frames = 0
+
+    @property
+    def name(self):
+        return TIER_NAMES[self.tier]
+
+    def report(self):
+        total = sum(self.frames_at_tier) or 1
+        shares = ", ".join(f"{name} {frames / total:.0%}" for name, frames in zip(TIER_NAMES, self.frames_at_tier)
+                           if frames)
+        return f"Quality: {self.changes} tier changes, ended at {self.name}; frames at {shares}"
@@ -0,0 +1,86 @@
+from array import array
+
+from constants import FPS
+
+KEYFRAME_INTERVAL = 30
+NO_COIN = -32768
+
+
+class RewindBuffer:
+    # The last few seconds of a run in fixed memory. Every KEYFRAME_INTERVAL ticks the whole GameState is kept;
+    # every tick adds a few bytes: the bird's y change, its velocity, the score change and the x of a coin picked
+    # up that tick. A tick is rebuilt by replaying the world from the keyframe before it with collisions off and
+    # the recorded bird put back in place. Slots are reused in a ring, so memory never grows with the session.
+    def __init__(self, seconds=5, keyframe_interval=KEYFRAME_INTERVAL):
+        self.keyframe_interval = keyframe_interval
+        self.capacity = -(-int(seconds * FPS) // keyframe_interval) * keyframe_interval
+        self.keyframes = [None] * (self.capacity // keyframe_interval + 1)
+        self.dy = array("h", [0]) * self.capacity
+        self.velocity_y = array("h", [0]) * self.capacity
+        self.half_points = array("B", [0]) * self.capacity
+        self.coin_x = array("h", [NO_COIN]) * self.capacity
+        self.first_tick = 0
+        self.last_tick = -1
+        self.last_y = 0
+        self.last_score = 0
+
+    def start(self, game):
+        self.first_tick = game.ticks
+        self.last_tick = game.ticks - 1
+        self.last_y = int(game.bird.y)
+        self.last_score = game.score
+        self.record(game)
+
+    def record(self, game, coin_x=None):
+        tick = game.ticks
+        if tick % self.keyframe_interval == 0 or tick == self.first_tick:
+            self.keyframes[tick // self.keyframe_interval % len(self.keyframes)] = game.snapshot()
+        i = tick % self.capacity
+        y = int(game.bird.y)
+        self.dy[i] = y - self.last_y
+        self.velocity_y[i] = int(game.velocity_y)
+        self.half_points[i] = int((game.score - self.last_score) * 2)
+        self.coin_x[i] = NO_COIN if coin_x is None else int(coin_x)
+        self.last_y = y
+        self.last_score = game.score
+        self.last_tick = tick
+
+    @property
+    def oldest_tick(self):
+        # The earliest tick whose keyframe and every delta after it are still in the ring.
+        oldest = self.last_tick - self.capacity + 1
+        oldest += -oldest % self.keyframe_interval
+        return max(self.first_tick, oldest)
+
+    def state_at(self, tick):
+        if not self.oldest_tick <= tick <= self.last_tick:
+            return None
+        keyframe_tick = max(self.first_tick, tick - tick % self.keyframe_interval)
+        state = self.keyframes[keyframe_tick // self.keyframe_interval % len(self.keyframes)].snapshot()
+        state.game_over = False
+        y = state.bird_y
+        score = state.score
+        for t in range(keyframe_tick + 1, tick + 1):
+            i = t % self.capacity
+            state.update(collide=False)
+            if self.coin_x[i] != NO_COIN:
+                j = state.coin_x.index(self.coin_x[i])
+                del state.coin_x[j], state.coin_y[j], state.coin_rot[j]
+            y += self.dy[i]
+            score += self.half_points[i] / 2
+            state.bird_y = y
+            state.velocity_y = self.velocity_y[i]
+            state.score = score
+        return state
+
+    def truncate(self, tick, game):
+        # Continue recording from a restored tick; everything recorded after it is forgotten. Ticks older than
+        # the current window stay out of reach, their slots have already been reused.
+        self.first_tick = self.oldest_tick
+        self.last_tick = tick
+        self.last_y = int(game.bird.y)
+        self.last_score = game.score
+
+    @property
+    def nbytes(self):
+        return sum(len(a) * a.itemsize for a in (self.dy, self.velocity_y, self.half_points, self.coin_x))
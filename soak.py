@@ -0,0 +1,235 @@
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+from collections import deque
+
+import pygame
+
+from autopilot import Autopilot
+from constants import FPS
+
+REPORT_FILE = "soak_report.json"
+# Growth below these amounts between the start and the end of a soak is noise, whatever the trend.
+MIN_GROWTH = {"rss_kb": 8192, "objects": 2000, "frame_p50": 1.0, "frame_p95": 1.0, "frame_max": 4.0,
+              "input_p95": 4.0}
+DEFAULT_MIN_GROWTH = 8
+GROWTH_TOLERANCE = 0.10
+LATENCY_METRICS = ("frame_p50", "frame_p95", "frame_max", "input_p95")
+
+# Labels of the buttons the soak clicks; where they are is looked up in the screens' widget groups.
+START_BUTTON = "Start New Game"
+HIGH_SCORES_BUTTON = "High Scores"
+SETTINGS_BUTTON = "Settings"
+INSTRUCTIONS_BUTTON = "Game Instructions"
+BACK_BUTTON = "Back to Menu"
+
+
+def rss_kb():
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # peak rather than current, but still a trend
+    except ImportError:
+        return 0
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def median(values):
+    return percentile(values, 0.5)
+
+
+def find_drift(samples, caps=None):
+    # Compares the median of the first and last quarter of each series. A series is flagged when it ended up
+    # clearly higher and mostly went up on the way (more rises than falls, positive least-squares slope).
+    # Bounded collections are expected to fill up to their cap, so they are only flagged if they exceed it.
+    caps = caps or {}
+    findings = []
+    for metric, cap in caps.items():
+        peak = max((sample[metric] for sample in samples if metric in sample), default=0)
+        if peak > cap:
+            findings.append({"metric": metric, "kind": "over cap", "early": cap, "late": peak,
+                             "per_hour": 0.0, "rises": 0, "falls": 0})
+    if len(samples) < 8:
+        return findings
+    times = [sample["t"] for sample in samples]
+    quarter = len(samples) // 4
+    for metric in samples[0]:
+        if metric in ("t", "runs") or metric in caps:
+            continue
+        values = [sample[metric] for sample in samples]
+        early = median(values[:quarter])
+        late = median(values[-quarter:])
+        rises = sum(b > a for a, b in zip(values, values[1:]))
+        falls = sum(b < a for a, b in zip(values, values[1:]))
+        mean_t = sum(times) / len(times)
+        mean_v = sum(values) / len(values)
+        spread = sum((t - mean_t) ** 2 for t in times) or 1
+        slope = sum((t - mean_t) * (v - mean_v) for t, v in zip(times, values)) / spread
+        growth = late - early
+        if (growth > MIN_GROWTH.get(metric, DEFAULT_MIN_GROWTH) and late > early * (1 + GROWTH_TOLERANCE)
+                and rises >= falls and slope > 0):
+            kind = "latency drift" if metric in LATENCY_METRICS else "monotonic growth"
+            findings.append({"metric": metric, "kind": kind, "early": early, "late": late,
+                             "per_hour": slope * 3600, "rises": rises, "falls": falls})
+    return findings
+
+
+class SoakDriver:
+    # Plays the game unattended by posting the same input events a player would: menus, name entry, runs
+    # flown by the autopilot (which is taken away after max_run_seconds so runs end), game over and high
+    # score entry. Every few seconds it samples memory, object counts, entity lists and frame times.
+    # screens maps game states to their WidgetGroups, where the buttons to click are found by label; caps
+    # gives the size limit of any bounded collection among the counts.
+    def __init__(self, game, seconds, screens, counts=None, caps=None, sample_seconds=10.0,
+                 max_run_seconds=90.0, report_file=REPORT_FILE):
+        self.game = game
+        self.screens = screens
+        self.counts = counts
+        self.caps = caps or {}
+        self.sample_seconds = sample_seconds
+        self.max_run_ticks = int(max_run_seconds * FPS)
+        self.report_file = report_file
+        self.started = time.monotonic()
+        self.end_time = self.started + seconds
+        self.next_sample = self.started + sample_seconds
+        self.finished = False
+        self.frame_times = []
+        self.samples = []
+        self.runs = 0
+        self.state = None
+        self.state_frames = 0
+        self.menu_plan = deque()
+        self.autopilot = Autopilot()
+
+    def button_center(self, state, label):
+        for widget in self.screens[state].widgets:
+            if getattr(widget, "msg", None) == label:
+                return widget.rect.center
+        raise ValueError(f"soak: no {label!r} button on the {state} screen")
+
+    def post_click(self, pos):
+        pygame.event.post(pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=(0, 0), buttons=(0, 0, 0)))
+        pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1))
+        pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONUP, pos=pos, button=1))
+
+    def post_key(self, key, unicode=""):
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key, unicode=unicode, mod=0))
+        pygame.event.post(pygame.event.Event(pygame.KEYUP, key=key, unicode=unicode, mod=0))
+
+    def frame(self, state, work_ms):
+        self.frame_times.append(work_ms)
+        now = time.monotonic()
+        if now >= self.next_sample:
+            self.sample(now)
+            self.next_sample += self.sample_seconds
+        if now >= self.end_time:
+            self.finished = True
+            return
+        if state != self.state:
+            self.state = state
+            self.state_frames = 0
+            if state == "game_over":
+                self.runs += 1
+        self.state_frames += 1
+        if state == "playing":
+            if self.state_frames == 1:
+                self.game.autopilot = self.autopilot
+            elif self.game.ticks > self.max_run_ticks:
+                self.game.autopilot = None  # let the bird drop so the run ends
+        elif self.state_frames % (2 * FPS) == 10:
+            # Act shortly after a screen comes up, and again every couple of seconds if nothing happened.
+            self.act(state)
+
+    def act(self, state):
+        if state == "main_menu":
+            if not self.menu_plan:
+                # Every fifth run also walks through the other screens.
+                if self.runs % 5 == 0:
+                    self.menu_plan.extend((HIGH_SCORES_BUTTON, SETTINGS_BUTTON, INSTRUCTIONS_BUTTON))
+                self.menu_plan.append(START_BUTTON)
+            self.post_click(self.button_center(state, self.menu_plan.popleft()))
+        elif state == "get_username":
+            for char in "SOAK":
+                self.post_key(ord(char.lower()), char)
+            self.post_key(pygame.K_RETURN)
+        elif state == "game_over":
+            self.post_key(pygame.K_RETURN)
+        elif state == "high_scores":
+            self.post_click(self.button_center(state, BACK_BUTTON))
+        elif state in ("settings", "instructions", "paused"):
+            self.post_key(pygame.K_ESCAPE)
+
+    def sample(self, now):
+        frame_times = self.frame_times or [0.0]
+        sample = {
+            "t": round(now - self.started, 1),
+            "runs": self.runs,
+            "rss_kb": rss_kb(),
+            "objects": len(gc.get_objects()),
+            "pipes": len(self.game.pipes),
+            "coins": len(self.game.coins),
+            "pooled": len(self.game.pipe_pool) + len(self.game.coin_pool),
+            "frame_p50": round(median(frame_times), 3),
+            "frame_p95": round(percentile(frame_times, 0.95), 3),
+            "frame_max": round(max(frame_times), 3),
+        }
+        if self.counts is not None:
+            sample.update(self.counts())
+        self.samples.append(sample)
+        self.frame_times = []
+        self.write_report()
+
+    def write_report(self):
+        # Rewritten at every sample so a crashed soak still leaves its data behind.
+        tmp_path = self.report_file + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"samples": self.samples, "caps": self.caps, "findings": find_drift(self.samples, self.caps)},
+                      f, indent=1)
+        os.replace(tmp_path, self.report_file)
+
+    def report(self):
+        findings = find_drift(self.samples, self.caps)
+        lines = [f"Soak: {self.runs} runs, {len(self.samples)} samples over "
+                 f"{(self.samples[-1]['t'] if self.samples else 0) / 3600:.2f} h, report in {self.report_file}"]
+        for finding in findings:
+            if finding["kind"] == "over cap":
+                lines.append(f"  over cap: {finding['metric']} reached {finding['late']}, cap {finding['early']}")
+                continue
+            lines.append(f"  {finding['kind']}: {finding['metric']} {finding['early']} -> {finding['late']} "
+                         f"({finding['per_hour']:+.1f}/h, {finding['rises']} rises, {finding['falls']} falls)")
+        if not findings:
+            lines.append("  no growth or latency drift found")
+        if self.samples and self.caps:
+            peaks = ", ".join(f"{metric} {max(sample.get(metric, 0) for sample in self.samples)}/{cap}"
+                              for metric, cap in self.caps.items())
+            lines.append(f"  bounded (peak/cap): {peaks}")
+        return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the game headlessly for hours and look for leaks and drift")
+    parser.add_argument("--hours", type=float, default=4.0)
+    parser.add_argument("--report", default=REPORT_FILE)
+    parser.add_argument("--show", action="store_true", help="open a window instead of running headless")
+    args, game_args = parser.parse_known_args()
+    if not args.show:
+        # Must be set before flappy_bird initializes pygame's display and mixer.
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import flappy_bird
+    flappy_bird.main(["--soak", str(args.hours), "--soak-report", args.report] + game_args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+import os
+import queue
+import struct
+import threading
+import time
+from array import array
+
+# Event kinds
+RUN_START = 0
+JUMP = 1
+COIN = 2
+PIPE_PASS = 3
+DIFFICULTY = 4
+DEATH = 5
+
+# Death causes
+CAUSE_NONE = 0
+CAUSE_GROUND = 1
+CAUSE_TOP_PIPE = 2
+CAUSE_BOTTOM_PIPE = 3
+
+TELEMETRY_DIR = "telemetry"
+FILE_MAGIC = b"FBT1"
+BLOCK_HEADER = struct.Struct("<4sI")
+
+# Column name and array typecode. A block on disk is the header followed by each column's raw bytes in this order.
+COLUMNS = [
+    ("run", "I"),         # run number within the session
+    ("tick", "I"),        # simulation tick within the run
+    ("kind", "B"),
+    ("difficulty", "B"),
+    ("cause", "B"),
+    ("y", "f"),           # bird y
+    ("gap", "f"),         # bird centre minus the centre of the next pipe gap, NaN when there is none
+    ("value", "f"),       # pipe pair index for passes and pipe deaths, 0 otherwise
+]
+
+
+class EventBuffer:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.size = 0
+        self.columns = [array(code, [0]) * capacity for _, code in COLUMNS]
+
+    def to_bytes(self):
+        parts = [BLOCK_HEADER.pack(FILE_MAGIC, self.size)]
+        for column in self.columns:
+            parts.append(column[:self.size].tobytes())
+        return b"".join(parts)
+
+
+class Telemetry:
+    # Events land in a fixed-size columnar buffer; full buffers are handed to a writer thread that appends
+    # them as blocks to one file per session. If the writer falls behind, whole blocks are dropped and counted.
+    def __init__(self, directory=TELEMETRY_DIR, buffer_size=4096, max_pending=8):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"session-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.fbt")
+        self.buffer_size = buffer_size
+        self.buffer = EventBuffer(buffer_size)
+        self.pending = queue.Queue(max_pending)
+        self.run = 0
+        self.dropped = 0
+        self.written = 0
+        self.thread = threading.Thread(target=self.write_blocks, name="telemetry-writer", daemon=True)
+        self.thread.start()
+
+    def record(self, kind, tick, difficulty, y, gap, cause=CAUSE_NONE, value=0.0):
+        if kind == RUN_START:
+            self.run += 1
+        buffer = self.buffer
+        i = buffer.size
+        run, ticks, kinds, difficulties, causes, ys, gaps, values = buffer.columns
+        run[i] = self.run
+        ticks[i] = tick
+        kinds[i] = kind
+        difficulties[i] = difficulty
+        causes[i] = cause
+        ys[i] = y
+        gaps[i] = gap
+        values[i] = value
+        buffer.size = i + 1
+        if buffer.size == buffer.capacity:
+            self.flush()
+
+    def flush(self):
+        if self.buffer.size == 0:
+            return
+        try:
+            self.pending.put_nowait(self.buffer)
+        except queue.Full:
+            self.dropped += self.buffer.size
+        self.buffer = EventBuffer(self.buffer_size)
+
+    def write_blocks(self):
+        with open(self.path, "ab") as f:
+            while True:
+                buffer = self.pending.get()
+                if buffer is None:
+                    break
+                f.write(buffer.to_bytes())
+                f.flush()
+                self.written += buffer.size
+
+    def close(self):
+        self.flush()
+        self.pending.put(None)
+        self.thread.join(timeout=5)
@@ -0,0 +1,136 @@
+import argparse
+import glob
+import os
+
+import numpy as np
+
+from telemetry import (BLOCK_HEADER, CAUSE_BOTTOM_PIPE, CAUSE_GROUND, CAUSE_TOP_PIPE, COLUMNS, DEATH, DIFFICULTY,
+                       FILE_MAGIC, RUN_START, TELEMETRY_DIR)
+
+DTYPES = {"I": np.uint32, "B": np.uint8, "f": np.float32}
+LEVELS = 7
+Y_BINS = np.linspace(0, 1024, 33)
+GAP_BINS = np.linspace(-512, 512, 33)
+SURVIVAL_TICKS = 3600
+
+
+def iter_blocks(path):
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(BLOCK_HEADER.size)
+            if len(header) < BLOCK_HEADER.size:
+                return
+            magic, size = BLOCK_HEADER.unpack(header)
+            if magic != FILE_MAGIC:
+                raise ValueError(f"{path}: not a telemetry file")
+            block = {}
+            for name, code in COLUMNS:
+                dtype = DTYPES[code]
+                data = f.read(size * np.dtype(dtype).itemsize)
+                if len(data) < size * np.dtype(dtype).itemsize:
+                    return  # torn write at the end of a live session
+                block[name] = np.frombuffer(data, dtype=dtype)
+            yield block
+
+
+def iter_chunks(path, chunk_rows=1 << 20):
+    # Coalesce small on-disk blocks so the numpy work runs on large arrays, while memory stays bounded.
+    pending = []
+    rows = 0
+    for block in iter_blocks(path):
+        pending.append(block)
+        rows += len(block["tick"])
+        if rows >= chunk_rows:
+            yield {name: np.concatenate([b[name] for b in pending]) for name, _ in COLUMNS}
+            pending = []
+            rows = 0
+    if pending:
+        yield {name: np.concatenate([b[name] for b in pending]) for name, _ in COLUMNS}
+
+
+class Report:
+    def __init__(self):
+        self.heatmaps = np.zeros((LEVELS, len(Y_BINS) - 1, len(GAP_BINS) - 1), dtype=np.int64)
+        self.causes = np.zeros((LEVELS, 4), dtype=np.int64)
+        # Time spent in each difficulty level: ended by death (observed) or by levelling up (censored).
+        self.deaths_at = np.zeros((LEVELS, SURVIVAL_TICKS + 1), dtype=np.int64)
+        self.censored_at = np.zeros((LEVELS, SURVIVAL_TICKS + 1), dtype=np.int64)
+        self.events = 0
+
+    def add_file(self, path):
+        carry = None
+        for chunk in iter_chunks(path):
+            self.events += len(chunk["tick"])
+            self.add_deaths(chunk)
+            carry = self.add_stints(chunk, carry)
+
+    def add_deaths(self, chunk):
+        deaths = chunk["kind"] == DEATH
+        levels = np.minimum(chunk["difficulty"][deaths], LEVELS - 1)
+        ys = chunk["y"][deaths]
+        gaps = np.nan_to_num(chunk["gap"][deaths], nan=0.0)
+        causes = chunk["cause"][deaths]
+        np.add.at(self.causes, (levels, np.minimum(causes, 3)), 1)
+        y_idx = np.clip(np.digitize(ys, Y_BINS) - 1, 0, len(Y_BINS) - 2)
+        gap_idx = np.clip(np.digitize(gaps, GAP_BINS) - 1, 0, len(GAP_BINS) - 2)
+        np.add.at(self.heatmaps, (levels, y_idx, gap_idx), 1)
+
+    def add_stints(self, chunk, carry):
+        marks = np.isin(chunk["kind"], (RUN_START, DIFFICULTY, DEATH))
+        run = chunk["run"][marks]
+        tick = chunk["tick"][marks].astype(np.int64)
+        kind = chunk["kind"][marks]
+        level = np.minimum(chunk["difficulty"][marks], LEVELS - 1)
+        if carry is not None:
+            run, tick, kind, level = (np.concatenate(([c], a)) for c, a in zip(carry, (run, tick, kind, level)))
+        if len(run) == 0:
+            return carry
+        starts = (kind[:-1] != DEATH) & (run[:-1] == run[1:])
+        durations = np.minimum(tick[1:] - tick[:-1], SURVIVAL_TICKS)[starts]
+        died = kind[1:][starts] == DEATH
+        stint_levels = level[:-1][starts]
+        np.add.at(self.deaths_at, (stint_levels[died], durations[died]), 1)
+        np.add.at(self.censored_at, (stint_levels[~died], durations[~died]), 1)
+        return run[-1], tick[-1], kind[-1], level[-1]
+
+    def survival_curves(self):
+        # Kaplan-Meier estimate per level over ticks spent in that level.
+        exits = self.deaths_at + self.censored_at
+        at_risk = exits.sum(axis=1, keepdims=True) - np.cumsum(exits, axis=1) + exits
+        with np.errstate(divide="ignore", invalid="ignore"):
+            hazard = np.where(at_risk > 0, self.deaths_at / at_risk, 0.0)
+        return np.cumprod(1.0 - hazard, axis=1)
+
+    def save(self, path):
+        np.savez_compressed(path, heatmaps=self.heatmaps, y_bins=Y_BINS, gap_bins=GAP_BINS, causes=self.causes,
+                            survival=self.survival_curves(), deaths_at=self.deaths_at, censored_at=self.censored_at)
+
+    def summary(self):
+        survival = self.survival_curves()
+        lines = [f"{self.events} events",
+                 "level  deaths  ground  top  bottom  median ticks survived"]
+        for level in range(LEVELS):
+            deaths = self.causes[level].sum()
+            below = np.nonzero(survival[level] <= 0.5)[0]
+            median = str(below[0]) if len(below) else f">{SURVIVAL_TICKS}"
+            lines.append(f"{level:5d}  {deaths:6d}  {self.causes[level, CAUSE_GROUND]:6d}  "
+                         f"{self.causes[level, CAUSE_TOP_PIPE]:3d}  {self.causes[level, CAUSE_BOTTOM_PIPE]:6d}  {median:>8}")
+        return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Death heatmaps and survival curves per difficulty level")
+    parser.add_argument("paths", nargs="*", help="telemetry files (default: all files in telemetry/)")
+    parser.add_argument("--out", default="telemetry_report.npz")
+    args = parser.parse_args()
+    paths = args.paths or sorted(glob.glob(os.path.join(TELEMETRY_DIR, "*.fbt")))
+    report = Report()
+    for path in paths:
+        report.add_file(path)
+    report.save(args.out)
+    print(report.summary())
+    print(f"Heatmaps and survival curves written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
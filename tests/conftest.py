@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The game modules live at the top of the repository, and pygame must not open a real window or audio device.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
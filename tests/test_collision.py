@@ -0,0 +1,52 @@
+import os
+
+import pygame
+import pytest
+
+from constants import BIRD_HEIGHT, BIRD_WIDTH, PIPE_HEIGHT, PIPE_WIDTH
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def game():
+    cwd = os.getcwd()
+    os.chdir(ROOT)  # the game loads its sprites from the working directory
+    try:
+        import flappy_bird
+        yield flappy_bird.FlappyBirdGame(pygame.display.set_mode((1, 1)))
+    finally:
+        os.chdir(cwd)
+
+
+def boxes_overlap(bird, x, y):
+    return bird.x < x + PIPE_WIDTH and bird.x + BIRD_WIDTH > x and bird.y < y + PIPE_HEIGHT and bird.y + BIRD_HEIGHT > y
+
+
+def test_transparent_corners_do_not_crash(game):
+    # Look for a spot just below a top pipe where the bounding boxes touch but no opaque pixels do. GameState,
+    # which only has the boxes, calls that a crash; the live game lets the bird through.
+    bird = game.bird
+    near_misses = 0
+    for pipe_x in range(bird.x - PIPE_WIDTH + 1, bird.x + BIRD_WIDTH):
+        for depth in range(1, 6):
+            pipe_y = bird.y + depth - PIPE_HEIGHT
+            assert boxes_overlap(bird, pipe_x, pipe_y)
+            if not game.check_mask_collision(bird, game.bird_mask, pipe_x, pipe_y, game.top_pipe_mask):
+                near_misses += 1
+    assert near_misses > 0
+
+
+def test_overlapping_sprites_crash(game):
+    bird = game.bird
+    pipe_x = bird.x - PIPE_WIDTH // 2
+    pipe_y = bird.y + BIRD_HEIGHT // 2 - PIPE_HEIGHT
+    assert boxes_overlap(bird, pipe_x, pipe_y)
+    assert game.check_mask_collision(bird, game.bird_mask, pipe_x, pipe_y, game.top_pipe_mask)
+    assert game.check_mask_collision(bird, game.bird_mask, pipe_x, bird.y + BIRD_HEIGHT // 2, game.bottom_pipe_mask)
+
+
+def test_separate_boxes_never_crash(game):
+    bird = game.bird
+    assert not game.check_mask_collision(bird, game.bird_mask, bird.x + BIRD_WIDTH, bird.y, game.top_pipe_mask)
+    assert not game.check_mask_collision(bird, game.bird_mask, bird.x, bird.y + BIRD_HEIGHT, game.bottom_pipe_mask)
@@ -0,0 +1,60 @@
+import datetime
+import itertools
+
+import pytest
+
+from course import Course, daily_course
+from game_state import GameState
+
+
+def test_direct_index_matches_walking_from_zero():
+    walked = list(itertools.islice(Course(7, cache_size=8), 500))
+    direct = Course(7, cache_size=8)
+    for k in (499, 0, 250, 3, 498, 131):
+        assert direct[k] == walked[k]
+        assert direct.pipe_pair(k, 4) == walked[k].resolve(4)
+    assert len(direct.cache) == 6
+
+
+def test_cache_evicts_the_least_recently_used():
+    course = Course(3, cache_size=3)
+    first = course[0]
+    course[1]
+    course[2]
+    course[0]
+    course[3]
+    assert list(course.cache) == [2, 0, 3]
+    assert course[0] is first
+    assert course[1] == Course(3)[1]
+    with pytest.raises(IndexError):
+        course[-1]
+
+
+def test_same_seed_same_pipes():
+    assert [Course("abc")[k] for k in range(100)] == [Course("abc")[k] for k in range(100)]
+    assert [Course(1)[k] for k in range(20)] != [Course(2)[k] for k in range(20)]
+    day = datetime.date(2024, 2, 29)
+    assert daily_course(day).seed == daily_course(day).seed
+    assert daily_course(day).name == "Daily Challenge 2024-02-29"
+
+
+def run_pipes(course, seed, ticks=3000):
+    state = GameState(seed)
+    state.course = course
+    pipes = []
+    for _ in range(ticks):
+        gap = state.next_gap()
+        target = (gap[0] + gap[1]) / 2 if gap is not None else 512
+        state.step(state.bird_y + 12 > target and state.velocity_y >= 0)
+        if state.game_over:
+            break
+        pipes.append(state.pipe_y.tolist()[:len(state.pipe_x)])
+    return pipes
+
+
+def test_two_players_on_a_daily_course_fly_the_same_pipes():
+    # Different RNG seeds for the rest of the game, same course: the pipes still have to match.
+    day = datetime.date(2024, 2, 29)
+    pipes = run_pipes(daily_course(day), 1)
+    assert len(pipes) > 300
+    assert pipes == run_pipes(daily_course(day), 2)[:len(pipes)]
@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+from course import Course
+from game_state import GameState
+
+
+def fields(state):
+    values = {}
+    for name in GameState.__slots__:
+        value = getattr(state, name)
+        values[name] = value.tolist() if hasattr(value, "tolist") else value
+    return values
+
+
+def play(seed, ticks, course=False):
+    # A state part way through a run, flown by a policy that is sloppy enough to crash now and then.
+    rng = random.Random(seed)
+    state = GameState(seed)
+    if course:
+        state.course = Course(seed)
+    for _ in range(ticks):
+        gap = state.next_gap()
+        target = (gap[0] + gap[1]) / 2 if gap is not None else 512
+        state.step(state.bird_y + 12 > target + rng.randint(-80, 80) and state.velocity_y >= 0)
+        if state.game_over:
+            state = GameState(seed)
+    return state
+
+
+@pytest.mark.parametrize("course", [False, True])
+def test_advance_matches_repeated_step(course):
+    rng = random.Random(45)
+    checked = 0
+    for seed in range(120):
+        start = play(seed, rng.randint(0, 1500), course)
+        for _ in range(6):
+            ticks = rng.randint(1, 80)
+            flap = rng.random() < 0.5
+            coarse = start.snapshot()
+            done = coarse.advance(ticks, flap)
+            fine = start.snapshot()
+            fine.step(flap)
+            stepped = 1
+            while stepped < ticks and not fine.game_over:
+                fine.update()
+                stepped += 1
+            assert done == stepped
+            assert fields(coarse) == fields(fine), (seed, start.ticks, ticks, flap)
+            checked += 1
+    assert checked == 720
+
+
+def test_advance_stops_at_the_crash():
+    state = GameState(1)
+    done = state.advance(10000)
+    assert state.game_over
+    assert done == state.ticks < 10000
@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from ghosts import KEYFRAME_INTERVAL, Ghost, GhostRecorder, load_ghosts, save_run
+
+
+def record(ticks, y=300):
+    recorder = GhostRecorder(y)
+    path = [y]
+    for t in range(1, ticks):
+        y = max(0, y + (t * 7919) % 23 - 11)
+        recorder.record(y)
+        path.append(y)
+    return recorder, path
+
+
+def test_round_trip_and_seek(tmp_path):
+    ticks = 3 * KEYFRAME_INTERVAL + 17
+    recorder, path = record(ticks)
+    file_name = str(tmp_path / "run.ghost")
+    recorder.save(file_name, 42)
+    ghost = Ghost(file_name)
+    try:
+        assert (ghost.length, ghost.score) == (ticks, 42)
+        played = []
+        while ghost.active:
+            played.append(ghost.y)
+            ghost.advance()
+        assert played == path
+        for tick in (0, 1, KEYFRAME_INTERVAL - 1, KEYFRAME_INTERVAL, 2 * KEYFRAME_INTERVAL + 5, ticks - 1):
+            ghost.seek(tick)
+            assert ghost.y == path[tick]
+        ghost.seek(ticks)
+        assert not ghost.active
+    finally:
+        ghost.close()
+
+
+def test_truncate_after_rewind(tmp_path):
+    recorder, path = record(2 * KEYFRAME_INTERVAL + 40)
+    recorder.truncate(KEYFRAME_INTERVAL + 3)
+    recorder.record(path[KEYFRAME_INTERVAL + 3] + 5)
+    file_name = str(tmp_path / "run.ghost")
+    recorder.save(file_name, 1)
+    ghost = Ghost(file_name)
+    try:
+        ghost.seek(KEYFRAME_INTERVAL + 4)
+        assert ghost.y == path[KEYFRAME_INTERVAL + 3] + 5
+        ghost.advance()
+        assert not ghost.active
+    finally:
+        ghost.close()
+
+
+@pytest.mark.parametrize("cut", [3, 1, 200, "all"])
+def test_damaged_files_are_skipped(tmp_path, cut):
+    directory = str(tmp_path)
+    good = save_run(record(500)[0], directory, "alice", 10)
+    bad = save_run(record(600)[0], directory, "bob", 20)
+    bad_path = os.path.join(directory, bad)
+    size = os.path.getsize(bad_path)
+    with open(bad_path, "r+b") as f:
+        f.truncate(0 if cut == "all" else size - cut)
+    with pytest.raises(ValueError):
+        Ghost(bad_path)
+    scores = [{"name": "bob", "score": 20, "ghost": bad}, {"name": "alice", "score": 10, "ghost": good}]
+    ghosts = load_ghosts(directory, scores, "")
+    try:
+        assert [os.path.basename(ghost.path) for ghost in ghosts] == [good]
+    finally:
+        for ghost in ghosts:
+            ghost.close()
+    # Nothing keeps the damaged file open, so it can be replaced.
+    os.remove(bad_path)
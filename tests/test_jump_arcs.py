@@ -0,0 +1,64 @@
+import random
+
+from constants import PIPE_HEIGHT
+from game_state import MOVING, TOP, GameState
+from jump_arcs import can_clear, jump_windows, next_gap_check
+from test_game_state import play
+
+
+def fixed_pipes(state):
+    # The tables are exact for pipes that hold still and no coins, which can change the scroll speed mid-gap.
+    for i in range(len(state.pipe_flags)):
+        state.pipe_flags[i] &= ~MOVING
+    del state.coin_x[:], state.coin_y[:], state.coin_rot[:]
+    return state
+
+
+def through_gap(state, wait, first, last):
+    # Brute force: coast `wait` ticks, flap, then coast until the bird has left the pipe column. Bottom pipes
+    # can end above the ground, and a bird that survives by flying underneath one did not go through the gap.
+    below_pipe = state.next_gap()[1] + PIPE_HEIGHT
+    sim = state.snapshot()
+    for tick in range(1, last + 1):
+        sim.step(tick == wait + 1)
+        if sim.game_over or (tick >= first and sim.bird_y >= below_pipe):
+            return False
+    return True
+
+
+def test_jump_windows_match_simulation():
+    rng = random.Random(46)
+    checked = 0
+    with_windows = 0
+    for seed in range(200):
+        base = fixed_pipes(play(seed, rng.randint(100, 1500)))
+        check = next_gap_check(base, True)
+        if check is None or check[3] > 150:
+            continue
+        gap_top, gap_bottom, _ = base.next_gap()
+        for _ in range(6):
+            state = base.snapshot()
+            if rng.random() < 0.3:
+                # Near the ceiling, where a flap's arc gets clamped at y = 0.
+                state.bird_y = rng.randint(0, 60)
+                state.velocity_y = rng.randint(-11, 5)
+            else:
+                state.bird_y = rng.randint(max(0, gap_top - 150), min(990, gap_bottom + 50))
+                state.velocity_y = rng.randint(-11, 25)
+            _, _, first, last, _ = next_gap_check(state, True)
+            expected = [wait for wait in range(last) if through_gap(state, wait, first, last)]
+            windows = jump_windows(state)
+            found = [wait for earliest, latest in windows for wait in range(earliest, latest + 1)]
+            assert found == expected, (seed, state.bird_y, state.velocity_y)
+            assert can_clear(state, flap=True) == (0 in expected)
+            checked += last
+            with_windows += bool(windows)
+    assert checked > 20000
+    assert with_windows > 50
+
+
+def test_no_gap_ahead():
+    state = GameState(1)
+    assert jump_windows(state) == []
+    assert not can_clear(state, flap=True)
+    assert not any(state.pipe_flags[i] & TOP for i in range(len(state.pipe_flags)))
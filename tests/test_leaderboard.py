@@ -0,0 +1,122 @@
+import json
+import os
+import socket
+import time
+
+from leaderboard import LeaderboardClient, LeaderboardServer, merge_scores
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(tmp_path, port=0):
+    server = LeaderboardServer(str(tmp_path / "highscores.json"), "127.0.0.1", port)
+    server.run_in_thread()
+    return server
+
+
+def start_client(tmp_path, port):
+    return LeaderboardClient("127.0.0.1", port, queue_file=str(tmp_path / "queue.jsonl"), batch_delay=0.05,
+                             retry_delay=0.1, timeout=1.0).start()
+
+
+def test_round_trip(tmp_path):
+    server = start_server(tmp_path)
+    client = start_client(tmp_path, server.port)
+    try:
+        client.submit("alice", 12, "run-1.ghost")
+        client.submit("bob", 30)
+        assert wait_until(lambda: client.sent == 2)
+        assert [entry["name"] for entry in client.top] == ["bob", "alice"]
+        assert client.top[1]["ghost"] == "run-1.ghost"
+    finally:
+        client.close()
+        server.stop()
+    with open(tmp_path / "highscores.json") as f:
+        assert [entry["score"] for entry in json.load(f)] == [30, 12]
+    assert not server.thread.is_alive()
+
+
+def test_unreachable_server_spools_and_resends(tmp_path):
+    port = free_port()
+    client = start_client(tmp_path, port)
+    client.submit("carol", 7)
+    assert wait_until(lambda: client.spooled == 1)
+    client.close()
+    with open(tmp_path / "queue.jsonl") as f:
+        assert [json.loads(line)["name"] for line in f] == ["carol"]
+
+    server = start_server(tmp_path, port)
+    client = start_client(tmp_path, port)
+    try:
+        assert wait_until(lambda: client.sent == 1)
+        assert [(entry["name"], entry["score"]) for entry in client.top] == [("carol", 7)]
+        assert wait_until(lambda: not os.path.exists(tmp_path / "queue.jsonl"))
+    finally:
+        client.close()
+        server.stop()
+
+
+def test_rejected_entry_does_not_drop_the_spool(tmp_path):
+    with open(tmp_path / "queue.jsonl", "w") as f:
+        f.write(json.dumps({"name": "dave", "score": 5}) + "\n")
+        f.write(json.dumps({"name": "mallory", "score": "lots"}) + "\n")
+    server = start_server(tmp_path)
+    client = start_client(tmp_path, server.port)
+    try:
+        client.submit("erin", 9)
+        assert wait_until(lambda: client.sent == 2 and client.rejected == 1)
+        assert [entry["name"] for entry in server.high_scores] == ["erin", "dave"]
+        assert not os.path.exists(tmp_path / "queue.jsonl")
+    finally:
+        client.close()
+        server.stop()
+
+
+def test_stop_closes_open_connections(tmp_path):
+    server = start_server(tmp_path)
+    client = start_client(tmp_path, server.port)
+    client.submit("frank", 1)
+    assert wait_until(lambda: client.sent == 1)
+    assert len(server.clients) == 1  # the client keeps its connection open between batches
+    server.stop()
+    assert not server.thread.is_alive()
+    assert not server.clients
+    client.close()
+
+
+def test_resent_entries_are_merged_once(tmp_path):
+    # A batch whose reply was lost is spooled and sent again; the server must not list the same run twice.
+    server = start_server(tmp_path)
+    try:
+        request = json.dumps({"op": "submit", "entries": [{"name": "gina", "score": 4, "id": "a1"},
+                                                          {"name": "gina", "score": 4, "id": "b2"}]})
+        with socket.create_connection(("127.0.0.1", server.port), timeout=2) as s:
+            stream = s.makefile("rwb")
+            for _ in range(2):
+                stream.write(request.encode() + b"\n")
+                stream.flush()
+                reply = json.loads(stream.readline())
+        assert reply["ok"]
+        assert sorted(entry["id"] for entry in reply["top"]) == ["a1", "b2"]
+    finally:
+        server.stop()
+
+
+def test_merge_scores_keeps_entries_without_ids():
+    board = [{"name": "old", "score": 3}]
+    merged = merge_scores(board, [{"name": "old", "score": 3}, {"name": "new", "score": 5, "id": "x"},
+                                  {"name": "new", "score": 5, "id": "x"}])
+    assert [(entry["name"], entry["score"]) for entry in merged] == [("new", 5), ("old", 3), ("old", 3)]
@@ -0,0 +1,102 @@
+import asyncio
+import struct
+
+import pytest
+
+from constants import BIRD_HEIGHT, BOARD_HEIGHT
+from multiplayer import (EMPTY_STATE, MAX_LEAD, NO_BASELINE, RaceClient, RaceServer, bird_step, bot_flap,
+                         decode_snapshot, encode_snapshot)
+
+
+def payload(data):
+    return data[struct.calcsize("<H"):]
+
+
+def test_full_snapshot_round_trip():
+    states = {0: (512, -12, 3, 40, 1), 3: (1000, 25, 0, 7, 0)}
+    seq, baseline_seq, tick, decoded = decode_snapshot(payload(encode_snapshot(5, NO_BASELINE, 99, states, {})), {})
+    assert (seq, baseline_seq, tick) == (5, NO_BASELINE, 99)
+    assert decoded == states
+
+
+def test_delta_snapshots_track_the_baseline():
+    baseline = {0: (512, -12, 3, 40, 1), 1: (300, 4, 8, 41, 1), 2: (700, 0, 0, 0, 0)}
+    states = {0: (500, -11, 3, 41, 1), 1: (300, 4, 8, 41, 1), 4: EMPTY_STATE}
+    full = encode_snapshot(7, NO_BASELINE, 10, states, {})
+    delta = encode_snapshot(7, 6, 10, states, baseline)
+    assert len(delta) < len(full)
+    _, baseline_seq, _, decoded = decode_snapshot(payload(delta), baseline)
+    assert baseline_seq == 6
+    assert decoded == states  # 1 unchanged, 2 removed, 4 added with every field at its default
+
+
+def test_snapshot_chain_matches_every_state():
+    # A run of deltas, each against the previous snapshot, as the server sends them.
+    baseline = {}
+    client = {}
+    y, velocity_y = 512, 0
+    for seq in range(1, 200):
+        y, velocity_y = bird_step(y, velocity_y, seq % 17 == 0)
+        states = {0: (y, max(-128, min(127, velocity_y)), seq // 50, seq, 1), 1: (256, 0, seq // 3, seq, 0)}
+        if seq % 40 == 0:
+            states[2] = (seq, 1, 1, 1, 1)
+        _, _, _, client = decode_snapshot(payload(encode_snapshot(seq, seq - 1, seq, states, baseline)), client)
+        assert client == states
+        baseline = states
+
+
+async def race(port, count, seconds, flap=None):
+    # Bots as in run_bots(): full RaceClients sharing this event loop, stepped at the server's tick rate.
+    loop = asyncio.get_running_loop()
+    bots = []
+    for i in range(count):
+        client = RaceClient("127.0.0.1", port, f"Bot {i + 1}")
+        client.loop = loop
+        client.task = loop.create_task(client.run())
+        bots.append(client)
+    end = loop.time() + seconds
+    rounds = set()
+    while loop.time() < end:
+        for client in bots:
+            client.update(client.world is not None and client.alive and flap is not None and flap(client))
+            if client.world is not None and client.alive:
+                rounds.add(client.round)
+                assert client.world.tick <= client.server_tick + MAX_LEAD
+        await asyncio.sleep(1 / 60)
+    for client in bots:
+        client.task.cancel()
+    await asyncio.gather(*(client.task for client in bots), return_exceptions=True)
+    return bots, rounds
+
+
+@pytest.fixture
+def server():
+    server = RaceServer("127.0.0.1", 0, lobby_seconds=0.2, seed=1)
+    server.run_in_thread()
+    yield server
+    server.stop()
+
+
+def test_bots_race_on_localhost(server):
+    bots, rounds = asyncio.run(race(server.port, 4, 2.0, lambda client: bot_flap(client, 0)))
+    ids = {client.player_id for client in bots}
+    assert len(ids) == 4
+    for client in bots:
+        assert client.snapshot_seq != NO_BASELINE
+        assert set(client.states) == ids
+        assert sorted(client.names.values()) == ["Bot 1", "Bot 2", "Bot 3", "Bot 4"]
+        assert client.round == 1
+    assert rounds == {1}
+    # Every bot was flying towards the gap, and every client saw all of them alive.
+    assert all(state[4] for client in bots for state in client.states.values())
+    assert server.bytes_sent > 0
+
+
+def test_round_ends_when_every_bird_crashes(server):
+    bots, rounds = asyncio.run(race(server.port, 2, 2.5))
+    # Birds that never flap hit the ground within a second, so a second round starts after the lobby.
+    assert {1, 2} <= rounds
+    for client in bots:
+        y, _, _, _, alive = client.states[client.player_id]
+        if not alive:
+            assert y + BIRD_HEIGHT > BOARD_HEIGHT
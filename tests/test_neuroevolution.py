@@ -0,0 +1,18 @@
+import numpy as np
+import pytest
+
+from neuroevolution import Population, load_population, save_checkpoint
+
+
+@pytest.mark.parametrize("size", [3, 5, 12])
+def test_resume_keeps_the_best_saved_genomes(tmp_path, size):
+    rng = np.random.default_rng(1)
+    population = Population(8, rng)
+    fitness = np.arange(8, dtype=float)
+    path = str(tmp_path / "checkpoint.npz")
+    save_checkpoint(path, population, fitness, generation=4, keep=5)
+    resumed, generation = load_population(path, size, np.random.default_rng(2))
+    assert generation == 5
+    assert resumed.w1.shape == (size,) + population.w1.shape[1:]
+    best_first = [7, 6, 5, 4, 3][:size]
+    assert np.array_equal(resumed.w1[:len(best_first)], population.w1[best_first])
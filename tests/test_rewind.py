@@ -0,0 +1,67 @@
+import pygame
+import pytest
+
+import flappy_bird
+from autopilot import Autopilot
+from rewind import RewindBuffer
+from test_game_state import fields
+
+
+@pytest.fixture(scope="module")
+def screen():
+    surface = pygame.display.set_mode((1, 1))
+    yield surface
+    pygame.display.quit()
+
+
+def fly(game, ticks, live, pilot):
+    # Plays like the PLAYING state of the main loop and keeps a snapshot of every tick.
+    for _ in range(ticks):
+        if pilot.decide(game.snapshot()):
+            game.jump()
+        game.update()
+        if game.game_over:
+            break
+        live[game.ticks] = game.snapshot()
+
+
+def rewound(buffer, tick):
+    state = buffer.state_at(tick)
+    assert state is not None, tick
+    return fields(state)
+
+
+def test_state_at_matches_live_snapshots(screen):
+    game = flappy_bird.FlappyBirdGame(screen)
+    game.rewind = RewindBuffer()
+    game.reset()
+    live = {0: game.snapshot()}
+    fly(game, 3000, live, Autopilot())
+    buffer = game.rewind
+    assert game.ticks > 2 * buffer.capacity
+    assert game.score >= 2  # pipes and coins were taken inside the window
+    assert buffer.oldest_tick > 0
+    assert buffer.state_at(buffer.oldest_tick - 1) is None
+    for tick in range(buffer.oldest_tick, buffer.last_tick + 1):
+        assert rewound(buffer, tick) == fields(live[tick]), tick
+
+
+def test_resume_after_rewind_keeps_recording(screen):
+    game = flappy_bird.FlappyBirdGame(screen)
+    game.rewind = RewindBuffer()
+    game.reset()
+    live = {0: game.snapshot()}
+    pilot = Autopilot()
+    fly(game, 400, live, pilot)
+    nbytes = game.rewind.nbytes
+    while game.ticks > 250 and game.rewind_step():
+        pass
+    game.resume_after_rewind()
+    assert game.ticks <= 250
+    assert fields(game.snapshot()) == fields(live[game.ticks])
+    live = {tick: state for tick, state in live.items() if tick <= game.ticks}
+    fly(game, 300, live, pilot)
+    buffer = game.rewind
+    for tick in range(buffer.oldest_tick, buffer.last_tick + 1):
+        assert rewound(buffer, tick) == fields(live[tick]), tick
+    assert buffer.nbytes == nbytes
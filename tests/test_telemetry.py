@@ -0,0 +1,79 @@
+import threading
+import time
+
+import numpy as np
+
+from telemetry import (CAUSE_GROUND, CAUSE_TOP_PIPE, COIN, COLUMNS, DEATH, DIFFICULTY, JUMP, PIPE_PASS, RUN_START,
+                       Telemetry)
+from telemetry_report import Report, iter_blocks
+
+
+def test_blocks_round_trip(tmp_path):
+    telemetry = Telemetry(str(tmp_path), buffer_size=5)
+    events = []
+    for i in range(13):
+        kind = RUN_START if i == 0 else (JUMP, COIN, PIPE_PASS)[i % 3]
+        event = (kind, i * 7, i % 4, 100.5 + i, float("nan") if i % 5 == 0 else i - 6.25, 0, float(i // 3))
+        telemetry.record(*event)
+        events.append(event)
+    telemetry.close()
+    assert (telemetry.written, telemetry.dropped) == (13, 0)
+
+    blocks = list(iter_blocks(telemetry.path))
+    assert [len(block["tick"]) for block in blocks] == [5, 5, 3]
+    columns = {name: np.concatenate([block[name] for block in blocks]) for name, _ in COLUMNS}
+    assert columns["run"].tolist() == [1] * 13
+    assert columns["kind"].tolist() == [event[0] for event in events]
+    assert columns["tick"].tolist() == [event[1] for event in events]
+    assert columns["difficulty"].tolist() == [event[2] for event in events]
+    assert columns["y"].tolist() == [event[3] for event in events]
+    np.testing.assert_array_equal(columns["gap"], np.array([event[4] for event in events], dtype=np.float32))
+    assert columns["value"].tolist() == [event[6] for event in events]
+
+
+class StalledTelemetry(Telemetry):
+    # A writer that cannot keep up: it does not start writing until the gate opens.
+    gate = threading.Event()
+
+    def write_blocks(self):
+        self.gate.wait()
+        super().write_blocks()
+
+
+def test_blocks_are_dropped_and_counted_when_the_writer_falls_behind(tmp_path):
+    telemetry = StalledTelemetry(str(tmp_path), buffer_size=2, max_pending=1)
+    for i in range(7):
+        telemetry.record(JUMP, i, 0, 0.0, 0.0)
+    # The first full buffer waits in the queue; the next two find it full and are dropped.
+    assert telemetry.dropped == 4
+    StalledTelemetry.gate.set()
+    deadline = time.monotonic() + 5
+    while telemetry.written < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    telemetry.close()
+    assert (telemetry.written, telemetry.dropped) == (3, 4)
+    assert [block["tick"].tolist() for block in iter_blocks(telemetry.path)] == [[0, 1], [6]]
+
+
+def test_survival_curves_known_answer(tmp_path):
+    telemetry = Telemetry(str(tmp_path), buffer_size=3)
+    # Level 0: deaths after 10 and 30 ticks, and one stint cut short by levelling up after 20.
+    telemetry.record(RUN_START, 0, 0, 500, 0)
+    telemetry.record(DEATH, 10, 0, 900, 0, CAUSE_GROUND)
+    telemetry.record(RUN_START, 0, 0, 500, 0)
+    telemetry.record(DIFFICULTY, 20, 1, 500, 0)
+    telemetry.record(DEATH, 25, 1, 300, 0, CAUSE_TOP_PIPE)
+    telemetry.record(RUN_START, 0, 0, 500, 0)
+    telemetry.record(DEATH, 30, 0, 900, 0, CAUSE_GROUND)
+    telemetry.close()
+
+    report = Report()
+    report.add_file(telemetry.path)
+    assert report.events == 7
+    assert report.causes[0, CAUSE_GROUND] == 2 and report.causes[1, CAUSE_TOP_PIPE] == 1
+    survival = report.survival_curves()
+    # Three at risk when the first dies at 10, one left when the last dies at 30.
+    np.testing.assert_allclose(survival[0, [0, 9, 10, 29, 30]], [1, 1, 2 / 3, 2 / 3, 0])
+    np.testing.assert_allclose(survival[1, [4, 5]], [1, 0])
+    assert survival[2:].min() == 1
+    assert report.summary().splitlines()[2].split()[-1] == "30"
@@ -0,0 +1,70 @@
+import pygame
+import pytest
+
+from widgets import Button, Slider, WidgetGroup
+
+
+@pytest.fixture(scope="module")
+def font():
+    pygame.font.init()
+    return pygame.font.Font(None, 20)
+
+
+def mouse(kind, pos):
+    if kind == pygame.MOUSEMOTION:
+        return pygame.event.Event(kind, pos=pos, rel=(0, 0), buttons=(0, 0, 0))
+    return pygame.event.Event(kind, pos=pos, button=1)
+
+
+def make_group(font):
+    clicks = []
+    # "a" and "b" share grid cells, "far" sits alone further down.
+    buttons = [Button(name, x, y, 100, 40, (0, 0, 0), (255, 255, 255), lambda name=name: clicks.append(name), font)
+               for name, x, y in (("a", 10, 10), ("b", 120, 10), ("far", 300, 500))]
+    return WidgetGroup(buttons), buttons, clicks
+
+
+def click(group, down, up):
+    for event in (mouse(pygame.MOUSEMOTION, down), mouse(pygame.MOUSEBUTTONDOWN, down),
+                  mouse(pygame.MOUSEMOTION, up), mouse(pygame.MOUSEBUTTONUP, up)):
+        group.handle_event(event)
+
+
+def test_one_press_and_release_fires_once(font):
+    group, _, clicks = make_group(font)
+    click(group, (50, 30), (60, 35))
+    assert clicks == ["a"]
+    click(group, (350, 520), (350, 520))
+    assert clicks == ["a", "far"]
+
+
+def test_release_on_another_button_fires_neither(font):
+    group, _, clicks = make_group(font)
+    click(group, (50, 30), (150, 30))
+    click(group, (150, 30), (50, 30))
+    click(group, (500, 300), (50, 30))  # pressed on empty space
+    assert clicks == []
+    click(group, (150, 30), (150, 30))
+    assert clicks == ["b"]
+
+
+def test_grid_hits_and_hover(font):
+    group, (a, b, far), _ = make_group(font)
+    assert group.hit((10, 10)) is a and group.hit((109, 49)) is a
+    assert group.hit((110, 30)) is None and group.hit((120, 30)) is b
+    assert group.hit((399, 539)) is far and group.hit((400, 540)) is None
+    group.handle_event(mouse(pygame.MOUSEMOTION, (150, 30)))
+    assert (a.hovered, b.hovered) == (False, True)
+    group.enter((20, 20))
+    assert (a.hovered, b.hovered) == (True, False)
+
+
+def test_slider_keeps_the_mouse_while_dragging(font):
+    values = []
+    slider = Slider(100, 100, 200, 10, 0.0, 1.0, 0.5, values.append)
+    group = WidgetGroup([slider])
+    group.handle_event(mouse(pygame.MOUSEBUTTONDOWN, (200, 105)))
+    group.handle_event(mouse(pygame.MOUSEMOTION, (600, 400)))  # far outside the slider, still dragging
+    group.handle_event(mouse(pygame.MOUSEBUTTONUP, (600, 400)))
+    group.handle_event(mouse(pygame.MOUSEMOTION, (150, 105)))
+    assert values == [1.0]
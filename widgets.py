@@ -0,0 +1,192 @@
+import time
+from collections import deque
+
+import pygame
+
+
+class Button:
+    def __init__(self, msg, x, y, w, h, inactive_color, active_color, action, font, click_sound=None):
+        self.rect = pygame.Rect(x, y, w, h)
+        self.inactive_color = inactive_color
+        self.active_color = active_color
+        self.action = action
+        self.font = font
+        self.click_sound = click_sound
+        self.hovered = False
+        self.pressed = False
+        self.set_label(msg)
+
+    def set_label(self, msg):
+        self.msg = msg
+        self.text_surface = self.font.render(msg, True, (0, 0, 0))
+        self.text_rect = self.text_surface.get_rect(center=self.rect.center)
+
+    def reset(self):
+        self.pressed = False
+
+    def handle_event(self, event):
+        # A click is a press and release of the left button inside the same button, so it fires exactly once.
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            self.pressed = True
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+            clicked = self.pressed and self.rect.collidepoint(event.pos)
+            self.pressed = False
+            if clicked:
+                if self.click_sound is not None:
+                    self.click_sound.play()
+                self.action()
+                return True
+        return False
+
+    def draw(self, screen):
+        pygame.draw.rect(screen, self.active_color if self.hovered else self.inactive_color, self.rect)
+        screen.blit(self.text_surface, self.text_rect)
+
+
+class Slider:
+    def __init__(self, x, y, w, h, min_val, max_val, initial_val, on_change=None):
+        self.rect = pygame.Rect(x, y, w, h)
+        self.knob_rect = pygame.Rect(x, y - 5, 20, h + 10)
+        self.min_val = min_val
+        self.max_val = max_val
+        self.val = initial_val
+        self.on_change = on_change
+        self.dragging = False
+        self.hovered = False
+        self.update_knob_pos()
+
+    @property
+    def hit_rect(self):
+        return self.rect.inflate(self.knob_rect.width, self.knob_rect.height - self.rect.height)
+
+    def reset(self):
+        self.dragging = False
+
+    def update_knob_pos(self):
+        knob_x = self.rect.x + (self.val - self.min_val) / (self.max_val - self.min_val) * self.rect.width
+        self.knob_rect.centerx = knob_x
+
+    def set_from_x(self, x):
+        self.val = self.min_val + (x - self.rect.x) / self.rect.width * (self.max_val - self.min_val)
+        self.val = max(self.min_val, min(self.max_val, self.val))
+        self.update_knob_pos()
+        if self.on_change is not None:
+            self.on_change(self.val)
+
+    def handle_event(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if self.knob_rect.collidepoint(event.pos):
+                self.dragging = True
+            elif self.rect.collidepoint(event.pos):
+                self.set_from_x(event.pos[0])
+                return True
+        elif event.type == pygame.MOUSEBUTTONUP:
+            self.dragging = False
+        elif event.type == pygame.MOUSEMOTION and self.dragging:
+            self.set_from_x(event.pos[0])
+            return True
+        return False
+
+    def draw(self, screen):
+        pygame.draw.rect(screen, (100, 100, 100), self.rect)
+        pygame.draw.rect(screen, (200, 200, 200), self.knob_rect)
+
+
+class InputLatency:
+    # Time from handling an input event to presenting the frame that shows its result.
+    def __init__(self, name="input", window=256):
+        self.name = name
+        self.samples = deque(maxlen=window)
+        self.waiting = []
+
+    def mark(self):
+        self.waiting.append(time.perf_counter())
+
+    def frame_presented(self):
+        if self.waiting:
+            now = time.perf_counter()
+            self.samples.extend(now - t for t in self.waiting)
+            self.waiting.clear()
+
+    def stats(self):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return {
+            "count": len(ordered),
+            "mean_ms": 1000 * sum(ordered) / len(ordered),
+            "p95_ms": 1000 * ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            "max_ms": 1000 * ordered[-1],
+        }
+
+    def report(self):
+        stats = self.stats()
+        if stats is None:
+            return f"{self.name} latency: no input"
+        return (f"{self.name} latency: {stats['mean_ms']:.1f} ms mean, {stats['p95_ms']:.1f} ms p95, "
+                f"{stats['max_ms']:.1f} ms max over the last {stats['count']} events")
+
+
+class WidgetGroup:
+    # Widgets for one screen, built once. Mouse events are routed through a grid index instead of every
+    # widget polling the mouse each frame; the widget that takes a press keeps the mouse until release.
+    def __init__(self, widgets=(), latency=None, cell_size=64):
+        self.cell_size = cell_size
+        self.latency = latency
+        self.widgets = []
+        self.cells = {}
+        self.hovered = None
+        self.captured = None
+        for widget in widgets:
+            self.add(widget)
+
+    def widget_rect(self, widget):
+        return getattr(widget, "hit_rect", widget.rect)
+
+    def add(self, widget):
+        self.widgets.append(widget)
+        rect = self.widget_rect(widget)
+        for cx in range(rect.left // self.cell_size, (rect.right - 1) // self.cell_size + 1):
+            for cy in range(rect.top // self.cell_size, (rect.bottom - 1) // self.cell_size + 1):
+                self.cells.setdefault((cx, cy), []).append(widget)
+        return widget
+
+    def hit(self, pos):
+        for widget in reversed(self.cells.get((pos[0] // self.cell_size, pos[1] // self.cell_size), ())):
+            if self.widget_rect(widget).collidepoint(pos):
+                return widget
+        return None
+
+    def set_hovered(self, widget):
+        if widget is not self.hovered:
+            if self.hovered is not None:
+                self.hovered.hovered = False
+            if widget is not None:
+                widget.hovered = True
+            self.hovered = widget
+
+    def enter(self, pos):
+        # Called when the screen becomes active so hover state matches where the mouse already is.
+        self.captured = None
+        for widget in self.widgets:
+            widget.reset()
+        self.set_hovered(self.hit(pos))
+
+    def handle_event(self, event):
+        if event.type not in (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+            return False
+        if self.latency is not None:
+            self.latency.mark()
+        target = self.hit(event.pos)
+        if event.type == pygame.MOUSEMOTION:
+            self.set_hovered(target)
+            return self.captured is not None and self.captured.handle_event(event)
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            self.captured = target
+            return target is not None and target.handle_event(event)
+        captured, self.captured = self.captured, None
+        return captured is not None and captured.handle_event(event)
+
+    def draw(self, screen):
+        for widget in self.widgets:
+            widget.draw(screen)